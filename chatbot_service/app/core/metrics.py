@@ -0,0 +1,15 @@
+from prometheus_client import Counter, Histogram, make_asgi_app
+from concierge_shared.metrics import StageTimer, log_sampled
+
+STAGE_SECONDS=Histogram(
+    "chatbot_stage_duration_seconds",
+    "Time spent in each stage of a chatbot request",
+    ["stage", "postcode"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+STAGE_FAILURES=Counter("chatbot_stage_failures_total", "Chatbot request stages that raised or returned an error", ["stage"])
+SESSIONS_CREATED=Counter("chatbot_sessions_created_total", "New user sessions")
+
+metrics_app=make_asgi_app()
+
+stage=StageTimer(STAGE_SECONDS, STAGE_FAILURES, per_site=False) # chatbot requests aren't tied to a website
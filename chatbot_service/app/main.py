@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.db.database_connection import db_connection
 from app.routes import events
+from app.core.metrics import metrics_app
 import os, asyncio
 from dotenv import load_dotenv
 load_dotenv()
@@ -18,4 +19,5 @@ app=FastAPI(lifespan=lifespan)
 def root():
     return {"message":"Chatbot service is up!"}
 
-app.include_router(router=events.router, prefix="/events")
\ No newline at end of file
+app.include_router(router=events.router, prefix="/events")
+app.mount("/metrics", metrics_app) # Prometheus scrape endpoint
\ No newline at end of file
@@ -27,4 +27,4 @@ echo "
        ,_//\\_,
         '-\/-'
 "
-gcloud builds submit --tag ${IMAGE_TAG}
\ No newline at end of file
+gcloud builds submit .. --config cloudbuild.yaml --substitutions=_IMAGE_TAG="${IMAGE_TAG}"
\ No newline at end of file
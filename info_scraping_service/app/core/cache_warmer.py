@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from app.core.run_scraping_pipeline import run_scraping_pipeline
+from app.utils.utils import normalise_query
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_WARMER_INTERVAL=float(os.getenv("CACHE_WARMER_INTERVAL", 0)) # seconds between runs, 0 disables the scheduler
+CACHE_WARMER_TOP_N=int(os.getenv("CACHE_WARMER_TOP_N", 10))
+CACHE_WARMER_CONCURRENCY=int(os.getenv("CACHE_WARMER_CONCURRENCY", 2))
+CACHE_WARMER_MAX_LOAD=float(os.getenv("CACHE_WARMER_MAX_LOAD", 0.75)) # 1-minute load average per CPU above which a run is skipped
+CACHE_WARMER_RUN_BUDGET=float(os.getenv("CACHE_WARMER_RUN_BUDGET", 300)) # seconds after which a run stops starting new queries
+CACHE_WARMER_DECAY=float(os.getenv("CACHE_WARMER_DECAY", 0.5)) # query counts are multiplied by this after every run
+CACHE_WARMER_TRACKED_PER_SLOT=int(os.getenv("CACHE_WARMER_TRACKED_PER_SLOT", 10)) # queries tracked per top_n slot, the rarest are pruned beyond that
+
+
+def _cpu_load() -> float | None:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError): # not available on every platform
+        return None
+
+
+class CacheWarmer:
+    """
+    Pre-scrapes the most requested postcode/radius queries in the background so interactive requests
+    find warm result, response and snapshot caches.
+
+    `record()` counts every scrape request while the scheduler is enabled. Every `interval` seconds the top
+    `top_n` queries are run through the scraping pipeline, `max_concurrency` at a time, unless the machine
+    is busier than `max_load`. Counts decay after each run so the ranking follows recent demand. At most
+    `tracked_per_slot * top_n` queries are kept between prunes (and never twice as many).
+    """
+
+    def __init__(
+        self,
+        interval: float = CACHE_WARMER_INTERVAL,
+        top_n: int = CACHE_WARMER_TOP_N,
+        max_concurrency: int = CACHE_WARMER_CONCURRENCY,
+        max_load: float = CACHE_WARMER_MAX_LOAD,
+        run_budget: float = CACHE_WARMER_RUN_BUDGET,
+        decay: float = CACHE_WARMER_DECAY,
+        tracked_per_slot: int = CACHE_WARMER_TRACKED_PER_SLOT,
+    ):
+        self.interval = interval
+        self.top_n = top_n
+        self.max_concurrency = max_concurrency
+        self.max_load = max_load
+        self.run_budget = run_budget
+        self.decay = decay
+        self.max_tracked = max(1, tracked_per_slot * top_n)
+        self.counts: Counter = Counter()
+        self.queries: dict[str, dict] = {}
+        self.last_run: dict | None = None
+        self.next_run_at: float | None = None
+        self._task: asyncio.Task | None = None
+        self._running = False
+
+    def record(self, query: dict):
+        if self.interval <= 0: # nothing would ever decay or use the counts
+            return
+        key = normalise_query(query.get("postcode", ""), query.get("params"))
+        self.counts[key] += 1
+        self.queries[key] = {"postcode": query.get("postcode", ""), "params": query.get("params") or {}}
+        if len(self.counts) >= 2 * self.max_tracked: # any postcode/params a client sends is a new key
+            self._prune(self.max_tracked)
+
+    def _prune(self, keep: int):
+        kept = dict(self.counts.most_common(keep))
+        for key in list(self.counts):
+            if key not in kept:
+                del self.counts[key]
+                self.queries.pop(key, None)
+
+    def top_queries(self) -> list[tuple[str, float]]:
+        return self.counts.most_common(self.top_n)
+
+    async def _warm(self, key: str, semaphore: asyncio.Semaphore, deadline: float, report: dict):
+        async with semaphore:
+            if time.monotonic() > deadline:
+                report["skipped"].append({"query": key, "reason": "run budget exhausted"})
+                return
+            start = time.monotonic()
+            try:
+                events = await run_scraping_pipeline(self.queries[key])
+                report["warmed"].append({"query": key, "events": len(events), "duration_s": round(time.monotonic() - start, 3)})
+            except Exception as e:
+                report["failed"].append({"query": key, "error": str(e)})
+
+    async def run_once(self) -> dict:
+        """Warms the current top queries, returns (and keeps) the run report."""
+        started_at = datetime.now(timezone.utc).isoformat()
+        report = {"started_at": started_at, "duration_s": 0.0, "warmed": [], "skipped": [], "failed": []}
+        load = _cpu_load()
+        if self._running:
+            report["skipped"].append({"query": None, "reason": "previous run still in progress"})
+        elif load is not None and load > self.max_load:
+            report["skipped"].append({"query": None, "reason": f"cpu load {load:.2f} above budget {self.max_load:.2f}"})
+        elif not self.counts:
+            report["skipped"].append({"query": None, "reason": "no queries recorded"})
+        else:
+            self._running = True
+            start = time.monotonic()
+            try:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                deadline = start + self.run_budget
+                await asyncio.gather(*[self._warm(key, semaphore, deadline, report) for key, _ in self.top_queries()])
+            finally:
+                self._running = False
+            report["duration_s"] = round(time.monotonic() - start, 3)
+            for key in list(self.counts):
+                self.counts[key] *= self.decay
+                if self.counts[key] < 0.1:
+                    del self.counts[key]
+                    self.queries.pop(key, None)
+        self.last_run = report
+        logging.info(
+            f"Cache warming: {len(report['warmed'])} warmed, {len(report['skipped'])} skipped, "
+            f"{len(report['failed'])} failed in {report['duration_s']}s"
+        )
+        return report
+
+    async def _loop(self):
+        while True:
+            self.next_run_at = time.time() + self.interval
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"Cache warming run failed: {e}")
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self.next_run_at = None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "interval_s": self.interval,
+            "next_run_at": datetime.fromtimestamp(self.next_run_at, timezone.utc).isoformat() if self.next_run_at else None,
+            "running": self._running,
+            "cpu_load": _cpu_load(),
+            "top_queries": [{"query": key, "score": round(score, 2)} for key, score in self.top_queries()],
+            "last_run": self.last_run,
+        }
+
+
+cache_warmer = CacheWarmer()
@@ -0,0 +1,221 @@
+import os
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+load_dotenv()
+
+CIRCUIT_FAILURE_THRESHOLD=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)) # consecutive failures that open a circuit
+CIRCUIT_RESET_TIMEOUT=float(os.getenv("CIRCUIT_RESET_TIMEOUT", 60)) # seconds an open circuit waits before a half-open probe
+ADAPTIVE_TIMEOUT_PERCENTILE=float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", 95))
+ADAPTIVE_TIMEOUT_MULTIPLIER=float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", 3))
+ADAPTIVE_TIMEOUT_MIN=float(os.getenv("ADAPTIVE_TIMEOUT_MIN", 2))
+ADAPTIVE_TIMEOUT_MIN_SAMPLES=int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", 20))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class _DeferredOutcome:
+    """The last outcome reported for a domain inside `CircuitBreaker.single_outcome`, recorded when the block ends."""
+    def __init__(self, breaker: "CircuitBreaker", domain: str):
+        self.breaker = breaker
+        self.domain = domain
+        self.probing = False # this block holds the domain's half-open probe
+        self.outcome = None
+        self.closed = False
+
+    def defers(self, breaker: "CircuitBreaker", url: str) -> bool:
+        return not self.closed and breaker is self.breaker and breaker.domain(url) == self.domain
+
+
+_deferred_outcome: ContextVar[_DeferredOutcome | None] = ContextVar("circuit_deferred_outcome", default=None)
+
+
+class DomainHealth:
+    def __init__(self, latency_window: int):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.latencies: dict[str, deque] = {}
+        self.latency_window = latency_window
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def samples(self, kind: str) -> deque:
+        if kind not in self.latencies:
+            self.latencies[kind] = deque(maxlen=self.latency_window)
+        return self.latencies[kind]
+
+
+class CircuitBreaker:
+    """
+    Per-domain health tracking for outgoing fetches and renders.
+
+    After `failure_threshold` consecutive failures a domain's circuit opens and requests to it are rejected
+    straight away. Once `reset_timeout` has passed a single half-open probe is let through: success closes
+    the circuit, failure re-opens it.
+
+    A request that is let through must end in `record_success`, `record_failure` or, when it is cancelled
+    before it has an outcome, `release_probe`. Retried requests run inside `single_outcome`, so that all
+    their attempts count as one.
+
+    Latencies are kept per domain and request kind ("http", "render"). Once enough samples are in,
+    `timeout_for` returns `multiplier` x the latency percentile, so a healthy fast site isn't waited on
+    for the full default timeout when it stalls.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        percentile: float = ADAPTIVE_TIMEOUT_PERCENTILE,
+        multiplier: float = ADAPTIVE_TIMEOUT_MULTIPLIER,
+        min_timeout: float = ADAPTIVE_TIMEOUT_MIN,
+        min_samples: int = ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+        latency_window: int = 200,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.latency_window = latency_window
+        self._domains: dict[str, DomainHealth] = {}
+
+    @staticmethod
+    def domain(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _health(self, url: str) -> DomainHealth:
+        domain = self.domain(url)
+        if domain not in self._domains:
+            self._domains[domain] = DomainHealth(self.latency_window)
+        return self._domains[domain]
+
+    def is_open(self, url: str) -> bool:
+        """Whether requests to the url's domain are currently rejected (doesn't use up the half-open probe)."""
+        health = self._health(url)
+        if health.state == OPEN:
+            return time.monotonic() - health.opened_at < self.reset_timeout
+        return health.state == HALF_OPEN and health.probing
+
+    def allow(self, url: str) -> bool:
+        """Whether a request to the url's domain may go ahead. Callers must report its outcome."""
+        health = self._health(url)
+        deferred = _deferred_outcome.get()
+        if deferred is not None and deferred.defers(self, url) and deferred.probing and health.state == HALF_OPEN:
+            return True # a retry of the half-open probe
+        if health.state == OPEN and time.monotonic() - health.opened_at >= self.reset_timeout:
+            health.state = HALF_OPEN
+            health.probing = False
+        if health.state == CLOSED:
+            return True
+        if health.state == HALF_OPEN and not health.probing:
+            health.probing = True
+            if deferred is not None and deferred.defers(self, url):
+                deferred.probing = True
+            return True
+        health.rejected += 1
+        return False
+
+    def release_probe(self, url: str):
+        """Lets the next request probe a half-open domain, for a probe that ended without an outcome (e.g. cancelled)."""
+        health = self._health(url)
+        if health.state == HALF_OPEN:
+            health.probing = False
+
+    @contextmanager
+    def single_outcome(self, url: str):
+        """
+        Inside the block, outcomes reported for the url's domain are held back and only the last one is
+        recorded when the block ends, so a request retried several times counts once. A block that ends
+        without an outcome releases the half-open probe it took.
+        """
+        deferred = _DeferredOutcome(self, self.domain(url))
+        token = _deferred_outcome.set(deferred)
+        try:
+            yield
+        finally:
+            _deferred_outcome.reset(token)
+            deferred.closed = True
+            if deferred.outcome is not None:
+                record, args = deferred.outcome
+                record(*args)
+            elif deferred.probing:
+                self.release_probe(url)
+
+    def _defer(self, url: str, record, *args) -> bool:
+        deferred = _deferred_outcome.get()
+        if deferred is None or not deferred.defers(self, url):
+            return False
+        deferred.outcome = (record, (url, *args))
+        return True
+
+    def record_success(self, url: str, latency: float, kind: str = "http"):
+        if not self._defer(url, self._record_success, latency, kind):
+            self._record_success(url, latency, kind)
+
+    def record_failure(self, url: str):
+        if not self._defer(url, self._record_failure):
+            self._record_failure(url)
+
+    def _record_success(self, url: str, latency: float, kind: str = "http"):
+        health = self._health(url)
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.samples(kind).append(latency)
+        if health.state != CLOSED:
+            logging.info(f"Circuit for {self.domain(url)} closed")
+        health.state = CLOSED
+        health.probing = False
+
+    def _record_failure(self, url: str):
+        health = self._health(url)
+        health.failures += 1
+        health.consecutive_failures += 1
+        if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+            if health.state != OPEN:
+                logging.warning(f"Circuit for {self.domain(url)} opened after {health.consecutive_failures} consecutive failure(s)")
+            health.state = OPEN
+            health.opened_at = time.monotonic()
+            health.probing = False
+
+    def timeout_for(self, url: str, default: float, kind: str = "http") -> float:
+        """Adaptive timeout (seconds) for the url's domain, never above `default`."""
+        samples = self._health(url).samples(kind)
+        if len(samples) < self.min_samples:
+            return default
+        ordered = sorted(samples)
+        observed = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+        return min(default, max(self.min_timeout, observed * self.multiplier))
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            domain: {
+                "state": health.state,
+                "consecutive_failures": health.consecutive_failures,
+                "successes": health.successes,
+                "failures": health.failures,
+                "rejected": health.rejected,
+                "retry_in_s": round(max(0.0, self.reset_timeout - (now - health.opened_at)), 1) if health.state == OPEN else None,
+                "adaptive_timeouts_s": {
+                    kind: round(self.timeout_for(f"//{domain}", float("inf"), kind), 2)
+                    for kind, samples in health.latencies.items() if len(samples) >= self.min_samples
+                },
+            }
+            for domain, health in self._domains.items()
+        }
+
+
+circuit_breaker = CircuitBreaker()
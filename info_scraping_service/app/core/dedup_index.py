@@ -0,0 +1,237 @@
+import os
+import re
+import zlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List
+import numpy as np
+from app.models.event import AlternativeSource, Event
+from dotenv import load_dotenv
+load_dotenv()
+
+DEDUP_ENABLED=os.getenv("DEDUP_ENABLED", "true").lower()=="true"
+DEDUP_THRESHOLD=float(os.getenv("DEDUP_THRESHOLD", 0.6)) # estimated Jaccard similarity at which two events are the same
+DEDUP_NUM_PERM=int(os.getenv("DEDUP_NUM_PERM", 64))
+DEDUP_BANDS=int(os.getenv("DEDUP_BANDS", 16))
+DEDUP_INDEX_SIZE=int(os.getenv("DEDUP_INDEX_SIZE", 50000)) # canonical events kept, least recently seen dropped first
+
+MERSENNE_PRIME=np.uint64((1 << 61) - 1)
+MAX_HASH=np.uint64((1 << 32) - 1)
+
+STOPWORDS=frozenset(["a", "an", "and", "at", "by", "for", "in", "of", "on", "the", "to", "with"])
+MONTHS=["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+MONTH_PATTERN=r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+DAY_MONTH=re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{MONTH_PATTERN}\b")
+MONTH_DAY=re.compile(rf"\b{MONTH_PATTERN}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b")
+NUMERIC_DATE=re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/\d{2,4})?\b") # UK order, day first
+WEEKDAY=re.compile(r"\b(mon|tue|wed|thu|fri|sat|sun)(?:day|s|sday|nesday|rs|rsday|urday)?\b")
+TIME=re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b")
+POSTCODE=re.compile(r"\b([a-z]{1,2}\d[a-z\d]?)\s*(\d[a-z]{2})\b")
+
+
+def _title_features(title: str) -> set[str]:
+    words=[word for word in re.findall(r"[a-z0-9]+", title.lower()) if word not in STOPWORDS]
+    features={f"w:{word}" for word in words}
+    for word in words:
+        if word.isdigit(): # numbers are compared as whole words ("session 3" vs "session 4")
+            features.add(f"num:{word}")
+            continue
+        padded=f"_{word}_" # character trigrams make spelling variants ("favourite"/"favorite") overlap
+        features.update(f"g:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def _date_features(text: str) -> set[str]:
+    features=set()
+    for day, month in DAY_MONTH.findall(text):
+        features.add(f"date:{int(day)}-{month[:3]}")
+    for month, day in MONTH_DAY.findall(text):
+        features.add(f"date:{int(day)}-{month[:3]}")
+    for day, month in NUMERIC_DATE.findall(text):
+        if 1<=int(day)<=31 and 1<=int(month)<=12:
+            features.add(f"date:{int(day)}-{MONTHS[int(month) - 1]}")
+    features.update(f"dow:{day}" for day in WEEKDAY.findall(text))
+    for hour, minute, meridiem, hour_24, minute_24 in TIME.findall(text):
+        if meridiem:
+            hour=int(hour) % 12 + (12 if meridiem=="pm" else 0)
+            features.add(f"time:{hour:02d}:{minute or '00'}")
+        else:
+            features.add(f"time:{int(hour_24):02d}:{minute_24}")
+    return features
+
+
+def event_features(event: Event) -> set[str]:
+    """Normalised title words and trigrams plus the dates, times and postcode districts mentioned anywhere in the event."""
+    sections=event.event_detail.sections if event.event_detail and event.event_detail.sections else []
+    text=" ".join([event.title, event.content, *(section.content for section in sections)]).lower()
+    features=_title_features(event.title) | _date_features(text)
+    for district, sector_unit in POSTCODE.findall(text):
+        features.update([f"venue:{district}", f"postcode:{district}{sector_unit}"])
+    return features
+
+
+@dataclass
+class _Entry:
+    event: Event
+    signature: np.ndarray
+    dates: set[str]
+    venues: set[str]
+    band_keys: list[tuple]
+    sources: list[AlternativeSource]=field(default_factory=list)
+    aliases: list[str]=field(default_factory=list)
+
+
+class DedupIndex:
+    """
+    Near-duplicate index of scraped events across websites (MinHash + LSH).
+
+    Each event is reduced to a set of features (see `event_features`), hashed into a `num_perm` MinHash
+    signature and bucketed by `bands` signature bands, so candidates are found without comparing every pair.
+    A candidate from another domain is a duplicate when the estimated Jaccard similarity reaches `threshold`,
+    both events mention a date and they share one (a weekly event on another day isn't a duplicate), and they
+    don't mention different postcodes or postcode districts (the same club at another venue isn't a duplicate).
+    Numbers in titles must match exactly ("Week 3" isn't "Week 4"), they are part of the bucket keys.
+
+    The first version of an event seen becomes the canonical one; later duplicates are linked to it through
+    their `canonical_event_id` and their url is added to its `alternative_sources`. The index keeps the
+    `max_size` most recently seen canonical events for the life of the process, so duplicates are found
+    across queries too.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        bands: int = DEDUP_BANDS,
+        max_size: int = DEDUP_INDEX_SIZE,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_size = max_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._buckets: dict[tuple, set[str]] = {}
+        self._aliases: dict[str, str] = {}
+        self.stats = {"indexed": 0, "duplicates": 0, "evicted": 0}
+
+    def signature(self, features: set[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(feature.encode()) for feature in features), dtype=np.uint64, count=len(features))
+        if not len(hashes):
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray, numbers: frozenset[str]) -> list[tuple]:
+        return [(band, numbers, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    @staticmethod
+    def _conflicting(venues: set[str], other_venues: set[str], prefix: str) -> bool:
+        ours = {venue for venue in venues if venue.startswith(prefix)}
+        theirs = {venue for venue in other_venues if venue.startswith(prefix)}
+        return bool(ours and theirs and not ours & theirs)
+
+    def _find(self, event: Event, signature: np.ndarray, dates: set[str], venues: set[str], band_keys: list[tuple]) -> tuple[str, float] | None:
+        if not dates: # a title match alone isn't enough ("Coffee Morning" runs all over the city)
+            return None
+        candidates = set()
+        for key in band_keys:
+            candidates.update(self._buckets.get(key, ()))
+        candidates = [
+            event_id for event_id in candidates
+            if self._entries[event_id].event.domain != event.domain
+            and dates & self._entries[event_id].dates
+            and not self._conflicting(venues, self._entries[event_id].venues, "venue:")
+            and not self._conflicting(venues, self._entries[event_id].venues, "postcode:")
+        ]
+        if not candidates:
+            return None
+        signatures = np.stack([self._entries[event_id].signature for event_id in candidates])
+        similarities = np.count_nonzero(signatures == signature, axis=1) / self.num_perm
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        return candidates[best], float(similarities[best])
+
+    def _add(self, event: Event, signature: np.ndarray, dates: set[str], venues: set[str], band_keys: list[tuple]):
+        self._entries[event.event_id] = _Entry(event, signature, dates, venues, band_keys)
+        for key in band_keys:
+            self._buckets.setdefault(key, set()).add(event.event_id)
+        self.stats["indexed"] += 1
+        while len(self._entries) > self.max_size:
+            event_id, entry = self._entries.popitem(last=False)
+            for key in entry.band_keys:
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(event_id)
+                    if not bucket:
+                        del self._buckets[key]
+            for alias in entry.aliases:
+                self._aliases.pop(alias, None)
+            self.stats["evicted"] += 1
+
+    def _merge(self, canonical_id: str, event: Event) -> Event:
+        entry = self._entries[canonical_id]
+        self._entries.move_to_end(canonical_id)
+        if event.event_id not in self._aliases:
+            self._aliases[event.event_id] = canonical_id
+            entry.aliases.append(event.event_id)
+        if all(source.url != event.url for source in entry.sources):
+            entry.sources.append(AlternativeSource(event_id=event.event_id, url=event.url, domain=event.domain, title=event.title))
+        self.stats["duplicates"] += 1
+        return entry.event.model_copy(update={"alternative_sources": list(entry.sources)})
+
+    def canonicalise(self, event: Event) -> Event:
+        """Returns the canonical version of `event` (itself when it isn't a duplicate), indexing it if it's new."""
+        if event.event_id in self._entries:
+            self._entries.move_to_end(event.event_id)
+            self._entries[event.event_id].event = event # keep the freshest scrape as the canonical content
+            return event
+        canonical_id = self._aliases.get(event.event_id)
+        if canonical_id is not None:
+            return self._merge(canonical_id, event)
+        features = event_features(event)
+        signature = self.signature(features)
+        dates = {feature for feature in features if feature.startswith("date:")}
+        venues = {feature for feature in features if feature.startswith(("venue:", "postcode:"))}
+        numbers = frozenset(feature for feature in features if feature.startswith("num:"))
+        band_keys = self._band_keys(signature, numbers)
+        match = self._find(event, signature, dates, venues, band_keys)
+        if match is not None:
+            logging.debug(f"{event.url} is a duplicate of {self._entries[match[0]].event.url} (similarity {match[1]:.2f})")
+            return self._merge(match[0], event)
+        self._add(event, signature, dates, venues, band_keys)
+        return event
+
+    def collapse(self, events: List[Event]) -> List[Event]:
+        """
+        Links duplicates of already indexed events (from other websites) to their canonical event, keeping order.
+        Each duplicate is kept, with `canonical_event_id` set, and preceded by its canonical event.
+        """
+        collapsed: dict[str, Event] = {}
+        for event in events:
+            canonical = self.canonicalise(event)
+            collapsed[canonical.event_id] = canonical # a later merge carries every alternative source seen so far
+            if canonical.event_id != event.event_id:
+                collapsed[event.event_id] = event.model_copy(update={"canonical_event_id": canonical.event_id})
+        return list(collapsed.values())
+
+    def status(self) -> dict:
+        return {
+            "enabled": DEDUP_ENABLED,
+            "threshold": self.threshold,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "aliases": len(self._aliases),
+            **self.stats,
+        }
+
+
+dedup_index = DedupIndex()
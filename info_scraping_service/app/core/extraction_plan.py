@@ -0,0 +1,157 @@
+import re
+import json
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, List
+from bs4.element import Tag
+from app.core.parser_backends import ParserBackend, get_parser_backend
+from app.utils.utils import remove_unicode_chars
+
+Finder = Callable[[Tag], Tag | None]
+FinderAll = Callable[[Tag], List[Tag]]
+
+
+def _json_default(value):
+    if isinstance(value, re.Pattern):
+        return {"pattern": value.pattern, "flags": value.flags}
+    return repr(value)
+
+
+def config_hash(config: dict) -> str:
+    """Stable hash of a (page content) config, regex filter values included."""
+    serialised = json.dumps(config, sort_keys=True, default=_json_default)
+    return hashlib.sha1(serialised.encode()).hexdigest()
+
+
+def compile_text_extractor(config: dict, backend: ParserBackend = None) -> Callable[[Tag], str]:
+    if not config:
+        return lambda node: ""
+    backend = backend or get_parser_backend("html.parser")
+    find = backend.compile_find(config)
+    get_text = backend.get_text
+
+    def extract_text(node: Tag) -> str:
+        element = find(node)
+        return remove_unicode_chars(get_text(element, strip=True)) if element else ""
+
+    return extract_text
+
+
+def compile_url_extractor(config: dict, backend: ParserBackend = None) -> Callable[[Tag], str]:
+    if not config:
+        return lambda node: ""
+    backend = backend or get_parser_backend("html.parser")
+    find = backend.compile_find(config)
+    get_href = backend.get_href
+
+    def extract_url(node: Tag) -> str:
+        element = find(node)
+        return get_href(element) if element else ""
+
+    return extract_url
+
+
+@dataclass(frozen=True)
+class ExtractionPlan:
+    """
+    A site's page content config compiled into ready-to-call matchers/extractors.
+
+    Compiled once per distinct config (see `get_extraction_plan`) so the per-event loop
+    doesn't re-interpret the config dict for every field of every event.
+    """
+    backend: ParserBackend
+    domain: str
+    parse_listing: Callable[[str], Tag]
+    parse_detail: Callable[[str], Tag]
+    find_containers: FinderAll | None
+    extract_title: Callable[[Tag], str]
+    extract_url: Callable[[Tag], str]
+    extract_content: Callable[[Tag], str]
+    find_detail_container: Finder | None
+    match_detail_container: Callable[[Tag], bool] | None
+    find_detail_sections: FinderAll | None
+
+    def extract_all(self, containers: List[Tag]) -> List[dict]:
+        """Runs the field extractors over every event container in a single pass."""
+        extract_title, extract_url, extract_content = self.extract_title, self.extract_url, self.extract_content
+        return [
+            {
+                "title": extract_title(container),
+                "url": extract_url(container),
+                "content": extract_content(container),
+            }
+            for container in containers
+        ]
+
+    def extract_detail_sections(self, node: Tag, include_self: bool = False) -> List[dict]:
+        """
+        Extracts the detail sections below `node`.
+
+        With `include_self`, `node` itself may be the details container. That's the case for an
+        already-parsed listing container, which used to be serialised and re-parsed as its own document.
+        """
+        if self.find_detail_container is None:
+            return []
+        if include_self and self.match_detail_container(node):
+            details_container = node
+        else:
+            details_container = self.find_detail_container(node)
+        if not details_container:
+            return []
+        get_text, find_links = self.backend.get_text, self.backend.find_links
+        sections = []
+        for section in self.find_detail_sections(details_container):
+            text_content = remove_unicode_chars(get_text(section, strip=True))
+            sections.append({"content": text_content, "links": find_links(section)})
+        return sections
+
+
+def compile_plan(config: dict, backend: ParserBackend = None) -> ExtractionPlan:
+    backend = backend or get_parser_backend(config.get("parser"))
+    details_config = config.get("details")
+    if details_config:
+        find_detail_container = backend.compile_find(details_config["container"])
+        match_detail_container = backend.compile_match(details_config["container"])
+        find_detail_sections = backend.compile_find_all(details_config["sections"], filtered=False)
+    else:
+        find_detail_container = match_detail_container = find_detail_sections = None
+    return ExtractionPlan(
+        backend=backend,
+        domain=config.get("domain", ""),
+        parse_listing=backend.compile_parser(only=config.get("container")),
+        parse_detail=backend.compile_parser(only=details_config["container"] if details_config else None),
+        find_containers=backend.compile_find_all(config["container"]) if "container" in config else None,
+        extract_title=compile_text_extractor(config.get("title"), backend),
+        extract_url=compile_url_extractor(config.get("url"), backend),
+        extract_content=compile_text_extractor(config.get("content"), backend),
+        find_detail_container=find_detail_container,
+        match_detail_container=match_detail_container,
+        find_detail_sections=find_detail_sections,
+    )
+
+
+_plans: dict[tuple[str, str], ExtractionPlan] = {}
+_finders: dict[tuple[str, str], FinderAll] = {}
+
+
+def get_extraction_plan(config: dict, backend: ParserBackend = None) -> ExtractionPlan:
+    """
+    Returns the compiled plan for `config`, compiling it on first use.
+
+    The parser backend defaults to the config's `parser` key (html.parser when unset).
+    """
+    backend = backend or get_parser_backend(config.get("parser"))
+    key = (backend.name, config_hash(config))
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = compile_plan(config, backend)
+    return plan
+
+
+def get_find_all(config: dict, backend: ParserBackend = None) -> FinderAll:
+    backend = backend or get_parser_backend("html.parser")
+    key = (backend.name, config_hash(config))
+    finder = _finders.get(key)
+    if finder is None:
+        finder = _finders[key] = backend.compile_find_all(config)
+    return finder
@@ -0,0 +1,109 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from urllib.parse import urlparse
+from typing import Awaitable, Callable
+from app.core.circuit_breaker import CircuitBreaker, circuit_breaker as default_circuit_breaker
+from dotenv import load_dotenv
+load_dotenv()
+
+MAX_CONCURRENCY=int(os.getenv("FETCH_MAX_CONCURRENCY", 32))
+PER_HOST_CONCURRENCY=int(os.getenv("FETCH_PER_HOST_CONCURRENCY", 4))
+PER_HOST_RATE=float(os.getenv("FETCH_PER_HOST_RATE", 5)) # requests per second, 0 disables the limit
+MAX_RETRIES=int(os.getenv("FETCH_MAX_RETRIES", 2))
+BACKOFF_BASE=float(os.getenv("FETCH_BACKOFF_BASE", 0.5))
+BACKOFF_MAX=float(os.getenv("FETCH_BACKOFF_MAX", 8))
+
+RETRYABLE_STATUS_CODES={None, 408, 425, 429, 500, 502, 503, 504}
+
+
+class HostThrottle:
+    def __init__(self, concurrency: int, rate: float):
+        self.slots = asyncio.Semaphore(concurrency)
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait_turn(self):
+        """Sleeps until the next request to this host is allowed to start."""
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class FetchScheduler:
+    """
+    Runs fetches under a global concurrency cap plus per-host concurrency caps and rate limits,
+    retrying transient failures with jittered exponential backoff.
+
+    A fetch is any coroutine function returning the `{"content": ...}` / `{"error": ..., "status_code": ...}`
+    dicts produced by `run_search`. With a circuit breaker, the outcomes its attempts report count as
+    one: the last attempt's outcome is recorded once the retries are over.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        per_host_concurrency: int = PER_HOST_CONCURRENCY,
+        per_host_rate: float = PER_HOST_RATE,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self._global_slots = asyncio.Semaphore(max_concurrency)
+        self._hosts: dict[str, HostThrottle] = {}
+
+    def _throttle_for(self, url: str) -> HostThrottle:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = HostThrottle(self.per_host_concurrency, self.per_host_rate)
+        return self._hosts[host]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def run(self, url: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Runs `fetch` for `url` once a host and a global slot are free, retrying retryable errors.
+        """
+        if self.breaker is None:
+            return await self._run(url, fetch)
+        with self.breaker.single_outcome(url):
+            return await self._run(url, fetch)
+
+    async def _run(self, url: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        throttle = self._throttle_for(url)
+        attempt = 0
+        while True:
+            async with throttle.slots:
+                await throttle.wait_turn()
+                async with self._global_slots:
+                    response = await fetch()
+            if not response.get("error") or response.get("status_code") not in RETRYABLE_STATUS_CODES:
+                return response
+            if response.get("circuit_open"): # retrying can't help until the circuit's reset timeout
+                return response
+            if attempt >= self.max_retries:
+                return response
+            delay = self._backoff(attempt)
+            attempt += 1
+            logging.info(f"Retrying {url} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+
+fetch_scheduler = FetchScheduler(breaker=default_circuit_breaker)
@@ -1,38 +1,172 @@
-from app.core.read_html import HTMLReader
-from app.core.search import HTMLSearch, DynamicSearch
-from app.utils.utils import validate_query, remove_duplicates
+import os
+import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from app.core.parse_pool import parse_pool, PARSE_POOL_BATCH_SIZE
+from app.core.extraction_plan import config_hash
+from app.core.result_cache import result_cache, RESULT_CACHE_TTL
+from app.core.single_flight import SingleFlight
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.metrics import stage
+from app.core.search import WebsiteSearch, HTMLSearch, DynamicSearch
+from app.core.response_cache import DEFAULT_CACHE_TTL
+from app.core.snapshot_cache import DEFAULT_SNAPSHOT_TTL, DEFAULT_SNAPSHOT_MAX_STALE
+from app.db.database_service import EventDataService, SiteListingStateService
+from app.models.event import Event
+from app.utils.utils import validate_query, remove_duplicates, normalise_query
 from typing import List
+from dotenv import load_dotenv
+load_dotenv()
+
+INCREMENTAL_SCRAPING=os.getenv("INCREMENTAL_SCRAPING", "true").lower()=="true" # sites override it with `incremental`
+EVENT_DETAIL_MAX_AGE=float(os.getenv("EVENT_DETAIL_MAX_AGE", 3 * 24 * 3600)) # seconds before a known event's details are re-fetched
+
+event_data_service = EventDataService()
+listing_state_service = SiteListingStateService()
+incremental_stats = defaultdict(lambda: {"listings_unchanged": 0, "detail_fetches": 0, "detail_fetches_saved": 0})
+
+_searchers: dict[str, WebsiteSearch] = {}
+site_flight = SingleFlight("site_scrape") # one scrape per (website, query) at a time
+
+def get_searcher(request_config: dict, page_content_config: dict) -> WebsiteSearch:
+    """Returns the (stateless) searcher for a site's configuration, building it on first use."""
+    searcher_config = {
+        "website": request_config['website'],
+        "website_type": request_config.get("website_type"),
+        "cache_ttl": request_config.get("cache_ttl"),
+        "snapshot_max_stale": request_config.get("snapshot_max_stale"),
+        "render_profile": page_content_config.get("render_profile"),
+    }
+    key = config_hash(searcher_config)
+    searcher = _searchers.get(key)
+    if searcher is not None:
+        return searcher
+    if request_config.get("website_type")=="dynamic":
+        searcher = DynamicSearch(
+            website=request_config['website'],
+            cache_ttl=request_config.get("cache_ttl", DEFAULT_SNAPSHOT_TTL),
+            max_stale=request_config.get("snapshot_max_stale", DEFAULT_SNAPSHOT_MAX_STALE),
+            render_profile=page_content_config.get("render_profile"),
+        )
+    else:
+        searcher=HTMLSearch(website=request_config['website'], cache_ttl=request_config.get("cache_ttl", DEFAULT_CACHE_TTL))
+    _searchers[key] = searcher
+    return searcher
 
 async def get_scraped_dset(query: dict) -> List[dict]:
+    """
+    Returns the site's events for the query's postcode/params, from the result cache when they were
+    scraped within the site's `result_ttl` (default `RESULT_CACHE_TTL`), otherwise by scraping the site.
+    """
     validate_query(query, required_keys=["request_config", "page_content_config"])
     request_config=query['request_config']
-    page_content_config=query['page_content_config']
-    
-    if request_config.get("website_type")=="dynamic":
-        searcher = DynamicSearch(website=request_config['website'])
-    else:
-        searcher=HTMLSearch(website=request_config['website'])
-    reader = HTMLReader(page_content_config=page_content_config)
-    url = searcher.create_request_url(
-        request_config.get("postcode", ""),
-        request_config.get("params", {}),
-    )
-    if "locator" in page_content_config:
-        response = await searcher.run_search(url, locator_config=page_content_config['locator']) # will use playwright so await by default
-    else: 
-        response=searcher.run_search(url)
+    flight_key=(request_config['website'], normalise_query(request_config.get("postcode", ""), request_config.get("params", {})))
+    dset=await site_flight.do(flight_key, lambda: _get_cached_or_scraped_dset(query))
+    return [dict(event) for event in dset] # concurrent callers share the list
+
+async def _get_cached_or_scraped_dset(query: dict) -> List[dict]:
+    request_config=query['request_config']
+    cache_key_args=(request_config['website'], request_config.get("postcode", ""), request_config.get("params", {}))
+    result_ttl=request_config.get("result_ttl", RESULT_CACHE_TTL)
+    cached_dset=await result_cache.get(*cache_key_args, ttl=result_ttl)
+    if cached_dset is not None:
+        return cached_dset
+    dset=await _scrape_dset(request_config, query['page_content_config'])
+    await result_cache.put(*cache_key_args, dset, ttl=result_ttl)
+    return dset
+
+async def _scrape_dset(request_config: dict, page_content_config: dict) -> List[dict]:
+    searcher = get_searcher(request_config, page_content_config)
+    with stage("url_build"):
+        url = searcher.create_request_url(
+            request_config.get("postcode", ""),
+            request_config.get("params", {}),
+        )
+    with stage("render" if isinstance(searcher, DynamicSearch) else "fetch") as span:
+        if "locator" in page_content_config:
+            response = await searcher.run_search(url, locator_config=page_content_config['locator']) # will use playwright so await by default
+        else: 
+            response=await searcher.run_search(url)
+        span.failed = bool(response.get("error"))
+    if response.get("circuit_open"):
+        raise CircuitOpenError(response["error"])
     if response.get("error") or not response.get("content"):
         return []
+
+    website = request_config['website']
+    incremental = request_config.get("incremental", INCREMENTAL_SCRAPING)
+    listing_key = f"{website}|{normalise_query(request_config.get('postcode', ''), request_config.get('params', {}))}"
+    listing_hash = hashlib.sha1(response['content'].encode("utf-8")).hexdigest()
+    if incremental:
+        unchanged_dset = await _get_unchanged_listing(listing_key, listing_hash, request_config)
+        if unchanged_dset is not None:
+            return unchanged_dset
     
-    event_metadata = reader.get_event_metadata(content=response['content'], include_event_details=request_config['include_event_details'])
+    with stage("parse"):
+        event_metadata = await parse_pool.parse_listing(page_content_config, response['content'], request_config['include_event_details'])
     event_metadata=[{**event, "postcode":request_config['postcode']} for event in event_metadata]
     if request_config['include_event_details']==False:
-        event_detail_html_list = await searcher.fetch_event_details(event_metadata)
-        event_details = [reader.get_event_detail(d) for d in event_detail_html_list]
-        event_details_map = {detail["event_id"]: detail for detail in event_details}
+        known_details = {}
+        if incremental: # one lookup for the whole listing, only new or expired events get their details fetched
+            known_details = await event_data_service.get_fresh_event_details(
+                list({event["event_id"] for event in event_metadata}), EVENT_DETAIL_MAX_AGE
+            )
+        events_to_fetch = [event for event in event_metadata if event["event_id"] not in known_details]
+        incremental_stats[website]["detail_fetches"] += len(events_to_fetch)
+        incremental_stats[website]["detail_fetches_saved"] += len(event_metadata) - len(events_to_fetch)
+        with stage("detail_fetch"):
+            parse_batches, batch = [], []
+            async for d in searcher.stream_event_details(events_to_fetch):
+                if not d.get("event_id") or not d.get("content"): # failed fetches are retried on the next scrape, not stored as empty details
+                    continue
+                batch.append(d)
+                if len(batch) >= PARSE_POOL_BATCH_SIZE: # hand full batches to the parse pool while the remaining fetches run
+                    parse_batches.append(asyncio.create_task(parse_pool.parse_details(page_content_config, batch)))
+                    batch = []
+            parse_batches.append(asyncio.create_task(parse_pool.parse_details(page_content_config, batch)))
+            event_details = [detail for details in await asyncio.gather(*parse_batches) for detail in details]
+        fetched_details = {detail["event_id"]: detail for detail in event_details}
+        if incremental:
+            await event_data_service.refresh_event_details(fetched_details) # expired events, new ones are inserted by the caller
+        event_details_map = {**known_details, **fetched_details}
         for event in event_metadata:
             event["event_detail"] = event_details_map.get(event["event_id"], None)
+        logging.info(
+            f"{website}: fetched {len(events_to_fetch)} event detail page(s), "
+            f"{len(event_metadata) - len(events_to_fetch)} saved by incremental scraping"
+        )
     dset=remove_duplicates(event_metadata, 'event_id')
+    if incremental:
+        await listing_state_service.put_state(listing_key, listing_hash, [event["event_id"] for event in dset])
     return dset
 
-
+async def _get_unchanged_listing(listing_key: str, listing_hash: str, request_config: dict) -> List[dict] | None:
+    """
+    Returns the stored events of a listing page identical to the last one scraped for the same query,
+    or None when the listing changed, its events are no longer all stored or, when details are fetched
+    per event, some of their details are older than `EVENT_DETAIL_MAX_AGE`.
+    """
+    state = await listing_state_service.get_state(listing_key)
+    if state is None or state.get("listing_hash") != listing_hash:
+        return None
+    stored_events = await event_data_service.get_events_by_ids(state["event_ids"])
+    if len(stored_events) < len(state["event_ids"]):
+        return None
+    if request_config.get('include_event_details') == False:
+        fresh_details = await event_data_service.get_fresh_event_details(state["event_ids"], EVENT_DETAIL_MAX_AGE)
+        if len(fresh_details) < len(set(state["event_ids"])):
+            return None # the full path re-fetches only the expired details
+    stored_events_map = {event["_id"]: event for event in stored_events}
+    website = request_config['website']
+    incremental_stats[website]["listings_unchanged"] += 1
+    if request_config.get('include_event_details') == False:
+        incremental_stats[website]["detail_fetches_saved"] += len(stored_events)
+    logging.info(f"{website}: listing unchanged, reusing {len(stored_events)} stored event(s)")
+    return [
+        {
+            **{field: stored_events_map[event_id].get(field) for field in Event.model_fields if field not in ("errors", "canonical_event_id")}, # re-linked by the dedup index
+            "postcode": request_config['postcode'],
+        }
+        for event_id in state["event_ids"]
+    ]
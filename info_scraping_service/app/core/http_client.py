@@ -0,0 +1,272 @@
+import os
+import time
+import codecs
+import asyncio
+import logging
+import httpx
+from typing import Callable
+from app.core.response_cache import ResponseCache, response_cache
+from app.core.circuit_breaker import CircuitBreaker, circuit_breaker as default_circuit_breaker
+from dotenv import load_dotenv
+load_dotenv()
+
+MAX_CONNECTIONS=int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+REQUEST_TIMEOUT=float(os.getenv("HTTP_REQUEST_TIMEOUT", 20))
+MAX_RESPONSE_BYTES=int(os.getenv("HTTP_MAX_RESPONSE_BYTES", 10 * 1024 * 1024))
+HTML_CONTENT_TYPES=("text/html", "application/xhtml+xml")
+
+
+class ResponseTooLargeError(Exception):
+    pass
+
+
+class HTTPClient:
+    """
+    Process-wide async HTTP client shared by every search/reader in the service.
+
+    Wraps a single `httpx.AsyncClient` so connections are kept alive and reused across requests,
+    HTTP/2 is negotiated where the server supports it and gzip/brotli bodies are decoded transparently.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT,
+        max_response_bytes: int = MAX_RESPONSE_BYTES,
+        cache: ResponseCache | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.timeout = timeout
+        self.max_response_bytes = max_response_bytes
+        self.cache = cache
+        self.breaker = breaker
+        self.client: httpx.AsyncClient | None = None
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=True,
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _read_body(self, response: httpx.Response, max_bytes: int) -> bytes:
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLargeError(f"Response of {declared} bytes exceeds limit of {max_bytes}")
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLargeError(f"Response exceeds limit of {max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def fetch(self, url: str, timeout: float = None, max_bytes: int = None, ttl: float = None, **kwargs) -> dict:
+        """
+        Sends a GET request and returns the decoded body.
+
+        When `ttl` is given and the client has a cache, a cached body younger than `ttl` seconds is returned
+        without a request. Older entries are revalidated with a conditional GET and reused on `304 Not Modified`.
+
+        With a circuit breaker, requests to a domain whose circuit is open are rejected (served from a stale
+        cache entry when there is one) and the default timeout adapts to the domain's observed latency.
+
+        Args:
+        ------
+            url (str): The URL to fetch.
+            timeout (float, optional): Per-request timeout in seconds, defaults to the client timeout.
+            max_bytes (int, optional): Maximum (decoded) body size, defaults to the client limit.
+            ttl (float, optional): Seconds a cached response may be served without revalidation, None disables caching.
+            kwargs: Passed on to `httpx.AsyncClient.stream()`, e.g. `headers` or `params`.
+
+        Returns:
+        --------
+        dict: {"content": str, "status_code": int} or {"error": str, "status_code": int | None}
+              (with `"circuit_open": True` when the request was rejected by the circuit breaker)
+        """
+        if self.client is None:
+            await self.start()
+        max_bytes = max_bytes or self.max_response_bytes
+        request_timeout = timeout if timeout is not None else self.timeout
+        if self.breaker is not None and timeout is None:
+            request_timeout = self.breaker.timeout_for(url, request_timeout)
+        use_cache = self.cache is not None and ttl is not None
+        cached = None
+        if use_cache:
+            cached, fresh = await asyncio.to_thread(self.cache.lookup, url, ttl)
+            if fresh:
+                return {"content": cached.content, "status_code": 200, "from_cache": True}
+            if cached:
+                kwargs["headers"] = {**kwargs.get("headers", {}), **cached.conditional_headers()}
+        if self.breaker is None:
+            return await self._fetch(url, request_timeout, max_bytes, cached, use_cache, **kwargs)
+        if not self.breaker.allow(url):
+            if cached:
+                return {"content": cached.content, "status_code": 200, "from_cache": True, "stale": True}
+            return {"error": f"Circuit open for {self.breaker.domain(url)}", "status_code": None, "circuit_open": True}
+        start = time.monotonic()
+        try:
+            response = await self._fetch(url, request_timeout, max_bytes, cached, use_cache, **kwargs)
+        except BaseException: # cancelled, `_fetch` turns errors into responses
+            self.breaker.release_probe(url)
+            raise
+        status_code = response.get("status_code")
+        if status_code is None or status_code >= 500 or status_code == 429:
+            self.breaker.record_failure(url)
+        else:
+            self.breaker.record_success(url, time.monotonic() - start)
+        return response
+
+    async def fetch_stream(
+        self,
+        url: str,
+        on_text: Callable[[str], bool | None],
+        content_types: tuple[str, ...] | None = HTML_CONTENT_TYPES,
+        max_bytes: int = None,
+        timeout: float = None,
+        **kwargs,
+    ) -> dict:
+        """
+        Sends a GET request and passes the body to `on_text` chunk by chunk as it is decoded, without
+        keeping it in memory. Reading stops early when `on_text` returns True. Uncached, but goes through
+        the circuit breaker like `fetch`.
+
+        The body is rejected before it is read when the response's content type isn't one of `content_types`
+        (a response without a content type is read). Reading stops once `max_bytes` have been received; the
+        text passed on so far is kept and the result is marked as truncated.
+
+        Args:
+        ------
+            url (str): The URL to fetch.
+            on_text (Callable[[str], bool | None]): Called with every decoded text chunk, returns True to stop reading.
+            content_types (tuple[str, ...], optional): Accepted media types, None accepts any. Defaults to HTML.
+            max_bytes (int, optional): Maximum (decoded) body size to read, defaults to the client limit.
+            timeout (float, optional): Per-request timeout in seconds, defaults to the (adaptive) client timeout.
+            kwargs: Passed on to `httpx.AsyncClient.stream()`.
+
+        Returns:
+        --------
+        dict: {"status_code": int, "bytes": int, "truncated": bool} or {"error": str, "status_code": int | None}
+        """
+        if self.client is None:
+            await self.start()
+        max_bytes = max_bytes or self.max_response_bytes
+        request_timeout = timeout if timeout is not None else self.timeout
+        if self.breaker is not None:
+            if timeout is None:
+                request_timeout = self.breaker.timeout_for(url, request_timeout)
+            if not self.breaker.allow(url):
+                return {"error": f"Circuit open for {self.breaker.domain(url)}", "status_code": None, "circuit_open": True}
+        start = time.monotonic()
+        try:
+            response = await self._stream(url, on_text, content_types, max_bytes, request_timeout, **kwargs)
+        except BaseException: # cancelled (or `on_text` raised), `_stream` turns request errors into responses
+            if self.breaker is not None:
+                self.breaker.release_probe(url)
+            raise
+        if self.breaker is not None:
+            status_code = response.get("status_code")
+            if status_code is None or status_code >= 500 or status_code == 429:
+                self.breaker.record_failure(url)
+            else:
+                self.breaker.record_success(url, time.monotonic() - start)
+        return response
+
+    async def _stream(self, url: str, on_text, content_types, max_bytes: int, request_timeout: float, **kwargs) -> dict:
+        try:
+            async with self.client.stream("GET", url, timeout=request_timeout, **kwargs) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                if content_types is not None and content_type and content_type not in content_types:
+                    return {"error": f"Unsupported content type: {content_type}", "status_code": response.status_code}
+                try:
+                    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+                except LookupError: # unknown charset in the headers
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                size = 0
+                truncated = False
+                async for chunk in response.aiter_bytes():
+                    if size + len(chunk) > max_bytes:
+                        chunk = chunk[:max_bytes - size]
+                        truncated = True
+                    size += len(chunk)
+                    text = decoder.decode(chunk, final=truncated)
+                    if text and on_text(text):
+                        truncated = True
+                        break
+                    if truncated:
+                        logging.info(f"Stopped reading {url} after {max_bytes} bytes")
+                        break
+                else:
+                    text = decoder.decode(b"", final=True)
+                    if text:
+                        on_text(text)
+                return {"status_code": response.status_code, "bytes": size, "truncated": truncated}
+
+        except httpx.HTTPStatusError as http_err:
+            status_code = http_err.response.status_code
+            logging.error(f"HTTP error for {url}: {http_err} (Status: {status_code})")
+            return {"error": f"HTTP error occurred: {http_err}", "status_code": status_code}
+
+        except httpx.RequestError as req_err:
+            logging.error(f"Request error for {url}: {req_err!r}")
+            return {"error": f"Request error occurred: {req_err!r}", "status_code": None}
+
+        except Exception as err:
+            logging.exception(f"Unexpected error for {url}: {err}")
+            return {"error": f"An unexpected error occurred: {err}", "status_code": None}
+
+    async def _fetch(self, url: str, request_timeout: float, max_bytes: int, cached, use_cache: bool, **kwargs) -> dict:
+        try:
+            async with self.client.stream("GET", url, timeout=request_timeout, **kwargs) as response:
+                if cached and response.status_code == 304:
+                    await asyncio.to_thread(self.cache.touch, url)
+                    return {"content": cached.content, "status_code": 200, "from_cache": True}
+                response.raise_for_status()
+                try:
+                    body = await self._read_body(response, max_bytes)
+                except ResponseTooLargeError as size_err:
+                    logging.error(f"Response too large for {url}: {size_err}")
+                    return {"error": f"Response too large: {size_err}", "status_code": response.status_code}
+                content = body.decode(response.encoding or "utf-8", errors="replace")
+                if use_cache:
+                    await asyncio.to_thread(
+                        self.cache.put,
+                        url,
+                        content,
+                        response.headers.get("etag"),
+                        response.headers.get("last-modified"),
+                    )
+                return {"content": content, "status_code": response.status_code}
+
+        except httpx.HTTPStatusError as http_err:
+            status_code = http_err.response.status_code
+            logging.error(f"HTTP error for {url}: {http_err} (Status: {status_code})")
+            return {"error": f"HTTP error occurred: {http_err}", "status_code": status_code}
+
+        except httpx.RequestError as req_err:
+            logging.error(f"Request error for {url}: {req_err!r}")
+            return {"error": f"Request error occurred: {req_err!r}", "status_code": None}
+
+        except Exception as err:
+            logging.exception(f"Unexpected error for {url}: {err}")
+            return {"error": f"An unexpected error occurred: {err}", "status_code": None}
+
+
+http_client = HTTPClient(cache=response_cache, breaker=default_circuit_breaker)
@@ -0,0 +1,65 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator
+from prometheus_client import REGISTRY, Counter, Histogram, make_asgi_app
+from prometheus_client.metrics_core import Metric
+from concierge_shared.metrics import StageTimer, postcode_label, log_sampled as shared_log_sampled
+
+STAGE_BUCKETS=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+STAGE_SECONDS=Histogram(
+    "scrape_stage_duration_seconds",
+    "Time spent in each stage of the scraping pipeline",
+    ["stage", "site", "postcode"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_FAILURES=Counter("scrape_stage_failures_total", "Pipeline stages that raised or returned an error", ["stage", "site"])
+SCRAPE_REQUESTS=Counter("scrape_requests_total", "Scrape requests received")
+EVENTS_SCRAPED=Counter("events_scraped_total", "Scraped events by validation outcome", ["site", "outcome"])
+PARSE_BATCH_SECONDS=Histogram(
+    "parse_pool_batch_duration_seconds",
+    "Time a parse pool worker spends on one batch, by page kind",
+    ["kind"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+SITES_SKIPPED=Counter("sites_skipped_total", "Websites skipped because their circuit was open", ["site"])
+
+# (site, postcode district) of the scrape the current task works for, set once per website task
+_labels: ContextVar[tuple[str, str]]=ContextVar("metric_labels", default=("", ""))
+
+metrics_app=make_asgi_app()
+
+
+class _StatsCollector:
+    def __init__(self, collect: Callable[[], Iterable[Metric]]):
+        self.collect=collect
+
+
+def register_stats(collect: Callable[[], Iterable[Metric]]):
+    """
+    Registers `collect`, called on every /metrics scrape to turn a component's in-memory `stats`
+    into metric families, so the component keeps plain dict counters on its hot path.
+    """
+    REGISTRY.register(_StatsCollector(collect))
+
+
+@contextmanager
+def metric_labels(site: str, postcode: str | None) -> Iterator[None]:
+    """Labels every stage timed in this block (and in the tasks it creates) with the site and postcode district."""
+    token=_labels.set((site, postcode_label(postcode)))
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+stage=StageTimer(STAGE_SECONDS, STAGE_FAILURES, default_labels=_labels.get) # labels default to the ones set by `metric_labels`
+
+
+def log_sampled(event: str, level: int = logging.INFO, rate: float = None, **fields):
+    """`concierge_shared.metrics.log_sampled`, adding the site and postcode set by `metric_labels`."""
+    site, postcode=_labels.get()
+    if site:
+        fields={"site":site, "postcode":postcode, **fields}
+    shared_log_sampled(event, level, rate, **fields)
@@ -0,0 +1,172 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.core.extraction_plan import config_hash
+from app.core.metrics import PARSE_BATCH_SECONDS, register_stats
+from dotenv import load_dotenv
+load_dotenv()
+
+PARSE_POOL_WORKERS=int(os.getenv("PARSE_POOL_WORKERS", min(4, os.cpu_count() or 1))) # 0 parses inline on the event loop
+PARSE_POOL_BATCH_SIZE=int(os.getenv("PARSE_POOL_BATCH_SIZE", 10)) # detail pages per batch
+PARSE_POOL_START_METHOD=os.getenv("PARSE_POOL_START_METHOD", "spawn")
+
+# per-process HTMLReaders (and so compiled extraction plans), keyed by config hash
+_readers = {}
+
+
+def _init_worker():
+    # pay the import cost once per worker instead of on the first batch
+    import bs4  # noqa: F401
+    import app.core.read_html  # noqa: F401
+
+
+def _get_reader(key: str, page_content_config: dict):
+    from app.core.read_html import HTMLReader
+    reader = _readers.get(key)
+    if reader is None:
+        reader = _readers[key] = HTMLReader(page_content_config=page_content_config)
+    return reader
+
+
+def _parse_listing(key: str, page_content_config: dict, content: str, include_event_details: bool) -> tuple[List[dict], float]:
+    start = time.perf_counter()
+    event_metadata = _get_reader(key, page_content_config).get_event_metadata(
+        content=content, include_event_details=include_event_details
+    )
+    return event_metadata, time.perf_counter() - start
+
+
+def _parse_details(key: str, page_content_config: dict, event_dicts: List[dict]) -> tuple[List[dict], float]:
+    start = time.perf_counter()
+    reader = _get_reader(key, page_content_config)
+    event_details = [reader.get_event_detail(event_dict) for event_dict in event_dicts]
+    return event_details, time.perf_counter() - start
+
+
+class ParsePool:
+    """
+    Process pool the scrape pipeline hands raw HTML to, so parsing doesn't block the event loop.
+
+    Workers import bs4 up front and keep a compiled reader per site config. With `max_workers=0`
+    (or before `start()`), batches are parsed inline in the calling process.
+
+    When a worker dies (e.g. OOM on a huge page) the pool is replaced once, however many batches were
+    running on it, and each of those batches is retried once in the fresh pool. A batch that breaks the
+    pool again raises `BrokenProcessPool` rather than being parsed on the event loop.
+    """
+
+    def __init__(self, max_workers: int = PARSE_POOL_WORKERS, start_method: str = PARSE_POOL_START_METHOD):
+        self.max_workers = max_workers
+        self.start_method = start_method
+        self.executor: ProcessPoolExecutor | None = None
+        self.queue_depth = 0
+        self._restart_lock = asyncio.Lock()
+        self.stats = {"batches": 0, "pages": 0, "parse_seconds": 0.0, "max_queue_depth": 0, "failures": 0, "restarts": 0}
+
+    async def start(self):
+        if self.executor is None and self.max_workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+            )
+
+    async def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        logging.info(f"Parse pool closed: {self.stats}")
+
+    async def _restart(self, broken: ProcessPoolExecutor):
+        async with self._restart_lock:
+            if self.executor is not broken: # another batch on the same pool already replaced it
+                return
+            logging.error("Parse pool broke, restarting it")
+            self.stats["restarts"] += 1
+            self.executor = None
+            broken.shutdown(wait=False, cancel_futures=True)
+            await self.start()
+
+    async def _in_pool(self, fn, *args):
+        executor = self.executor
+        if executor is None:
+            return fn(*args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            await self._restart(executor)
+            raise
+
+    async def _run(self, fn, kind: str, pages: int, *args):
+        self.queue_depth += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+        try:
+            try:
+                result, seconds = await self._in_pool(fn, *args)
+            except BrokenProcessPool:
+                self.stats["failures"] += 1
+                result, seconds = await self._in_pool(fn, *args)
+        finally:
+            self.queue_depth -= 1
+        self.stats["batches"] += 1
+        self.stats["pages"] += pages
+        self.stats["parse_seconds"] += seconds
+        PARSE_BATCH_SECONDS.labels(kind).observe(seconds)
+        logging.debug(f"Parsed batch of {pages} page(s) in {seconds * 1000:.1f}ms, queue depth {self.queue_depth}")
+        return result
+
+    def info(self) -> dict:
+        return {**self.stats, "queue_depth": self.queue_depth, "workers": self.max_workers if self.executor else 0}
+
+    async def parse_listing(self, page_content_config: dict, content: str, include_event_details: bool) -> List[dict]:
+        """
+        Runs `HTMLReader.get_event_metadata` on a listing page.
+
+        Args:
+        ------
+            page_content_config (dict): The site's page content config.
+            content (str): Raw HTML of the listing page.
+            include_event_details (bool): Whether the details are part of the listing page.
+
+        Returns:
+        --------
+            List[dict]: The event metadata.
+        """
+        return await self._run(
+            _parse_listing, "listing", 1, config_hash(page_content_config), page_content_config, content, include_event_details
+        )
+
+    async def parse_details(self, page_content_config: dict, event_dicts: List[dict]) -> List[dict]:
+        """
+        Runs `HTMLReader.get_event_detail` on a batch of `{"event_id", "content"}` detail pages.
+        """
+        if not event_dicts:
+            return []
+        return await self._run(
+            _parse_details, "details", len(event_dicts), config_hash(page_content_config), page_content_config, event_dicts
+        )
+
+
+parse_pool = ParsePool()
+
+
+def _collect_metrics():
+    yield GaugeMetricFamily("parse_pool_queue_depth", "Parse batches waiting for or running in the parse pool", value=parse_pool.queue_depth)
+    yield GaugeMetricFamily("parse_pool_max_queue_depth", "Highest parse pool queue depth since startup", value=parse_pool.stats["max_queue_depth"])
+    for stat, documentation in (
+        ("batches", "Parse batches completed"),
+        ("pages", "Pages parsed"),
+        ("parse_seconds", "Seconds spent parsing in the pool's workers"),
+        ("failures", "Parse batches that hit a broken pool"),
+        ("restarts", "Times the parse pool was replaced after a worker died"),
+    ):
+        yield CounterMetricFamily(f"parse_pool_{stat}", documentation, value=parse_pool.stats[stat])
+
+
+register_stats(_collect_metrics)
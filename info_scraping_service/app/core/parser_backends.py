@@ -0,0 +1,264 @@
+import os
+import re
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from dotenv import load_dotenv
+load_dotenv()
+
+DEFAULT_PARSER_BACKEND=os.getenv("HTML_PARSER_BACKEND", "html.parser")
+
+# bs4's get_text() skips strings inside these tags, the selectolax backend mirrors that
+NON_TEXT_TAGS={"script", "style", "template"}
+
+
+def _filter_kwargs(filter_config: dict) -> dict:
+    return {filter_config.get("parameter", "class_"): filter_config.get("value", "")}
+
+
+class ParserBackend(ABC):
+    """
+    An HTML parser plus the handful of tree operations the extraction plans need.
+
+    Matchers are compiled from a `selector` or `tag`/`filter` config once and follow BeautifulSoup's
+    `find()`/`find_all()`/`select()` semantics, so every backend extracts the same events from a page.
+    """
+    name: str
+
+    @abstractmethod
+    def parse(self, content: str) -> Any:
+        raise NotImplementedError("Parser backends must implement the `parse` method")
+
+    def compile_parser(self, only: dict = None) -> Callable[[str], Any]:
+        """
+        Builds a parse function. Backends that support it only build the subtrees matching the `only`
+        (`tag`/`filter`) config, which roughly halves parse work and memory on large listing pages.
+        """
+        return self.parse
+
+    @abstractmethod
+    def compile_match(self, config: dict) -> Callable[[Any], bool]:
+        raise NotImplementedError("Parser backends must implement the `compile_match` method")
+
+    @abstractmethod
+    def compile_find(self, config: dict, filtered: bool = True) -> Callable[[Any], Any]:
+        raise NotImplementedError("Parser backends must implement the `compile_find` method")
+
+    @abstractmethod
+    def compile_find_all(self, config: dict, filtered: bool = True) -> Callable[[Any], List[Any]]:
+        raise NotImplementedError("Parser backends must implement the `compile_find_all` method")
+
+    @abstractmethod
+    def get_text(self, node, strip: bool = True) -> str:
+        raise NotImplementedError("Parser backends must implement the `get_text` method")
+
+    @abstractmethod
+    def get_href(self, node) -> str:
+        raise NotImplementedError("Parser backends must implement the `get_href` method")
+
+    @abstractmethod
+    def find_links(self, node) -> List[str | None]:
+        raise NotImplementedError("Parser backends must implement the `find_links` method")
+
+    @abstractmethod
+    def find_all_tags(self, node, names: List[str]) -> List[Any]:
+        raise NotImplementedError("Parser backends must implement the `find_all_tags` method")
+
+    @abstractmethod
+    def to_html(self, node) -> str:
+        raise NotImplementedError("Parser backends must implement the `to_html` method")
+
+
+class BeautifulSoupBackend(ParserBackend):
+    def __init__(self, features: str = "html.parser"):
+        self.name = features
+        self.features = features
+
+    def parse(self, content: str) -> BeautifulSoup:
+        return BeautifulSoup(content, self.features)
+
+    def _compile_strainer(self, config: dict, filtered: bool) -> SoupStrainer | str | None:
+        # an empty filter still restricts the match (class_="") unless the config says it's optional
+        if filtered or config.get("filter"):
+            return SoupStrainer(config.get("tag"), **_filter_kwargs(config.get("filter") or {}))
+        return config.get("tag")
+
+    def compile_parser(self, only: dict = None):
+        if not only or "selector" in only:
+            return self.parse
+        strainer = self._compile_strainer(only, filtered=True)
+        return lambda content: BeautifulSoup(content, self.features, parse_only=strainer)
+
+    def compile_match(self, config: dict):
+        if "selector" in config:
+            selector = config["selector"]
+            return lambda node: soupsieve.match(selector, node)
+        strainer = self._compile_strainer(config, filtered=True)
+        match = getattr(strainer, "match", None) or strainer.search # bs4 < 4.13 only has search()
+        return lambda node: bool(match(node))
+
+    def compile_find(self, config: dict, filtered: bool = True):
+        if "selector" in config:
+            selector = config["selector"]
+            return lambda node: node.select_one(selector)
+        strainer = self._compile_strainer(config, filtered)
+        return lambda node: node.find(strainer)
+
+    def compile_find_all(self, config: dict, filtered: bool = True):
+        if "selector" in config:
+            selector = config["selector"]
+            return lambda node: node.select(selector)
+        strainer = self._compile_strainer(config, filtered)
+        return lambda node: node.find_all(strainer)
+
+    def get_text(self, node, strip: bool = True) -> str:
+        return node.get_text(strip=strip)
+
+    def get_href(self, node) -> str:
+        return node.get("href", "")
+
+    def find_links(self, node) -> List[str | None]:
+        return [link.get("href") for link in node.find_all("a")]
+
+    def find_all_tags(self, node, names: List[str]) -> list:
+        return node.find_all(names)
+
+    def to_html(self, node) -> str:
+        return str(node)
+
+
+class SelectolaxBackend(ParserBackend):
+    """
+    lexbor-based backend. Much faster to parse than BeautifulSoup. `tag`/`filter` configs are
+    translated to CSS attribute selectors, with a Python check for regex filter values.
+    """
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, content: str):
+        return self._parser(content).root
+
+    @staticmethod
+    def _descendants(node, selector: str) -> list:
+        # lexbor matches the node itself too, BeautifulSoup only searches descendants
+        matches = node.css(selector)
+        if matches and matches[0].mem_id == node.mem_id:
+            return matches[1:]
+        return matches
+
+    @staticmethod
+    def _css_string(value: str) -> str:
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    def _compile_matcher(self, config: dict, filtered: bool) -> tuple[str, Callable | None]:
+        """Returns a CSS selector plus an optional predicate for filters CSS can't express."""
+        if "selector" in config:
+            return config["selector"], None
+        tag = config.get("tag") or "*"
+        if not (filtered or config.get("filter")):
+            return tag, None
+        kwargs = _filter_kwargs(config.get("filter") or {})
+        (attribute, value), = kwargs.items()
+        attribute = "class" if attribute == "class_" else attribute
+        if isinstance(value, re.Pattern):
+            if attribute == "class":
+                predicate = lambda node: any(
+                    value.search(candidate)
+                    for candidate in [node.attributes.get("class") or "", *(node.attributes.get("class") or "").split()]
+                )
+            else:
+                predicate = lambda node: value.search(node.attributes.get(attribute) or "") is not None
+            return f"{tag}[{attribute}]", predicate
+        value = str(value)
+        if attribute == "class" and re.search(r"\s", value):
+            # bs4 compares multi-class values against the whitespace-normalised class string
+            return f"{tag}[class]", lambda node: " ".join((node.attributes.get("class") or "").split()) == value
+        operator = "~=" if attribute == "class" and value else "="
+        return f"{tag}[{attribute}{operator}{self._css_string(value)}]", None
+
+    def compile_match(self, config: dict):
+        selector, predicate = self._compile_matcher(config, filtered=True)
+
+        def match(node) -> bool:
+            # lexbor lists the node itself first when it matches
+            matches = node.css(selector)
+            return bool(matches) and matches[0].mem_id == node.mem_id and (predicate is None or predicate(node))
+
+        return match
+
+    def compile_find(self, config: dict, filtered: bool = True):
+        selector, predicate = self._compile_matcher(config, filtered)
+        find_all = self.compile_find_all(config, filtered)
+
+        def find(node):
+            if predicate is None:
+                match = node.css_first(selector)
+                if match is None or match.mem_id != node.mem_id:
+                    return match
+            matches = find_all(node)
+            return matches[0] if matches else None
+
+        return find
+
+    def compile_find_all(self, config: dict, filtered: bool = True):
+        selector, predicate = self._compile_matcher(config, filtered)
+        if predicate is None:
+            return lambda node: self._descendants(node, selector)
+        return lambda node: [match for match in self._descendants(node, selector) if predicate(match)]
+
+    def get_text(self, node, strip: bool = True) -> str:
+        parts = []
+        for child in node.traverse(include_text=True):
+            if child.tag != "-text" or child.parent.tag in NON_TEXT_TAGS:
+                continue
+            text = child.text_content
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            parts.append(text)
+        return "".join(parts)
+
+    def get_href(self, node) -> str:
+        return node.attributes.get("href") or ""
+
+    def find_links(self, node) -> List[str | None]:
+        return [link.attributes.get("href") for link in self._descendants(node, "a")]
+
+    def find_all_tags(self, node, names: List[str]) -> list:
+        return self._descendants(node, ", ".join(names))
+
+    def to_html(self, node) -> str:
+        return node.html
+
+
+def _create_backend(name: str) -> ParserBackend:
+    if name == "selectolax":
+        return SelectolaxBackend()
+    if builder_registry.lookup(name) is None:
+        raise ImportError(f"No BeautifulSoup tree builder installed for '{name}'")
+    return BeautifulSoupBackend(name)
+
+
+_backends: dict[str, ParserBackend] = {}
+
+
+def get_parser_backend(name: str = None) -> ParserBackend:
+    """
+    Returns the backend called `name` ("html.parser", "lxml" or "selectolax"),
+    falling back to html.parser when its library isn't installed.
+    """
+    name = name or DEFAULT_PARSER_BACKEND
+    if name not in _backends:
+        try:
+            _backends[name] = _create_backend(name)
+        except ImportError as e:
+            logging.warning(f"Parser backend '{name}' unavailable ({e}), falling back to html.parser")
+            _backends[name] = get_parser_backend("html.parser")
+    return _backends[name]
@@ -1,57 +1,38 @@
 from bs4 import BeautifulSoup
 from bs4.element import Tag
-from app.utils.utils import format_timestamp, generate_event_id, remove_unicode_chars
+from app.core.parser_backends import get_parser_backend
+from app.core.extraction_plan import get_extraction_plan, get_find_all, compile_text_extractor, compile_url_extractor
+from app.utils.utils import format_timestamp, generate_event_id
 from typing import List
+import time
 
 class HTMLReader:
     def __init__(self, page_content_config:dict):
         self.config=page_content_config
+        self.plan=get_extraction_plan(page_content_config)
 
     def extract_text(self,result, config):
         """Extract text using find() or select_one() if CSS selector is provided."""
-        if not config:
-            return ""
-
-        if "selector" in config:  # Use CSS selector if available
-            element = result.select_one(config["selector"])
-        else:  # Fallback to traditional find()
-            tag = config.get("tag")
-            filter_param = config["filter"].get("parameter", "class_")
-            filter_value = config["filter"].get("value", "")
-            element = result.find(tag, **{filter_param: filter_value})
-            text= element.get_text(strip=True) if element else ""
-            text=remove_unicode_chars(text)
-            return text
+        return compile_text_extractor(config, self.plan.backend)(result)
 
 
     def extract_url(self, result, config):
         """Extract URL using find() or select_one() if CSS selector is provided."""
-        if not config:
-            return ""
-
-        if "selector" in config:  # Use CSS selector if available
-            element = result.select_one(config["selector"])
-        else:  # Fallback to traditional find()
-            tag = config.get("tag")
-            filter_param = config["filter"].get("parameter", "class_")
-            filter_value = config["filter"].get("value", "")
-            element = result.find(tag, **{filter_param: filter_value})
-
-        return element.get("href", "") if element else ""
+        return compile_url_extractor(config, self.plan.backend)(result)
 
         
     def _parse_content(self, content: str) -> BeautifulSoup:
         """
-        Parses the provided HTML content into a BeautifulSoup object.
+        Parses the provided HTML content with the site's parser backend (`parser` in the config, html.parser by default).
 
         Args:
             content (str): The raw HTML content to parse.
 
         Returns:
-            BeautifulSoup: Parsed HTML content.
+            BeautifulSoup: Parsed HTML content (a lexbor node for the selectolax backend).
         """
 
-        return BeautifulSoup(content, "html.parser")
+        return self.plan.backend.parse(content)
     
     def get_event_metadata(self, content: str, include_event_details=False) -> List[Tag]:
         """
@@ -67,45 +48,35 @@ class HTMLReader:
             dict: A dictionary containing the event's title, description, and URL.
         """
         event_results=self._get_event_result_containers(content, self.config['container'])
-        title_config=self.config['title']
-        url_config=self.config['url']
-        description_config=self.config['content']
+        timestamp=format_timestamp()
         event_metadata=[
              {
         "domain": self.config["domain"],
-        "title": self.extract_text(result, title_config),
-        "url": self.extract_url(result, url_config),
-        "content": self.extract_text(result, description_config),
-        "timestamp": format_timestamp(),
-        "html":str(result) if result else ""
+        **fields,
+        "timestamp": timestamp,
         }
-        for result in event_results
+        for fields in self.plan.extract_all(event_results)
         ]
-        for e in event_metadata:
+        for e, result in zip(event_metadata, event_results):
             id= generate_event_id(e)
             e['event_id']=id
             if include_event_details:
-                event_dict={'event_id':id, "content":e['html']}
-                event_details=self.get_event_detail(event_dict)
-                e['event_details']=event_details
-            e.pop('html')
+                # the container is already parsed, extract the details from its subtree directly
+                e['event_details']=self.get_event_detail({'event_id':id, "node":result})
         return event_metadata
     def _get_event_result_containers(self, content:str, config:dict) -> List[Tag]:
         """
         Finds and returns all event result containers in the HTML.
 
+        For the site's own container config the page is parsed with the plan's listing parser,
+        which (for `tag`/`filter` containers on BeautifulSoup backends) only builds the container subtrees.
+
         Returns:
             list: A list of BeautifulSoup elements containing the event results.
         """
-        soup = self._parse_content(content)
-        if 'selector' in config:
-            event_results=soup.select(config['selector'])
-        else:
-            tag=config.get("tag", None)
-            filter_param = config["filter"].get("parameter", "class_")
-            filter_value = config["filter"].get("value", "")
-            event_results = soup.find_all(tag, **{filter_param: filter_value})
-        return event_results
+        if config is self.config.get('container'):
+            return self.plan.find_containers(self.plan.parse_listing(content))
+        return get_find_all(config, self.plan.backend)(self._parse_content(content))
     
     def get_event_detail(self, event_dict: dict):
         """
@@ -114,7 +85,8 @@ class HTMLReader:
         Args:
             event_dict (dict): A dictionary containing:
                 - 'event_id' (str): The unique identifier for the event.
-                - 'content' (str): The raw HTML content of the event details page.
+                - 'content' (str): The raw HTML content of the event details page, or
+                - 'node' (Tag): An already-parsed element, e.g. an event container of a listing page.
             config (dict): Configuration dictionary defining how to extract details.
 
         Returns:
@@ -122,28 +94,51 @@ class HTMLReader:
         """
         event_details = {"event_id": event_dict["event_id"]}
         detail_sections = []
+        if event_dict.get("node") is not None:
+            event_details["sections"] = self.plan.extract_detail_sections(event_dict["node"], include_self=True)
+            return event_details
         if 'content' not in event_dict or event_dict['content'] is None:
             raise ValueError(f"event_dict['content'] is missing or None: {event_dict}")
         if event_dict["content"]:
-            soup = self._parse_content(event_dict['content'])
-            details_config = self.config.get("details", {})
-            container_tag = details_config["container"]["tag"]
-            container_filter = details_config["container"]["filter"]
-
-            details_container = soup.find(container_tag, **{container_filter.get("parameter", "class_"): container_filter.get("value","")})
-            if details_container:
-                section_tag = details_config["sections"]["tag"]
-                section_filter=details_config["sections"]["filter"]
-                if section_filter:
-                    info_containers = details_container.find_all(
-                        section_tag, **{section_filter.get("parameter", "class_"): section_filter.get("value", "")}
-                    )
-                else:
-                    info_containers = details_container.find_all(section_tag)
-                for section in info_containers:
-                    text_content = section.get_text(strip=True)
-                    text_content = remove_unicode_chars(text_content)
-                    links = [link.get("href") for link in section.find_all("a")]
-                    detail_sections.append({"content": text_content, "links": links})
+            soup = self.plan.parse_detail(event_dict['content'])
+            detail_sections = self.plan.extract_detail_sections(soup)
         event_details["sections"] = detail_sections
         return event_details
+
+
+def compare_parser_backends(content: str, page_content_config: dict, backends=("html.parser", "lxml", "selectolax"), repeat: int = 5) -> dict:
+    """
+    Runs the listing extraction for `page_content_config` on `content` with each parser backend.
+
+    Returns per backend the best-of-`repeat` parse and extract times (ms), the number of events found
+    and whether the extracted events (and detail sections, if configured) match html.parser's output.
+    """
+    report = {}
+    reference = None
+    for name in ("html.parser", *[b for b in backends if b != "html.parser"]):
+        backend = get_parser_backend(name)
+        if backend.name != name: # library not installed, fell back to html.parser
+            report[name] = {"available": False}
+            continue
+        plan = get_extraction_plan(page_content_config, backend)
+        parse_times, extract_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            root = plan.parse_listing(content)
+            parse_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            containers = plan.find_containers(root)
+            events = plan.extract_all(containers)
+            for event, container in zip(events, containers):
+                event["sections"] = plan.extract_detail_sections(container, include_self=True)
+            extract_times.append(time.perf_counter() - start)
+        if reference is None:
+            reference = events
+        report[name] = {
+            "available": True,
+            "parse_ms": min(parse_times) * 1000,
+            "extract_ms": min(extract_times) * 1000,
+            "events": len(events),
+            "matches_html_parser": events == reference,
+        }
+    return report
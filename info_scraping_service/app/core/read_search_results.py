@@ -1,55 +1,79 @@
-
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from bs4 import BeautifulSoup
+import os
+import asyncio
 import re
 import logging
 from urllib.parse import urlparse
+from app.core.http_client import http_client
+from app.core.parser_backends import get_parser_backend
+from app.core.text_extractor import get_text_extractor
 from app.utils.utils import format_timestamp, generate_event_id
+from dotenv import load_dotenv
+load_dotenv()
+SEARCH_RESULT_CONCURRENCY=int(os.getenv("SEARCH_RESULT_CONCURRENCY", 20))
+SEARCH_RESULT_MAX_BYTES=int(os.getenv("SEARCH_RESULT_MAX_BYTES", 2 * 1024 * 1024)) # bytes read per page, the rest is ignored
+SEARCH_RESULT_MAX_CHARS=int(os.getenv("SEARCH_RESULT_MAX_CHARS", 20000)) # clean text kept per page, 0 keeps all of it
+
 class SearchResultReader:
-    def __init__(self, search_results):
+    """
+    Replaces the content of search results with the clean text of their pages.
+
+    Pages are fetched through the shared HTTP client, at most `max_concurrency` at a time. Bodies are
+    streamed into a single-pass text extractor that skips boilerplate (navigation, footers, cookie banners);
+    reading stops after `max_bytes` or once `max_chars` of text have been collected. Responses that
+    aren't HTML are rejected before their body is read.
+    """
+    def __init__(
+        self,
+        search_results,
+        parser:str=None,
+        max_concurrency:int=SEARCH_RESULT_CONCURRENCY,
+        max_bytes:int=SEARCH_RESULT_MAX_BYTES,
+        max_chars:int=SEARCH_RESULT_MAX_CHARS,
+        text_extractor:str=None,
+    ):
         self.search_results=search_results
+        self.backend=get_parser_backend(parser)
+        self.max_concurrency=max_concurrency
+        self.max_bytes=max_bytes
+        self.max_chars=max_chars
+        self.text_extractor=text_extractor
 
     def _get_clean_text(self, content): 
-        soup=BeautifulSoup(content, "html.parser")
-        text_elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        extracted_text = ' '.join(elem.get_text() for elem in text_elements)
+        """Tree-based clean text, the reference the streaming extractor is checked against (see benchmarks/bench_text_extractor.py)."""
+        root=self.backend.parse(content)
+        text_elements = self.backend.find_all_tags(root, ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+        extracted_text = ' '.join(self.backend.get_text(elem, strip=False) for elem in text_elements)
         clean_text=re.sub(r'\s+', ' ', extracted_text).strip()
         return clean_text
 
-    def _scrape_url(self, url:str):
-        try:
-            response=requests.get(url)
-            response.raise_for_status()
-            content=response.content
-            return content
-        except requests.exceptions.HTTPError as http_err:
-            raise ValueError(f"HTTP error occurred: {http_err}, status_code: {response.status_code}")
-        except requests.exceptions.RequestException as req_err:
-            raise ValueError(f"Request error occurred: {req_err}")
-        except Exception as err:
-            raise ValueError(f"An unexpected error occurred: {err}")
-    def scrape_results(self):
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {
-                executor.submit(self._scrape_url, search_result["url"]): search_result
-                for search_result in self.search_results
-            }
-            for future in as_completed(futures):  
-                search_result = futures[future]  
-                search_result
-                search_result["event_id"] = generate_event_id(search_result)
-                search_result["domain"] = urlparse(search_result['url']).netloc
-                search_result["timestamp"] = format_timestamp()
-                search_result.pop("score", None)
-                search_result.pop("raw_content", None)
-                try:
-                    extracted_content = future.result()
-                    cleaned_content = self._get_clean_text(content=extracted_content)
-                    search_result["content"] = cleaned_content if cleaned_content != '' else search_result['content']
-                except Exception as e:
-                    logging.warning(f"Error processing URL {search_result['url']}: {e}")
-                    search_result["error"] = str(e)
+    async def _scrape_url(self, url:str, semaphore:asyncio.Semaphore)->str:
+        extractor=get_text_extractor(self.text_extractor, max_chars=self.max_chars or None)
+        async with semaphore:
+            response=await http_client.fetch_stream(url, extractor.feed, max_bytes=self.max_bytes)
+        if response.get("error"):
+            raise ValueError(f"{response['error']}, status_code: {response.get('status_code')}")
+        extractor.close()
+        return extractor.text
+
+    async def scrape_results(self):
+        semaphore=asyncio.Semaphore(self.max_concurrency)
+        contents = await asyncio.gather(
+            *[self._scrape_url(search_result["url"], semaphore) for search_result in self.search_results],
+            return_exceptions=True,
+        )
+        for search_result, extracted_content in zip(self.search_results, contents):
+            search_result["event_id"] = generate_event_id(search_result)
+            search_result["domain"] = urlparse(search_result['url']).netloc
+            search_result["timestamp"] = format_timestamp()
+            search_result.pop("score", None)
+            search_result.pop("raw_content", None)
+            try:
+                if isinstance(extracted_content, Exception):
+                    raise extracted_content
+                search_result["content"] = extracted_content if extracted_content != '' else search_result['content']
+            except Exception as e:
+                logging.warning(f"Error processing URL {search_result['url']}: {e}")
+                search_result["error"] = str(e)
         
         return self.search_results
         
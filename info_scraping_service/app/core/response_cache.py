@@ -0,0 +1,170 @@
+import os
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.core.metrics import register_stats
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_PATH=os.getenv("HTTP_CACHE_PATH", "http_cache/responses.sqlite3")
+CACHE_MAX_BYTES=int(os.getenv("HTTP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+DEFAULT_CACHE_TTL=float(os.getenv("HTTP_CACHE_DEFAULT_TTL", 3600)) # seconds a cached page is served without revalidation
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    content: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    On-disk (SQLite) cache of page bodies keyed by URL.
+
+    Bodies are stored zlib-compressed together with their `ETag`/`Last-Modified` validators.
+    Once the stored bodies go over `max_bytes` the least recently used entries are evicted.
+    Methods are blocking, callers on the event loop should run them with `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, table: str = "responses"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.table = table
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._size = 0
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_lru ON {self.table} (last_access)")
+            self._size = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        return self._conn
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                f"SELECT body, etag, last_modified, fetched_at FROM {self.table} WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(f"UPDATE {self.table} SET last_access=? WHERE key=?", (time.time(), key))
+        body, etag, last_modified, fetched_at = row
+        return CachedResponse(key, zlib.decompress(body).decode("utf-8"), etag, last_modified, fetched_at)
+
+    def lookup(self, key: str, ttl: float) -> tuple[CachedResponse | None, bool]:
+        """Returns the cached entry (if any) and whether it is still within `ttl` seconds."""
+        entry = self.get(key)
+        fresh = entry is not None and entry.age < ttl
+        self.stats["hits" if fresh else "misses"] += 1
+        return entry, fresh
+
+    def put(self, key: str, content: str, etag: str = None, last_modified: str = None, fetched_at: float = None):
+        body = zlib.compress(content.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            previous = conn.execute(f"SELECT size FROM {self.table} WHERE key=?", (key,)).fetchone()
+            conn.execute(
+                f"""INSERT OR REPLACE INTO {self.table} (key, body, size, etag, last_modified, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (key, body, len(body), etag, last_modified, fetched_at or now, now),
+            )
+            self._size += len(body) - (previous[0] if previous else 0)
+            self.stats["stores"] += 1
+            self._evict(conn)
+
+    def touch(self, key: str):
+        """Marks an entry as freshly validated (e.g. after a `304 Not Modified`)."""
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                f"UPDATE {self.table} SET fetched_at=?, last_access=? WHERE key=?", (now, now, key)
+            )
+            self.stats["revalidated"] += 1
+
+    def info(self) -> dict:
+        return {**self.stats, "size_bytes": self._size, "max_bytes": self.max_bytes}
+
+    def _evict(self, conn: sqlite3.Connection):
+        while self._size > self.max_bytes:
+            rows = conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_access LIMIT 50"
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for key, size in rows:
+                conn.execute(f"DELETE FROM {self.table} WHERE key=?", (key,))
+                self._size -= size
+                self.stats["evictions"] += 1
+                if self._size <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        logging.info(f"Response cache ({self.table}) closed: {self.stats}")
+
+
+response_cache = ResponseCache()
+
+_exported_caches: list[ResponseCache] = []
+
+
+def export_metrics(cache: ResponseCache):
+    """Exports the cache's stats on /metrics, labelled with its table name."""
+    _exported_caches.append(cache)
+
+
+def _collect_metrics():
+    operations = CounterMetricFamily("http_cache_operations", "Response cache lookups, revalidations, stores and evictions", labels=["cache", "operation"])
+    size = GaugeMetricFamily("http_cache_size_bytes", "Compressed bytes stored in the response cache", labels=["cache"])
+    for cache in _exported_caches:
+        for operation, count in cache.stats.items():
+            operations.add_metric([cache.table, operation], count)
+        size.add_metric([cache.table], cache._size)
+    yield operations
+    yield size
+
+
+register_stats(_collect_metrics)
+export_metrics(response_cache)
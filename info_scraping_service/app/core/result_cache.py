@@ -0,0 +1,94 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import List
+from app.db.database_service import ScrapeResultCacheService
+from app.utils.utils import normalise_query
+from dotenv import load_dotenv
+load_dotenv()
+
+RESULT_CACHE_TTL=float(os.getenv("RESULT_CACHE_TTL", 900)) # default freshness window, sites override it with `result_ttl`
+RESULT_CACHE_MAX_ENTRIES=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 512))
+
+
+class ScrapeResultCache:
+    """
+    Cache of scraped event sets keyed by (website, postcode, params).
+
+    A bounded in-memory LRU tier sits in front of a Mongo tier shared by every instance of the service,
+    so a session asking for a postcode/radius another session scraped recently gets its events without
+    a scrape. Freshness is checked against the caller's `ttl`, letting each site have its own window.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, store: ScrapeResultCacheService = None):
+        self.max_entries = max_entries
+        self.store = store or ScrapeResultCacheService()
+        self._memory: OrderedDict[str, tuple[float, List[dict]]] = OrderedDict()
+        self.stats: dict[str, dict[str, int]] = defaultdict(lambda: {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0})
+
+    @staticmethod
+    def key(website: str, postcode: str, params: dict) -> str:
+        return hashlib.sha1(f"{website}|{normalise_query(postcode, params)}".encode()).hexdigest()
+
+    def _remember(self, key: str, stored_at: float, events: List[dict]):
+        self._memory[key] = (stored_at, events)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, website: str, postcode: str, params: dict, ttl: float = RESULT_CACHE_TTL) -> List[dict] | None:
+        """Returns a copy of the cached events if they were scraped less than `ttl` seconds ago."""
+        if ttl <= 0:
+            return None
+        key = self.key(website, postcode, params)
+        site_stats = self.stats[website]
+        cached = self._memory.get(key)
+        if cached is not None and time.time() - cached[0] < ttl:
+            self._memory.move_to_end(key)
+            site_stats["memory_hits"] += 1
+            return [dict(event) for event in cached[1]]
+        document = await self.store.get_result(key)
+        if document is not None:
+            stored_at = document["stored_at"].replace(tzinfo=timezone.utc).timestamp()
+            if time.time() - stored_at < ttl:
+                self._remember(key, stored_at, document["events"])
+                site_stats["mongo_hits"] += 1
+                return [dict(event) for event in document["events"]]
+        site_stats["misses"] += 1
+        return None
+
+    async def put(self, website: str, postcode: str, params: dict, events: List[dict], ttl: float = RESULT_CACHE_TTL):
+        if ttl <= 0 or not events:
+            return
+        key = self.key(website, postcode, params)
+        now = datetime.now(timezone.utc)
+        self._remember(key, now.timestamp(), events)
+        self.stats[website]["stores"] += 1
+        await self.store.put_result(key, {
+            "website": website,
+            "postcode": postcode,
+            "params": params or {},
+            "events": events,
+            "stored_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+        })
+
+    async def invalidate(self, website: str | None = None, postcode: str | None = None) -> int:
+        """Drops cached results for `website` and/or `postcode` (everything when both are omitted) from both tiers."""
+        query = {k: v for k, v in {"website": website, "postcode": postcode}.items() if v is not None}
+        self._memory.clear() # keys are hashes, a selective purge isn't worth keeping a reverse index for
+        return await self.store.delete_results(query)
+
+    def hit_rates(self) -> dict:
+        """Per-site lookup counts and hit rate."""
+        report = {}
+        for website, site_stats in self.stats.items():
+            lookups = site_stats["memory_hits"] + site_stats["mongo_hits"] + site_stats["misses"]
+            hits = site_stats["memory_hits"] + site_stats["mongo_hits"]
+            report[website] = {**site_stats, "hit_rate": hits / lookups if lookups else 0.0}
+        return report
+
+
+result_cache = ScrapeResultCache()
@@ -1,9 +1,13 @@
-
 from app.core.get_data import get_scraped_dset
-from app.db.database_service import EventSearchConfigService
-from app.utils.utils import convert_events_to_model
-from itertools import chain
+from app.db.database_service import event_search_config_service
+from app.core.single_flight import SingleFlight
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.dedup_index import DEDUP_ENABLED, dedup_index
+from app.core.metrics import EVENTS_SCRAPED, SITES_SKIPPED, metric_labels, stage
+from app.utils.utils import validate_events, normalise_query
+from typing import AsyncIterator
 import asyncio
+import logging
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -12,17 +16,68 @@ load_dotenv()
 #     "params": {"miles":2}
 # }
 
-event_search_config_service=EventSearchConfigService()
+async def _scrape_website(config:dict)->tuple[str, list|None]:
+    website=config['request_config'].get('website', '')
+    with metric_labels(website, config['request_config'].get('postcode')), stage("site_total") as span:
+        try:
+            return website, await get_scraped_dset(config)
+        except CircuitOpenError as e:
+            logging.warning(f"Skipping {website}: {e}")
+            SITES_SKIPPED.labels(website).inc()
+            return website, None
+        except Exception as e:
+            logging.error(f"Scraping {website} failed: {e}")
+            span.failed=True
+            return website, []
 
-async def run_scraping_pipeline(query:dict):
-    scraped_data_list=[]
-    configs=await event_search_config_service.get_config(postcode=query['postcode'])
+pipeline_flight=SingleFlight("scraping_pipeline")
+_running_pipelines: dict[str, list[asyncio.Task]]={} # normalised query -> per-website tasks still being scraped
+
+async def _start_pipeline(key:str, query:dict)->list[asyncio.Task]:
+    with stage("config_lookup", site="", postcode=query['postcode']):
+        configs=await event_search_config_service.get_config(postcode=query['postcode']) or []
     async_tasks=[]
     for config in configs:
-        config['request_config']['postcode']=query['postcode']
-        config['request_config']['params']=query['params']
-        async_tasks.append(get_scraped_dset(config))
-    scraped_data_list = await asyncio.gather(*async_tasks)
-    event_list=list(chain.from_iterable(scraped_data_list))
-    final_list=convert_events_to_model(event_list)
-    return final_list
+        request_config={**config['request_config'], "postcode":query['postcode'], "params":query['params']}
+        async_tasks.append(asyncio.create_task(_scrape_website({**config, "request_config":request_config})))
+    if async_tasks:
+        _running_pipelines[key]=async_tasks
+        asyncio.gather(*async_tasks).add_done_callback(lambda _: _running_pipelines.pop(key, None))
+    return async_tasks
+
+async def stream_scraping_pipeline(query:dict)->AsyncIterator[dict]:
+    """
+    Scrapes every website configured for the query's postcode concurrently and yields
+    `{"website": str, "events": List[Event], "errors": List[dict]}` per website as soon as it finishes,
+    so fast sites don't wait on slow (rendered) ones. Events failing validation are left out and listed
+    in `errors`. Near-duplicates of events already seen on other websites keep their place, linked to the
+    canonical event through `canonical_event_id` and preceded by it with their urls in its `alternative_sources`,
+    so a canonical event can appear in several batches. A website that fails yields no batch, one skipped
+    because its domain's circuit is open yields `{"website": str, "events": [], "circuit_open": True}`.
+
+    Concurrent calls for the same (normalised) query share one set of per-website scrapes. The scrapes
+    aren't cancelled when a caller stops early, other callers (and the result cache) still use them.
+    """
+    key=normalise_query(query['postcode'], query['params'])
+    async_tasks=_running_pipelines.get(key)
+    if async_tasks is None:
+        async_tasks=await pipeline_flight.do(key, lambda: _start_pipeline(key, query))
+    for next_website in asyncio.as_completed(async_tasks):
+        website, event_list=await next_website
+        if event_list is None:
+            yield {"website":website, "events":[], "circuit_open":True}
+        elif event_list:
+            with stage("model_conversion", site=website, postcode=query['postcode']):
+                events, errors=validate_events(event_list)
+                if DEDUP_ENABLED:
+                    events=dedup_index.collapse(events)
+            EVENTS_SCRAPED.labels(website, "valid").inc(len(event_list) - len(errors))
+            EVENTS_SCRAPED.labels(website, "invalid").inc(len(errors))
+            yield {"website":website, "events":events, "errors":errors}
+
+async def run_scraping_pipeline(query:dict):
+    final_events={}
+    async for batch in stream_scraping_pipeline(query):
+        for event in batch['events']:
+            final_events[event.event_id]=event # a canonical event's latest version has every alternative source
+    return list(final_events.values())
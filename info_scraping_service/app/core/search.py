@@ -1,14 +1,23 @@
 from abc import ABC, abstractmethod
-import requests
-from typing import List
-from playwright.async_api import async_playwright
+from typing import List, AsyncIterator
+from concierge_shared.browser_pool import browser_pool
+from app.core.http_client import http_client
+from app.core.response_cache import DEFAULT_CACHE_TTL
+from app.core.snapshot_cache import snapshot_cache, DEFAULT_SNAPSHOT_TTL, DEFAULT_SNAPSHOT_MAX_STALE
+from app.core.fetch_scheduler import fetch_scheduler
+from app.core.circuit_breaker import circuit_breaker
+from app.core.metrics import log_sampled
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import time
 import logging
+import re
+from playwright.async_api import Route
+from app.models.render_profile import RenderProfile
 
 class WebsiteSearch(ABC):
-    def __init__(self, website: str):
+    def __init__(self, website: str, cache_ttl: float = None):
         self.website = website
+        self.cache_ttl = cache_ttl
         self.base_url = self.get_base_url()
         self._modify_url = self.get_modify_method()
 
@@ -24,7 +33,7 @@ class WebsiteSearch(ABC):
     @abstractmethod
     async def run_search(self, url):
         """
-        Executes a search request with a given url using either requests or Playwright
+        Executes a search request with a given url using either the shared HTTP client or Playwright
         """
         raise NotImplementedError("Subclasses must implement the `run_search` method")
 
@@ -55,10 +64,7 @@ class WebsiteSearch(ABC):
         event_id = event.get("event_id")
         if not url or not event_id:
             return {"error": "No URL/event id provided"}
-        if asyncio.iscoroutinefunction(self.run_search):
-            response=await self.run_search(url, kwargs={})
-        else:
-            response = self.run_search(url, kwargs={})
+        response = await fetch_scheduler.run(url, lambda: self.run_search(url, kwargs={}))
         if response.get("content"):
             return {"content": response["content"], "event_id": event_id}
         status_code = response.get("status_code", "Unknown")
@@ -67,16 +73,34 @@ class WebsiteSearch(ABC):
         )
 
         return {"content": "", "event_id": event_id}
-    
-    def _fetch_event_sync(self, event: str)->dict:
-        """Sync version of `_fetch_event()` for use with `run_in_executor`."""
-        return asyncio.run(self._fetch_event(event)) 
 
 
+    async def stream_event_details(self, event_metadata: List[dict]) -> AsyncIterator[dict]:
+        """
+        Fetches detailed HTML content for a list of events, yielding each response as soon as it completes.
+
+        Requests go through the shared `fetch_scheduler`, which caps global and per-host concurrency,
+        rate limits each host and retries transient failures.
+
+        Args:
+        ------
+            event_metadata (List[dict]): A list of dictionaries containing event metadata.
+
+        Yields:
+        --------
+        dict: The `_fetch_event()` response for each event, in completion order.
+        """
+        tasks = [asyncio.ensure_future(self._fetch_event(event)) for event in event_metadata]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
 
     async def fetch_event_details(self, event_metadata: List[dict]):
         """
-        Fetches detailed HTML content for a list of events concurrently (handles async/sync methods).
+        Fetches detailed HTML content for a list of events concurrently.
 
         Args:
         ------
@@ -84,23 +108,14 @@ class WebsiteSearch(ABC):
 
         Returns:
         --------
-        List[dict]: A list of responses from the `url` of the events.
+        List[dict]: A list of responses from the `url` of the events, in completion order.
         """
-        if asyncio.iscoroutinefunction(self.run_search):
-            print("Running async run_search")
-            tasks = [self._fetch_event(event) for event in event_metadata]
-            return await asyncio.gather(*tasks)
-        else:
-            print("Running sync run_search")
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as executor:
-                tasks = [loop.run_in_executor(executor, self._fetch_event_sync, event) for event in event_metadata]  # Use a sync version
-            return await asyncio.gather(*tasks)
+        return [detail async for detail in self.stream_event_details(event_metadata)]
 
 
 class HTMLSearch(WebsiteSearch):
-    def __init__(self, website: str):
-        super().__init__(website)
+    def __init__(self, website: str, cache_ttl: float = DEFAULT_CACHE_TTL):
+        super().__init__(website, cache_ttl=cache_ttl)
 
     def get_base_url(self) -> str:
         urls = {
@@ -115,40 +130,26 @@ class HTMLSearch(WebsiteSearch):
         url = f"{self.base_url}{postcode}?id=7"
         if "miles" in params:
             url=f"{self.base_url}{postcode}?id=7&miles={params['miles']}" 
-        print(url)
+        log_sampled("request_url_built", url=url)
         return url
 
-    def run_search(self, url, kwargs: dict = None):
+    async def run_search(self, url, kwargs: dict = None):
         kwargs = kwargs or {}
-
-        try:
-            response = requests.get(url, **kwargs)
-            response.raise_for_status()
-            return {"content": response.text}
-
-        except requests.exceptions.HTTPError as http_err:
-            status_code = response.status_code if response else "Unknown"
-            logging.error(f"HTTP error for {url}: {http_err} (Status: {status_code})")
-            return {
-                "error": f"HTTP error occurred: {http_err}",
-                "status_code": status_code,
-            }
-
-        except requests.exceptions.RequestException as req_err:
-            logging.error(f"Request error for {url}: {req_err}")
-            return {"error": f"Request error occurred: {req_err}", "status_code": None}
-
-        except Exception as err:
-            logging.exception(f"Unexpected error for {url}: {err}")
-            return {
-                "error": f"An unexpected error occurred: {err}",
-                "status_code": None,
-            }
+        return await http_client.fetch(url, ttl=self.cache_ttl, **kwargs)
 
 
 class DynamicSearch(WebsiteSearch):
-    def __init__(self, website: str):
-        super().__init__(website)
+    def __init__(
+        self,
+        website: str,
+        cache_ttl: float = DEFAULT_SNAPSHOT_TTL,
+        max_stale: float = DEFAULT_SNAPSHOT_MAX_STALE,
+        render_profile: dict = None,
+    ):
+        super().__init__(website, cache_ttl=cache_ttl)
+        self.max_stale = max_stale
+        self.render_profile = RenderProfile(**(render_profile or {}))
+        self._blocked_url_patterns = [re.compile(pattern) for pattern in self.render_profile.block_url_patterns]
 
     def get_base_url(self):
         urls = {"the-garden-classroom-76146096453": "https://www.eventbrite.co.uk/o/the-garden-classroom-76146096453",
@@ -159,24 +160,55 @@ class DynamicSearch(WebsiteSearch):
         return urls.get(self.website, "")
 
 
-    async def run_search(self, url: str, locator_config: dict):
-        TIMEOUT=60000
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            await page.goto(url, wait_until="networkidle")
-            try:
-                locator_str=locator_config['selector']
-                locator = page.locator(locator_str).first
-                await locator.wait_for(state="attached", timeout=TIMEOUT)
-                content = await page.content()
-                return {"content": content}
-            except Exception as err:
-                logging.exception(f"Unexpected error for {url}: {err}")
-                return {
-                    "error": f"An unexpected error occurred: {err}",
-                    "status_code": None,
-                }
-            finally:
-                await browser.close()
+    async def run_search(self, url: str, locator_config: dict = None, kwargs: dict = None):
+        """
+        Returns the rendered HTML of `url`, served from the snapshot cache when possible.
+        """
+        selector = locator_config.get("selector") if locator_config else None
+        return await snapshot_cache.get_or_render(
+            url,
+            selector,
+            lambda: self._render(url, locator_config),
+            ttl=self.cache_ttl,
+            max_stale=self.max_stale,
+        )
 
+    async def _block_requests(self, route: Route):
+        request = route.request
+        if request.resource_type in self.render_profile.block_resource_types or any(
+            pattern.search(request.url) for pattern in self._blocked_url_patterns
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url: str, locator_config: dict = None):
+        profile = self.render_profile
+        if not circuit_breaker.allow(url):
+            return {"error": f"Circuit open for {circuit_breaker.domain(url)}", "status_code": None, "circuit_open": True}
+        # neither wait may exceed the adaptive budget for a whole render of this domain (ms)
+        render_budget = circuit_breaker.timeout_for(url, (profile.navigation_timeout + profile.selector_timeout) / 1000, kind="render") * 1000
+        start = time.monotonic()
+        try:
+            async with browser_pool.page() as page:
+                try:
+                    if profile.blocks_requests:
+                        await page.route("**/*", self._block_requests)
+                    await page.goto(url, wait_until=profile.wait_until, timeout=min(profile.navigation_timeout, render_budget))
+                    if locator_config:
+                        locator_str=locator_config['selector']
+                        locator = page.locator(locator_str).first
+                        await locator.wait_for(state="attached", timeout=min(profile.selector_timeout, render_budget))
+                    content = await page.content()
+                    circuit_breaker.record_success(url, time.monotonic() - start, kind="render")
+                    return {"content": content}
+                except Exception as err:
+                    circuit_breaker.record_failure(url)
+                    logging.exception(f"Unexpected error for {url}: {err}")
+                    return {
+                        "error": f"An unexpected error occurred: {err}",
+                        "status_code": None,
+                    }
+        except BaseException: # cancelled, or no browser page to render in: not the site's fault
+            circuit_breaker.release_probe(url)
+            raise
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key starts `fn()` as a task; callers arriving while it runs await the same task
+    and all get its result (or exception). Each caller awaits it through `asyncio.shield`, so a caller
+    being cancelled (e.g. a client disconnecting) doesn't cancel the work the others are waiting on.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.stats = {"executions": 0, "shared": 0, "errors": 0}
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None: # also marks the exception as retrieved
+            self.stats["errors"] += 1
+            logging.warning(f"{self.name}: shared call {key!r} failed: {task.exception()}")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.stats["executions"] += 1
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,126 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.core.metrics import register_stats
+from app.core.response_cache import ResponseCache, export_metrics
+from dotenv import load_dotenv
+load_dotenv()
+
+SNAPSHOT_CACHE_PATH=os.getenv("SNAPSHOT_CACHE_PATH", "http_cache/snapshots.sqlite3")
+SNAPSHOT_CACHE_MAX_BYTES=int(os.getenv("SNAPSHOT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+DEFAULT_SNAPSHOT_TTL=float(os.getenv("SNAPSHOT_DEFAULT_TTL", 6 * 3600))
+DEFAULT_SNAPSHOT_MAX_STALE=float(os.getenv("SNAPSHOT_DEFAULT_MAX_STALE", 7 * 24 * 3600))
+
+
+class SnapshotCache:
+    """
+    Cache of rendered DOM HTML for dynamic pages, keyed by URL and locator selector.
+
+    Fresh snapshots (younger than `ttl`) are served as is. Stale snapshots (up to `ttl + max_stale` old)
+    are served immediately while a background render refreshes them (stale-while-revalidate).
+    Anything older, or missing, is rendered inline.
+    """
+
+    def __init__(self, store: ResponseCache = None):
+        self.store = store or ResponseCache(
+            path=SNAPSHOT_CACHE_PATH, max_bytes=SNAPSHOT_CACHE_MAX_BYTES, table="snapshots"
+        )
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_served": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+
+    @staticmethod
+    def key(url: str, selector: str | None) -> str:
+        return f"{url}|{selector or ''}"
+
+    @property
+    def stale_ratio(self) -> float:
+        """Share of lookups that were answered with a stale snapshot."""
+        lookups = self.stats["hits"] + self.stats["stale_served"] + self.stats["misses"]
+        return self.stats["stale_served"] / lookups if lookups else 0.0
+
+    def info(self) -> dict:
+        return {**self.stats, "stale_ratio": round(self.stale_ratio, 3), "refreshing": len(self._refreshing)}
+
+    async def _render_and_store(self, key: str, render: Callable[[], Awaitable[dict]]) -> dict:
+        response = await render()
+        if response.get("content"):
+            await asyncio.to_thread(self.store.put, key, response["content"])
+        return response
+
+    async def _refresh(self, key: str, render: Callable[[], Awaitable[dict]]):
+        try:
+            response = await self._render_and_store(key, render)
+            if response.get("error"):
+                self.stats["refresh_failures"] += 1
+            else:
+                self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["refresh_failures"] += 1
+            logging.warning(f"Background refresh of snapshot {key} failed: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _schedule_refresh(self, key: str, render: Callable[[], Awaitable[dict]]):
+        if key not in self._refreshing:
+            self._refreshing[key] = asyncio.create_task(self._refresh(key, render))
+
+    async def get_or_render(
+        self,
+        url: str,
+        selector: str | None,
+        render: Callable[[], Awaitable[dict]],
+        ttl: float = DEFAULT_SNAPSHOT_TTL,
+        max_stale: float = DEFAULT_SNAPSHOT_MAX_STALE,
+    ) -> dict:
+        """
+        Returns the snapshot for `url`/`selector`, calling `render` when it is missing or too old.
+
+        Args:
+        ------
+            url (str): URL of the page.
+            selector (str | None): Locator selector the render waits for, part of the cache key.
+            render (Callable): Coroutine function returning the `run_search`-style response dict.
+            ttl (float): Seconds a snapshot is served without refreshing.
+            max_stale (float): Seconds past `ttl` a snapshot may still be served while it is refreshed.
+        """
+        key = self.key(url, selector)
+        entry = await asyncio.to_thread(self.store.get, key)
+        if entry is not None and entry.age < ttl:
+            self.stats["hits"] += 1
+            return {"content": entry.content, "from_cache": True}
+        if entry is not None and entry.age < ttl + max_stale:
+            self.stats["stale_served"] += 1
+            self._schedule_refresh(key, render)
+            return {"content": entry.content, "from_cache": True, "stale": True}
+        self.stats["misses"] += 1
+        return await self._render_and_store(key, render)
+
+    async def close(self):
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        self.store.close()
+        logging.info(f"Snapshot cache closed: {self.stats}, stale ratio {self.stale_ratio:.2f}")
+
+
+snapshot_cache = SnapshotCache()
+
+
+def _collect_metrics():
+    stats = snapshot_cache.stats
+    lookups = CounterMetricFamily("snapshot_cache_lookups", "Snapshot cache lookups by outcome", labels=["outcome"])
+    for outcome in ("hits", "stale_served", "misses"):
+        lookups.add_metric([outcome], stats[outcome])
+    refreshes = CounterMetricFamily("snapshot_cache_refreshes", "Background refreshes of stale snapshots by outcome", labels=["outcome"])
+    refreshes.add_metric(["ok"], stats["refreshes"])
+    refreshes.add_metric(["failed"], stats["refresh_failures"])
+    yield lookups
+    yield refreshes
+    yield GaugeMetricFamily("snapshot_cache_stale_ratio", "Share of snapshot lookups answered with a stale snapshot", value=snapshot_cache.stale_ratio)
+    yield GaugeMetricFamily("snapshot_cache_refreshing", "Background snapshot refreshes in flight", value=len(snapshot_cache._refreshing))
+
+
+register_stats(_collect_metrics)
+export_metrics(snapshot_cache.store)
@@ -0,0 +1,213 @@
+import os
+import re
+import logging
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from app.core.parser_backends import NON_TEXT_TAGS
+from dotenv import load_dotenv
+load_dotenv()
+
+DEFAULT_TEXT_EXTRACTOR_BACKEND=os.getenv("TEXT_EXTRACTOR_BACKEND", "lxml")
+
+TEXT_TAGS = frozenset(["p", "h1", "h2", "h3", "h4", "h5", "h6"])
+BOILERPLATE_TAGS = frozenset(["nav", "footer"])
+BOILERPLATE_ROLES = frozenset(["navigation", "contentinfo"])
+BOILERPLATE_PATTERN = re.compile(r"cookie|consent|gdpr", re.IGNORECASE) # matched against id and class
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+]) # never get an end tag from html.parser, so they can't start a skipped element
+
+
+class _TextCollector:
+    """
+    Turns start/end/data events into the clean text of paragraph and heading elements.
+
+    Each element's text is whitespace-collapsed when it closes, which gives the same result as
+    `SearchResultReader._get_clean_text` collapsing the joined text of every element at the end.
+    """
+
+    def __init__(self, strip_boilerplate: bool, max_chars: int | None):
+        self.strip_boilerplate = strip_boilerplate
+        self.max_chars = max_chars
+        self.done = False
+        self._open: list[str] = []
+        self._current: list[str] = []
+        self._elements: list[str] = []
+        self._length = -1 # length of ' '.join(self._elements)
+        self._skip_tag: str | None = None
+        self._skip_depth = 0
+
+    def _is_boilerplate(self, tag: str, attrs: dict) -> bool:
+        if tag in BOILERPLATE_TAGS or attrs.get("role") in BOILERPLATE_ROLES:
+            return True
+        return bool(BOILERPLATE_PATTERN.search(f"{attrs.get('id') or ''} {attrs.get('class') or ''}"))
+
+    def _close_element(self):
+        text = re.sub(r'\s+', ' ', "".join(self._current)).strip()
+        self._current = []
+        if text:
+            self._elements.append(text)
+            self._length += len(text) + 1
+            if self.max_chars and self._length >= self.max_chars:
+                self.done = True
+
+    def start(self, tag: str, attrs: dict):
+        if self.done:
+            return
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in VOID_TAGS:
+            return
+        if tag in NON_TEXT_TAGS or (self.strip_boilerplate and self._is_boilerplate(tag, attrs)):
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+        if tag not in TEXT_TAGS:
+            return
+        if tag == "p" and "p" in self._open: # an unclosed <p> ends where the next one starts
+            self._open.clear()
+            self._close_element()
+        self._open.append(tag)
+
+    def end(self, tag: str):
+        if self.done:
+            return
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag not in self._open:
+            return
+        while self._open and self._open.pop() != tag:
+            pass
+        if not self._open:
+            self._close_element()
+
+    def data(self, data: str):
+        if self._open and self._skip_tag is None and not self.done:
+            self._current.append(data)
+
+    def close(self):
+        if self._open and not self.done:
+            self._open.clear()
+            self._close_element()
+
+    @property
+    def text(self) -> str:
+        text = ' '.join(self._elements)
+        return text[:self.max_chars].rstrip() if self.max_chars else text
+
+
+class TextExtractor(ABC):
+    """
+    Single-pass clean-text extractor for search result pages.
+
+    The page is fed in chunks as it streams in and no document tree is built. Paragraph and heading
+    text is collected as `SearchResultReader._get_clean_text` does, optionally skipping boilerplate
+    (navigation, footers, cookie/consent banners). With `max_chars` the text is truncated to that length
+    and `feed` returns True once it is reached, so the caller can stop reading the body.
+    """
+    name: str
+
+    def __init__(self, strip_boilerplate: bool = True, max_chars: int | None = None):
+        self._collector = _TextCollector(strip_boilerplate, max_chars)
+
+    @abstractmethod
+    def _feed(self, chunk: str):
+        raise NotImplementedError("Text extractors must implement the `_feed` method")
+
+    @abstractmethod
+    def _close(self):
+        raise NotImplementedError("Text extractors must implement the `_close` method")
+
+    def feed(self, chunk: str) -> bool:
+        """Feeds the next chunk of the page, returns True once no more text is needed."""
+        if not self._collector.done:
+            self._feed(chunk)
+        return self._collector.done
+
+    def close(self):
+        self._close()
+        self._collector.close()
+
+    @property
+    def text(self) -> str:
+        """The clean text of every element fully read so far."""
+        return self._collector.text
+
+
+class _ForwardingHTMLParser(HTMLParser):
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+class HTMLParserTextExtractor(TextExtractor):
+    name = "html.parser"
+
+    def __init__(self, strip_boilerplate: bool = True, max_chars: int | None = None):
+        super().__init__(strip_boilerplate, max_chars)
+        self._parser = _ForwardingHTMLParser(self._collector)
+
+    def _feed(self, chunk: str):
+        self._parser.feed(chunk)
+
+    def _close(self):
+        self._parser.close()
+
+
+class LxmlTextExtractor(TextExtractor):
+    """Feeds libxml2's HTML parser with the collector as its parser target (events only, no tree)."""
+    name = "lxml"
+
+    def __init__(self, strip_boilerplate: bool = True, max_chars: int | None = None):
+        from lxml import etree
+        super().__init__(strip_boilerplate, max_chars)
+        self._parser = etree.HTMLParser(target=self._collector)
+
+    def _feed(self, chunk: str):
+        self._parser.feed(chunk)
+
+    def _close(self):
+        try:
+            self._parser.close()
+        except Exception: # lxml raises on an empty document
+            pass
+
+
+_extractors = {"html.parser": HTMLParserTextExtractor, "lxml": LxmlTextExtractor}
+
+
+def get_text_extractor(backend: str = None, strip_boilerplate: bool = True, max_chars: int | None = None) -> TextExtractor:
+    """
+    Returns a new extractor using `backend` ("lxml" or "html.parser"), falling back to html.parser when
+    lxml isn't installed.
+    """
+    backend = backend or DEFAULT_TEXT_EXTRACTOR_BACKEND
+    extractor_class = _extractors.get(backend, HTMLParserTextExtractor)
+    try:
+        return extractor_class(strip_boilerplate, max_chars)
+    except ImportError as e:
+        logging.warning(f"Text extractor backend '{backend}' unavailable ({e}), falling back to html.parser")
+        _extractors[backend] = HTMLParserTextExtractor
+        return HTMLParserTextExtractor(strip_boilerplate, max_chars)
+
+
+def extract_text(content: str, backend: str = None, strip_boilerplate: bool = True, max_chars: int | None = None) -> str:
+    extractor = get_text_extractor(backend, strip_boilerplate, max_chars)
+    extractor.feed(content)
+    extractor.close()
+    return extractor.text
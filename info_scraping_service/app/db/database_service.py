@@ -1,6 +1,24 @@
 from app.db.database_connection import db_connection
-
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from datetime import datetime, timezone, timedelta
+import os
+import copy
+import time
+import asyncio
 import logging
+from dotenv import load_dotenv
+load_dotenv()
+
+CONFIG_CACHE_TTL=float(os.getenv("CONFIG_CACHE_TTL", 600))
+CONFIG_NEGATIVE_TTL=float(os.getenv("CONFIG_NEGATIVE_TTL", 60)) # how long an unknown postcode is remembered
+CONFIG_CHANGE_STREAM=os.getenv("CONFIG_CHANGE_STREAM", "false").lower()=="true" # needs a replica set
+
+def session_filter(session_id:str)->dict:
+    """Matches events linked to `session_id`, including ones stored before `session_ids` existed."""
+    return {"$or":[{"session_ids":session_id}, {"session_id":session_id}]}
+
+
 class DatabaseService:
     """Base class to manage MongoDB collection"""
     def __init__(self, collection_name:str):
@@ -13,24 +31,126 @@ class DatabaseService:
         
 
 class EventSearchConfigService(DatabaseService):
-    def __init__(self):
+    """
+    Website search configurations per postcode, cached in process.
+
+    Entries live for `ttl` seconds, unknown postcodes are remembered for `negative_ttl` seconds.
+    The cache is filled at startup by `preload()` and emptied by `invalidate()` (admin endpoint)
+    or, when enabled, by the change stream watcher. Each site's extraction plan and searcher are
+    compiled when its configuration is loaded, so a cached lookup needs no further setup.
+    """
+    def __init__(self, ttl:float=CONFIG_CACHE_TTL, negative_ttl:float=CONFIG_NEGATIVE_TTL):
         super().__init__("event_search_configurations")
-    
-    async def get_config(self,postcode:str)->dict|None:
-        """Retrieve website search configurations for a specific postcode."""
+        self.ttl=ttl
+        self.negative_ttl=negative_ttl
+        self._cache:dict[str, tuple[float, list|None]]={}
+        self._watch_task:asyncio.Task|None=None
+        self.stats={"hits":0, "negative_hits":0, "misses":0, "invalidations":0, "errors":0}
+
+    def _compile(self, configurations:list)->None:
+        from app.core.get_data import get_searcher
+        from app.core.extraction_plan import get_extraction_plan
+        for config in configurations:
+            try:
+                get_extraction_plan(config['page_content_config'])
+                get_searcher(config['request_config'], config['page_content_config'])
+            except Exception as e:
+                logging.warning(f"Could not compile configuration for {config.get('request_config', {}).get('website')}: {e}")
+
+    def _store(self, postcode:str, configurations:list|None)->None:
+        if configurations:
+            self._compile(configurations)
+            self._cache[postcode]=(time.monotonic()+self.ttl, configurations)
+        else:
+            self._cache[postcode]=(time.monotonic()+self.negative_ttl, None)
+
+    async def get_config(self,postcode:str)->list|None:
+        """Retrieve website search configurations for a specific postcode (a copy the caller may modify)."""
+        cached=self._cache.get(postcode)
+        if cached is not None and cached[0]>time.monotonic():
+            configurations=cached[1]
+            if configurations is None:
+                self.stats["negative_hits"]+=1
+                logging.warning(f"No configuration found for postcode {postcode}")
+                return None
+            self.stats["hits"]+=1
+            return copy.deepcopy(configurations)
+        self.stats["misses"]+=1
         if self.collection is None:
             await self.init_collection()
         try:
             config = await self.collection.find_one({"postcode": postcode})
-            if config:
-                return config.get("configurations", None)
-            else:
+            configurations=config.get("configurations", None) if config else None
+            self._store(postcode, configurations)
+            if configurations is None:
                 logging.warning(f"No configuration found for postcode {postcode}")
                 return None
+            return copy.deepcopy(configurations)
         except Exception as e:
+            self.stats["errors"]+=1 # errors aren't cached, the next request retries
             logging.error(f"An error occurred retrieving configuration for postcode {postcode}:{e}")
             return None
 
+    async def preload(self)->int:
+        """Loads every postcode's configurations into the cache, returns how many were loaded."""
+        if self.collection is None:
+            await self.init_collection()
+        try:
+            documents=await self.collection.find({}).to_list()
+        except Exception as e:
+            logging.error(f"An error occurred preloading configurations:{e}")
+            return 0
+        for document in documents:
+            if document.get("postcode"):
+                self._store(document["postcode"], document.get("configurations"))
+        logging.info(f"Preloaded configurations for {len(documents)} postcode(s)")
+        return len(documents)
+
+    def invalidate(self, postcode:str|None=None)->int:
+        """Drops `postcode` (or every postcode) from the cache, returns the number of entries dropped."""
+        if postcode is None:
+            dropped=len(self._cache)
+            self._cache.clear()
+        else:
+            dropped=1 if self._cache.pop(postcode, None) is not None else 0
+        self.stats["invalidations"]+=dropped
+        return dropped
+
+    async def _watch(self):
+        try:
+            async with self.collection.watch(full_document="updateLookup") as stream:
+                async for change in stream:
+                    postcode=(change.get("fullDocument") or {}).get("postcode")
+                    # deletes and replacements without a document can't be mapped to a postcode
+                    self.invalidate(postcode if change.get("operationType") in ("insert", "update", "replace") else None)
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            logging.warning(f"Configuration change stream stopped, relying on TTL/admin invalidation: {e}")
+
+    async def start_watching(self):
+        """Invalidates cached configurations on changes to the collection (requires a replica set)."""
+        if self.collection is None:
+            await self.init_collection()
+        if self._watch_task is None:
+            self._watch_task=asyncio.create_task(self._watch())
+
+    async def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task=None
+
+    def cache_info(self)->dict:
+        now=time.monotonic()
+        return {
+            **self.stats,
+            "entries":len(self._cache),
+            "negative_entries":sum(1 for _, configurations in self._cache.values() if configurations is None),
+            "expired_entries":sum(1 for expires_at, _ in self._cache.values() if expires_at<=now),
+            "watching":self._watch_task is not None and not self._watch_task.done(),
+        }
+
 
 class EventDataService(DatabaseService):
     def __init__(self):
@@ -46,6 +166,109 @@ class EventDataService(DatabaseService):
         except Exception as e:
             return {"message":f"Error importing events: {e}", "status":"error", "event_ids":[]}
         
+    async def upsert_events(self, event_dicts:list[dict], session_id:str)->dict:
+        """
+        Inserts new events and links existing ones to `session_id` in one unordered bulk write.
+
+        New events are stored with `session_id` and status "pending". Existing events keep their content
+        (and enrichment), only `last_seen` is updated and the session is added to `session_ids`.
+        Alternative sources (the event's duplicates on other websites) are added to the stored ones, and a
+        duplicate's `canonical_event_id` is kept up to date. A failing event doesn't stop the rest of the batch.
+
+        Args:
+        ------
+            event_dicts (list[dict]): Event documents with `_id` set to the event id.
+            session_id (str): Session the events were scraped for.
+
+        Returns:
+        --------
+            dict: The message and status plus `inserted`/`matched`/`failed` counts and the stored `event_ids`.
+        """
+        if self.collection is None:
+            await self.init_collection()
+        if not event_dicts:
+            return {"message":"No events to import", "status":"success", "event_ids":[], "inserted":0, "matched":0, "failed":0}
+        now=datetime.now(timezone.utc)
+        operations=[
+            UpdateOne(
+                {"_id":event_dict["_id"]},
+                {
+                    "$setOnInsert":{**{k:v for k, v in event_dict.items() if k not in ("_id", "alternative_sources", "canonical_event_id")}, "session_id":session_id, "status":"pending", "scraped_at":now},
+                    "$set":{"last_seen":now, "canonical_event_id":event_dict.get("canonical_event_id")},
+                    "$addToSet":{"session_ids":session_id, "alternative_sources":{"$each":event_dict.get("alternative_sources", [])}},
+                },
+                upsert=True,
+            )
+            for event_dict in event_dicts
+        ]
+        failed_indexes=set()
+        try:
+            result=await self.collection.bulk_write(operations, ordered=False)
+            inserted, matched=result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            details=e.details
+            failed_indexes={error["index"] for error in details.get("writeErrors", [])}
+            inserted, matched=details.get("nUpserted", 0), details.get("nMatched", 0)
+            logging.error(f"{len(failed_indexes)} event(s) failed to import: {details.get('writeErrors', [])[:3]}")
+        except Exception as e:
+            return {"message":f"Error importing events: {e}", "status":"error", "event_ids":[], "inserted":0, "matched":0, "failed":len(event_dicts)}
+        event_ids=[event_dict["_id"] for index, event_dict in enumerate(event_dicts) if index not in failed_indexes]
+        return {
+            "message":f"Imported {inserted} new and {matched} existing events, {len(failed_indexes)} failed",
+            "status":"success" if not failed_indexes else "partial",
+            "event_ids":event_ids,
+            "inserted":inserted,
+            "matched":matched,
+            "failed":len(failed_indexes),
+        }
+
+    async def get_fresh_event_details(self, event_ids:list[str], max_age:float)->dict[str, dict]:
+        """
+        Returns `{event_id: event_detail}` for the stored events among `event_ids` whose details
+        were scraped less than `max_age` seconds ago, in a single `$in` query. Details without any
+        section (e.g. stored before failed fetches were left out) don't count as fresh.
+        """
+        if not event_ids:
+            return {}
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            cutoff=datetime.now(timezone.utc)-timedelta(seconds=max_age)
+            cursor=self.collection.find(
+                {"_id":{"$in":event_ids}, "event_detail.sections.0":{"$exists":True}, "scraped_at":{"$gte":cutoff}},
+                {"event_detail":1},
+            )
+            return {event["_id"]:event["event_detail"] for event in await cursor.to_list()}
+        except Exception as e:
+            logging.error(f"Error looking up known events:{e}")
+            return {}
+
+    async def refresh_event_details(self, event_details:dict[str, dict])->int:
+        """Stores re-fetched details on events that already exist (new events are written by `upsert_events`)."""
+        if not event_details:
+            return 0
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            now=datetime.now(timezone.utc)
+            result=await self.collection.bulk_write([
+                UpdateOne({"_id":event_id}, {"$set":{"event_detail":event_detail, "scraped_at":now}})
+                for event_id, event_detail in event_details.items()
+            ], ordered=False)
+            return result.modified_count
+        except Exception as e:
+            logging.error(f"Error refreshing event details:{e}")
+            return 0
+
+    async def get_events_by_ids(self, event_ids:list[str])->list[dict]:
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            return await self.collection.find({"_id":{"$in":event_ids}}).to_list()
+        except Exception as e:
+            logging.error(f"Error finding events:{e}")
+            return []
+
     async def get_events(self, postcode:str):
         if self.collection is None:
             await self.init_collection()
@@ -61,7 +284,7 @@ class EventDataService(DatabaseService):
             await self.init_collection()
         skip=(page-1)*page_size
         try:
-            cursor=self.collection.find({"session_id":session_id}).skip(skip).limit(page_size)
+            cursor=self.collection.find({**session_filter(session_id), "canonical_event_id":None}).skip(skip).limit(page_size) # duplicates are shown through their canonical event
             events=await cursor.to_list()
             return events
         except Exception as e:
@@ -69,3 +292,71 @@ class EventDataService(DatabaseService):
             return []
 
 
+class ScrapeResultCacheService(DatabaseService):
+    """Mongo tier of the scrape result cache, documents expire through a TTL index on `expires_at`."""
+    def __init__(self):
+        super().__init__("scrape_result_cache")
+
+    async def init_collection(self):
+        await super().init_collection()
+        try:
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            logging.warning(f"Could not create TTL index on {self.collection_name}: {e}")
+
+    async def get_result(self, key:str)->dict|None:
+        try: # the cache is optional, a missing connection only costs a scrape
+            if self.collection is None:
+                await self.init_collection()
+            return await self.collection.find_one({"_id":key})
+        except Exception as e:
+            logging.error(f"Error reading cached scrape result {key}:{e}")
+            return None
+
+    async def put_result(self, key:str, document:dict)->None:
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            await self.collection.replace_one({"_id":key}, {**document, "_id":key}, upsert=True)
+        except Exception as e:
+            logging.error(f"Error caching scrape result {key}:{e}")
+
+    async def delete_results(self, query:dict)->int:
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            result=await self.collection.delete_many(query)
+            return result.deleted_count
+        except Exception as e:
+            logging.error(f"Error deleting cached scrape results:{e}")
+            return 0
+
+
+class SiteListingStateService(DatabaseService):
+    """Hash and event ids of each site's last scraped listing page per query, for incremental scraping."""
+    def __init__(self):
+        super().__init__("site_listing_state")
+
+    async def get_state(self, key:str)->dict|None:
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            return await self.collection.find_one({"_id":key})
+        except Exception as e:
+            logging.error(f"Error reading listing state {key}:{e}")
+            return None
+
+    async def put_state(self, key:str, listing_hash:str, event_ids:list[str])->None:
+        try:
+            if self.collection is None:
+                await self.init_collection()
+            await self.collection.replace_one(
+                {"_id":key},
+                {"listing_hash":listing_hash, "event_ids":event_ids, "updated_at":datetime.now(timezone.utc)},
+                upsert=True,
+            )
+        except Exception as e:
+            logging.error(f"Error storing listing state {key}:{e}")
+
+
+event_search_config_service=EventSearchConfigService()
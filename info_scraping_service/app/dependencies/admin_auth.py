@@ -0,0 +1,11 @@
+import os
+import secrets
+from fastapi import Header, HTTPException
+from dotenv import load_dotenv
+load_dotenv()
+ADMIN_TOKEN=os.getenv("ADMIN_TOKEN") # the /admin routes are only mounted when this is set
+
+def require_admin_token(authorization:str|None=Header(default=None))->None:
+    """Rejects requests to the admin routes that don't carry `Authorization: Bearer <ADMIN_TOKEN>`."""
+    if not ADMIN_TOKEN or authorization is None or not secrets.compare_digest(authorization.encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing admin token", headers={"WWW-Authenticate":"Bearer"})
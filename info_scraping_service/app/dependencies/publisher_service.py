@@ -1,29 +1,140 @@
 from google.cloud import pubsub_v1
-from typing import List
+from google.cloud.pubsub_v1.types import BatchSettings
+from collections import deque
+from typing import Callable
+import asyncio
 import json
 import os
 import logging
 from dotenv import load_dotenv
 load_dotenv()
 project_id=os.getenv("GOOGLE_PROJECT_ID")
+pubsub_topic_name=os.getenv("PUBSUB_TOPIC_NAME")
+PUBSUB_BATCH_MAX_MESSAGES=int(os.getenv("PUBSUB_BATCH_MAX_MESSAGES", 100))
+PUBSUB_BATCH_MAX_BYTES=int(os.getenv("PUBSUB_BATCH_MAX_BYTES", 1024 * 1024))
+PUBSUB_BATCH_MAX_LATENCY=float(os.getenv("PUBSUB_BATCH_MAX_LATENCY", 0.05)) # seconds a message may wait for its batch to fill
+PUBSUB_RETRY_BUFFER_SIZE=int(os.getenv("PUBSUB_RETRY_BUFFER_SIZE", 1000))
+PUBSUB_RETRY_INTERVAL=float(os.getenv("PUBSUB_RETRY_INTERVAL", 5)) # seconds between re-sends of the retry buffer, 0 disables them
+
 class PublisherService:
+    """
+    Process-wide Pub/Sub publisher, started once in the app lifespan.
+
+    Messages are batched by the client according to the batch settings. `publish` awaits the publish
+    future of its own message without blocking the event loop, `publish_nowait` returns immediately. Messages that fail to publish are kept in
+    a bounded retry buffer (oldest dropped first) that a background task re-sends every `retry_interval`
+    seconds, and once more on close.
+
+    The client honours `PUBSUB_EMULATOR_HOST` for local testing. Tests can also pass any `publisher`
+    object with a `publish(topic, data)` method returning a `concurrent.futures.Future`.
+    """
     project_id=project_id
-    def __init__(self, topic_name):
-        self.publisher=pubsub_v1.PublisherClient()
+    def __init__(self, topic_name, publisher=None, batch_settings:BatchSettings|None=None, retry_buffer_size:int=PUBSUB_RETRY_BUFFER_SIZE, retry_interval:float=PUBSUB_RETRY_INTERVAL):
+        self.publisher=publisher
+        self.batch_settings=batch_settings or BatchSettings(
+            max_messages=PUBSUB_BATCH_MAX_MESSAGES, max_bytes=PUBSUB_BATCH_MAX_BYTES, max_latency=PUBSUB_BATCH_MAX_LATENCY,
+        )
         self.topic_name=topic_name
         self.topic_path=f"projects/{self.project_id}/topics/{self.topic_name}"
+        self.retry_buffer:deque[dict]=deque(maxlen=retry_buffer_size)
+        self.retry_interval=retry_interval
+        self._retry_task:asyncio.Task|None=None
+        self._closing=asyncio.Event()
+        self.stats={"published":0, "failed":0, "retried":0}
+
+    async def start(self):
+        if self.publisher is None:
+            try:
+                self.publisher=pubsub_v1.PublisherClient(batch_settings=self.batch_settings)
+            except Exception as e: # e.g. missing credentials, publishes fail (and are buffered) until a restart
+                logging.error(f"Could not create PubSub publisher: {e}")
+        if self.retry_interval > 0 and self._retry_task is None:
+            self._closing.clear()
+            self._retry_task=asyncio.create_task(self._retry_loop())
+
+    async def _retry_loop(self):
+        while not self._closing.is_set():
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=self.retry_interval)
+            except asyncio.TimeoutError:
+                try:
+                    await self.retry_failed()
+                except Exception as e:
+                    logging.error(f"Re-sending buffered PubSub messages failed: {e}")
 
+    async def close(self):
+        if self._retry_task is not None: # not cancelled, a drain in flight would lose the messages it popped
+            self._closing.set()
+            await self._retry_task
+            self._retry_task=None
+        await self.retry_failed()
+        if self.retry_buffer:
+            logging.warning(f"Dropping {len(self.retry_buffer)} unpublished PubSub message(s) on shutdown")
+        if isinstance(self.publisher, pubsub_v1.PublisherClient):
+            await asyncio.to_thread(self.publisher.stop) # flushes pending batches
+        self.publisher=None
+        logging.info(f"Publisher closed: {self.stats}")
 
-    def publish(self, pubsub_data):
+    def _submit(self, pubsub_data):
+        if self.publisher is None:
+            raise RuntimeError("PublisherService is not started. Call `start()` first.")
+        published_message=json.dumps({"pubsub_data":pubsub_data}).encode("utf-8")
+        return self.publisher.publish(self.topic_path, published_message)
+
+    def _failed(self, pubsub_data, error:Exception):
+        self.stats["failed"]+=1
+        self.retry_buffer.append(pubsub_data)
+        logging.error(f"An error in PublisherService occurred: {error}")
+
+    async def publish(self, pubsub_data)->dict:
         try:
-            published_message=json.dumps({"pubsub_data":pubsub_data}).encode("utf-8")
-            future=self.publisher.publish(self.topic_path, published_message)
-            published_message_id=future.result()
+            published_message_id=await asyncio.wrap_future(self._submit(pubsub_data))
+            self.stats["published"]+=1
             return {"message": f"Published session info to PubSub", "published_message_id":published_message_id, "status":"success"}
         except Exception as e:
-            logging.error(f"An error in PublisherService occurred: {e}")
+            self._failed(pubsub_data, e)
             return {"message": f"Error publishing to PubSub:{e}", "published_message_id":None, "status":"error"}
 
+    def publish_nowait(self, pubsub_data, on_error:Callable[[dict, Exception], None]|None=None)->None:
+        """
+        Publishes without waiting for the result. Failed messages go to the retry buffer and `on_error`
+        is called with the data and the error (on the publisher's thread, keep it short).
+        """
+        def done(future):
+            error=future.exception()
+            if error is None:
+                self.stats["published"]+=1
+                return
+            self._failed(pubsub_data, error)
+            if on_error is not None:
+                on_error(pubsub_data, error)
+        try:
+            self._submit(pubsub_data).add_done_callback(done)
+        except Exception as e:
+            self._failed(pubsub_data, e)
+            if on_error is not None:
+                on_error(pubsub_data, e)
 
+    async def retry_failed(self)->int:
+        """Re-publishes buffered messages, returns how many went through. Messages failing again are re-buffered."""
+        if not self.retry_buffer or self.publisher is None:
+            return 0
+        pending=[self.retry_buffer.popleft() for _ in range(len(self.retry_buffer))]
+        futures=[]
+        for pubsub_data in pending:
+            try:
+                futures.append(asyncio.wrap_future(self._submit(pubsub_data)))
+            except Exception as e:
+                futures.append(asyncio.sleep(0, result=e))
+        results=await asyncio.gather(*futures, return_exceptions=True)
+        retried=0
+        for pubsub_data, result in zip(pending, results):
+            if isinstance(result, Exception):
+                self.retry_buffer.append(pubsub_data)
+            else:
+                retried+=1
+        self.stats["retried"]+=retried
+        return retried
 
 
+publisher_service=PublisherService(pubsub_topic_name)
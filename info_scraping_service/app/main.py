@@ -1,12 +1,36 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.routes import events
+from app.routes import events, admin
 from app.db.database_connection import db_connection
+from app.db.database_service import event_search_config_service, CONFIG_CHANGE_STREAM
+from concierge_shared.browser_pool import browser_pool
+from app.core.http_client import http_client
+from app.core.snapshot_cache import snapshot_cache
+from app.core.parse_pool import parse_pool
+from app.core.cache_warmer import cache_warmer
+from app.dependencies.publisher_service import publisher_service
+from app.dependencies.admin_auth import ADMIN_TOKEN
+from app.core.metrics import metrics_app
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db_connection.connect()
+    await event_search_config_service.preload()
+    if CONFIG_CHANGE_STREAM:
+        await event_search_config_service.start_watching()
+    await http_client.start()
+    await publisher_service.start()
+    await browser_pool.start()
+    await parse_pool.start()
+    await cache_warmer.start()
     yield
+    await cache_warmer.stop()
+    await parse_pool.close()
+    await snapshot_cache.close()
+    await browser_pool.close()
+    await publisher_service.close()
+    await http_client.close()
+    await event_search_config_service.stop_watching()
     await db_connection.close()
 
 app=FastAPI(lifespan=lifespan)
@@ -20,4 +44,7 @@ def root():
 
 
 
-app.include_router(router=events.router, prefix="/events")
\ No newline at end of file
+app.include_router(router=events.router, prefix="/events")
+if ADMIN_TOKEN: # without a token the admin routes are not served at all
+    app.include_router(router=admin.router, prefix="/admin")
+app.mount("/metrics", metrics_app) # Prometheus scrape endpoint
\ No newline at end of file
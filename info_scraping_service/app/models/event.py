@@ -9,6 +9,12 @@ class EventDetails(BaseModel):
     event_id:str
     sections:Optional[List[EventDetailSection]]=[]
 
+class AlternativeSource(BaseModel):
+    event_id:str
+    url:str
+    domain:str
+    title:str
+
 class Event(BaseModel):
     title: str
     url: str
@@ -19,4 +25,6 @@ class Event(BaseModel):
     postcode:str
     event_detail: Optional[EventDetails] = None
     errors:Optional[str]=None
+    alternative_sources:List[AlternativeSource]=[] # the same event listed on other websites
+    canonical_event_id:Optional[str]=None # set on a duplicate of an event listed on another website
 
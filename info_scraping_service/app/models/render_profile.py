@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Literal
+
+class RenderProfile(BaseModel):
+    """Per-site Playwright settings, stored as `render_profile` next to `locator` in the page content config."""
+    block_resource_types: List[str]=[] # e.g. ["image", "media", "font", "stylesheet"]
+    block_url_patterns: List[str]=[] # regexes matched against request URLs, e.g. analytics/tracker hosts
+    wait_until: Literal["commit", "domcontentloaded", "load", "networkidle"]="networkidle"
+    navigation_timeout: int=60000 # ms
+    selector_timeout: int=60000 # ms
+
+    @property
+    def blocks_requests(self)->bool:
+        return bool(self.block_resource_types or self.block_url_patterns)
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends
+from app.dependencies.admin_auth import require_admin_token
+from app.db.database_service import event_search_config_service
+from app.core.result_cache import result_cache
+from app.core.cache_warmer import cache_warmer
+from app.core.get_data import incremental_stats
+from app.core.circuit_breaker import circuit_breaker
+from app.core.dedup_index import dedup_index
+from app.core.response_cache import response_cache
+from app.core.snapshot_cache import snapshot_cache
+from app.core.parse_pool import parse_pool
+
+router=APIRouter(dependencies=[Depends(require_admin_token)]) # cache invalidation and warm-up runs are not for the public
+
+@router.get("/config-cache")
+async def get_config_cache_info()->dict:
+    return event_search_config_service.cache_info()
+
+@router.post("/config-cache/invalidate")
+async def invalidate_config_cache(postcode:str|None=None, reload:bool=False)->dict:
+    """Drops the cached configurations for `postcode` (all postcodes when omitted), optionally reloading them all."""
+    dropped=event_search_config_service.invalidate(postcode)
+    reloaded=await event_search_config_service.preload() if reload else 0
+    return {"invalidated":dropped, "reloaded":reloaded}
+
+@router.get("/result-cache")
+async def get_result_cache_info()->dict:
+    return result_cache.hit_rates()
+
+@router.post("/result-cache/invalidate")
+async def invalidate_result_cache(website:str|None=None, postcode:str|None=None)->dict:
+    return {"invalidated":await result_cache.invalidate(website, postcode)}
+
+@router.get("/cache-warmer")
+async def get_cache_warmer_status()->dict:
+    return cache_warmer.status()
+
+@router.post("/cache-warmer/run")
+async def run_cache_warmer()->dict:
+    return await cache_warmer.run_once()
+
+@router.get("/incremental")
+async def get_incremental_stats()->dict:
+    """Per-site detail fetches made and saved by incremental scraping."""
+    return dict(incremental_stats)
+
+@router.get("/circuits")
+async def get_circuit_status()->dict:
+    return circuit_breaker.status()
+
+@router.get("/dedup")
+async def get_dedup_status()->dict:
+    """Size of the cross-site duplicate index and how many duplicates it collapsed."""
+    return dedup_index.status()
+
+@router.get("/http-cache")
+async def get_http_cache_info()->dict:
+    """Hits, misses and revalidations of the on-disk response cache, also exported on /metrics."""
+    return response_cache.info()
+
+@router.get("/snapshot-cache")
+async def get_snapshot_cache_info()->dict:
+    """Fresh, stale-served and missed snapshot lookups and the stale ratio, also exported on /metrics."""
+    return {**snapshot_cache.info(), "store":snapshot_cache.store.info()}
+
+@router.get("/parse-pool")
+async def get_parse_pool_info()->dict:
+    """Batches, pages and worker parse time of the parse pool, its queue depth and restarts, also exported on /metrics."""
+    return parse_pool.info()
@@ -1,36 +1,58 @@
 from fastapi import APIRouter, Depends
-from app.dependencies.publisher_service import PublisherService
+from app.dependencies.publisher_service import PublisherService, publisher_service as shared_publisher_service
 from app.db.database_service import EventDataService
-from app.core.run_scraping_pipeline import run_scraping_pipeline
+from app.core.run_scraping_pipeline import stream_scraping_pipeline
+from app.core.cache_warmer import cache_warmer
 from app.schemas.scrape_request import ScrapeRequestModel
-import os, logging
-from dotenv import load_dotenv
-load_dotenv()
-pubsub_topic_name=os.getenv("PUBSUB_TOPIC_NAME")
+from app.utils.utils import events_to_documents
+from app.core.metrics import SCRAPE_REQUESTS, log_sampled, stage
+import logging
 router=APIRouter()
 
 def get_publisher_service():
-    return PublisherService(pubsub_topic_name)
+    return shared_publisher_service # one client (and gRPC channel) per process, started in the lifespan
 
 @router.post("/scrape")
 async def scrape_events(request_body:ScrapeRequestModel, publisher_service: PublisherService=Depends(get_publisher_service), event_data_service: EventDataService=Depends())->dict:
-    print('request recieved')
     query=request_body.query.model_dump(by_alias=True)
-    event_list=await run_scraping_pipeline(query)
-    event_dicts = [
-            {**event.model_dump(by_alias=True), "_id":event.event_id, "session_id":request_body.session_id, "status":"pending"} for event in event_list
-        ]
-    database_import_message=await event_data_service.import_events(event_dicts)
-    logging.info(f"Database message: {database_import_message['message']}")
-    pubsub_data={
-       "session_id":request_body.session_id, 
-       "page": request_body.query.page, 
-    }
-    pubsub_message=publisher_service.publish(pubsub_data)
+    SCRAPE_REQUESTS.inc()
+    log_sampled("scrape_request_received", session_id=request_body.session_id, postcode=query['postcode'])
+    cache_warmer.record(query)
+    pubsub_messages, database_messages, skipped_websites, invalid_events=[], [], [], 0
+    async for batch in stream_scraping_pipeline(query): # persist and announce each website's events as soon as they're scraped
+        if batch.get('circuit_open'):
+            skipped_websites.append(batch['website'])
+            continue
+        invalid_events+=len(batch['errors'])
+        if not batch['events']:
+            continue
+        with stage("serialisation", site=batch['website'], postcode=query['postcode']):
+            event_dicts=events_to_documents(batch['events'])
+        with stage("mongo_insert", site=batch['website'], postcode=query['postcode']) as span:
+            database_import_message=await event_data_service.upsert_events(event_dicts, request_body.session_id)
+            span.failed=database_import_message['status']=="error"
+        logging.info(f"Database message ({batch['website']}): {database_import_message['message']}")
+        database_messages.append(database_import_message['message'])
+        duplicate_ids={event.event_id for event in batch['events'] if event.canonical_event_id} # stored, but only their canonical event is enriched
+        canonical_ids={event.canonical_event_id for event in batch['events'] if event.canonical_event_id} # other websites' events, published with their own batch
+        event_ids=[event_id for event_id in database_import_message['event_ids'] if event_id not in duplicate_ids | canonical_ids]
+        if not event_ids:
+            continue
+        pubsub_data={
+           "session_id":request_body.session_id, 
+           "page": request_body.query.page, 
+           "website": batch['website'],
+           "event_ids": event_ids,
+        }
+        with stage("pubsub_publish", site=batch['website'], postcode=query['postcode']) as span:
+            pubsub_message=await publisher_service.publish(pubsub_data)
+            span.failed=pubsub_message['status']=="error"
+        pubsub_messages.append(pubsub_message['message'])
     return {
         "service_messages":{
-            "pubsub":pubsub_message['message'], 
-            "mongodb":database_import_message['message']
+            "pubsub":f"{len(pubsub_messages)} batch(es): " + "; ".join(pubsub_messages) if pubsub_messages else "No events to publish", 
+            "mongodb":"; ".join(database_messages) if database_messages else "No events scraped"
         }, # response sent back to chatbot service once scraping is complete
+        "skipped_websites":skipped_websites, # sites currently failing, not scraped until their circuit closes
+        "invalid_events":invalid_events, # scraped events that failed validation and weren't stored
     }
-
@@ -1,8 +1,11 @@
 import os
+import json
 import hashlib
+import logging
 from dotenv import load_dotenv
 from typing import List
 from datetime import datetime, timezone
+from pydantic import TypeAdapter, ValidationError
 from app.models.event import Event
 from typing import List
 
@@ -42,6 +45,10 @@ def generate_event_id(event: dict) -> str:
     # Generate and return the MD5 hash
     return hashlib.md5(unique_string.encode()).hexdigest()
 
+def normalise_query(postcode:str, params:dict|None)->str:
+    """Canonical form of a postcode/params query, so "n1 9qz" and "N19QZ" share caches and in-flight scrapes."""
+    return json.dumps({"postcode":"".join((postcode or "").split()).upper(), "params":params or {}}, sort_keys=True, default=str)
+
 def remove_duplicates(dicts:list, key:str):
     exists=set()
     unique_dicts=[]
@@ -52,9 +59,47 @@ def remove_duplicates(dicts:list, key:str):
             unique_dicts.append(dict)
     return unique_dicts
 
+event_list_adapter=TypeAdapter(List[Event])
+
+def validate_events(event_list:List[dict])->tuple[List[Event], List[dict]]:
+    """
+    Validates a batch of event dicts in one `TypeAdapter` call.
+
+    Invalid events don't fail the batch, they are left out and reported instead.
+
+    Args:
+    ------
+        event_list (List[dict]): Scraped event dicts.
+
+    Returns:
+    --------
+        tuple[List[Event], List[dict]]: The valid events (in order) and one `{"index", "event_id", "error"}`
+        dict per invalid event.
+    """
+    try:
+        return event_list_adapter.validate_python(event_list), []
+    except ValidationError as e:
+        messages={}
+        for error in e.errors(include_url=False):
+            index, *field=error["loc"]
+            messages.setdefault(index, []).append(f"{'.'.join(map(str, field)) or 'event'}: {error['msg']}")
+    errors=[
+        {"index":index, "event_id":event_list[index].get("event_id") if isinstance(event_list[index], dict) else None, "error":"; ".join(message)}
+        for index, message in sorted(messages.items())
+    ]
+    logging.warning(f"{len(errors)} of {len(event_list)} event(s) failed validation: {errors[:3]}")
+    valid=[event for index, event in enumerate(event_list) if index not in messages]
+    return event_list_adapter.validate_python(valid), errors
+
 def convert_events_to_model(event_list:List[dict])->List[Event]:
-    processed_event_list=[Event(**event) for event in event_list]
-    return processed_event_list
+    return validate_events(event_list)[0]
+
+def events_to_documents(events:List[Event])->List[dict]:
+    """Serialises validated events in one call into MongoDB documents keyed by event id."""
+    documents=event_list_adapter.dump_python(events, by_alias=True)
+    for document in documents:
+        document["_id"]=document["event_id"]
+    return documents
 
 def remove_unicode_chars(text:str):
     if text:
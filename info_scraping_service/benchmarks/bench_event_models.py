@@ -0,0 +1,89 @@
+"""
+Offline benchmark of Event validation and serialisation for one scrape session.
+
+Compares the per-event path (`Event(**event)` per dict, then `model_dump` per model spread into a new
+document) with the batch path (`validate_events` + `events_to_documents`, one TypeAdapter call each).
+
+Usage (from info_scraping_service/):
+    python benchmarks/bench_event_models.py --events 5000
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.event import Event
+from app.utils.utils import events_to_documents, validate_events
+
+
+def session_events(count: int, with_details: bool = True) -> list[dict]:
+    events = []
+    for i in range(count):
+        event = {
+            "title": f"Community event {i}",
+            "url": f"https://example.com/events/{i}",
+            "content": f"Drop-in session number {i} with a cup of tea. All welcome. " * 3,
+            "event_id": f"{i:032x}",
+            "domain": "example.com",
+            "timestamp": "2024-11-02T10:00:00+00:00Z",
+            "postcode": "N7 9QT",
+        }
+        if with_details:
+            event["event_detail"] = {
+                "event_id": event["event_id"],
+                "sections": [
+                    {"content": "Tuesday 10am", "links": [f"https://example.com/book/{i}"]},
+                    {"content": "Market Road Gardens, N7", "links": []},
+                    {"content": "Free", "links": [None]},
+                ],
+            }
+        events.append(event)
+    return events
+
+
+def per_event(event_list: list[dict]) -> list[dict]:
+    events = [Event(**event) for event in event_list]
+    return [{**event.model_dump(by_alias=True), "_id": event.event_id} for event in events]
+
+
+def batch(event_list: list[dict]) -> list[dict]:
+    events, _ = validate_events(event_list)
+    return events_to_documents(events)
+
+
+def measure(fn, event_list: list[dict], repeat: int) -> dict:
+    fn(event_list) # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(event_list)
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(event_list)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"p50_ms": sorted(samples)[len(samples) // 2] * 1000, "peak_mb": peak / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for with_details in (False, True):
+        event_list = session_events(args.events, with_details)
+        assert per_event(event_list) == batch(event_list)
+        old, new = measure(per_event, event_list, args.repeat), measure(batch, event_list, args.repeat)
+        label = f"{args.events} events{' with details' if with_details else ''}"
+        print(
+            f"{label:<28} per-event {old['p50_ms']:8.2f} ms {old['peak_mb']:6.2f} MB | "
+            f"batch {new['p50_ms']:8.2f} ms {new['peak_mb']:6.2f} MB | {old['p50_ms'] / new['p50_ms']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Offline benchmark of the HTMLReader extraction hot path.
+
+Runs over the recorded pages in tests/test_data (when present) and a built-in synthetic listing page,
+each scaled to 1x/10x/100x its container count. Parse, container selection, field extraction and
+detail extraction are timed separately; peak memory is measured in a separate (tracemalloc) pass so
+it doesn't skew the timings.
+
+Usage (from info_scraping_service/):
+    python benchmarks/bench_read_html.py                      # print results
+    python benchmarks/bench_read_html.py --save-baseline      # store benchmarks/baseline.json
+    python benchmarks/bench_read_html.py --compare            # compare against the baseline, exit 1 on regressions
+
+The committed baseline.json covers the synthetic page with html.parser. Cases without a baseline entry
+(recorded pages, other parsers) are reported and skipped. Timings depend on the machine, so regenerate
+the baseline with --save-baseline on the machine that runs --compare.
+"""
+import re
+import sys
+import copy
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup
+from app.core.extraction_plan import get_extraction_plan
+from app.core.parser_backends import get_parser_backend
+from app.core.read_html import HTMLReader
+
+TEST_DATA = Path(__file__).resolve().parent.parent / "tests" / "test_data"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+STAGES = ("parse", "select", "extract", "details")
+
+# same configs as tests/test_read_html.py
+RECORDED_PAGES = {
+    "wherecanwego": ("wcwg_result_page_content.html", {
+        "domain": "wherecanwego.com",
+        "container": {"tag": "div", "filter": {"parameter": "class_", "value": "EventResults"}},
+        "title": {"tag": "h2", "filter": {"parameter": "class_", "value": "eventtitle"}},
+        "content": {"tag": "div", "filter": {"parameter": "class_", "value": "description"}},
+        "url": {"tag": "a", "filter": {"parameter": "id", "value": re.compile("EventRepeater")}},
+    }),
+    "centre404": ("centre404_result_page_content.html", {
+        "domain": "centre404.org.uk",
+        "container": {"tag": "div", "filter": {"parameter": "class_", "value": "news-post clearfix"}},
+        "title": {"tag": "div", "filter": {"parameter": "class_", "value": "title"}},
+        "content": {"tag": "div", "filter": {"parameter": "class_", "value": "short-description"}},
+        "url": {"tag": "a", "filter": {"parameter": "class_", "value": "read-more"}},
+    }),
+    "islingtonlife": ("islingtonlife_result_page_content.html", {
+        "domain": "islingtonlife.london",
+        "container": {"tag": "div", "filter": {"parameter": "class_", "value": "card__item card__item--wide"}},
+        "title": {"tag": "h2", "filter": {"parameter": "class_", "value": "card__item__title u-color--red"}},
+        "content": {"tag": "p", "filter": {"parameter": "class_", "value": "card__item__teaser u-color--black"}},
+        "url": {"tag": "a", "filter": {"parameter": "class_", "value": "card__item__container"}},
+    }),
+}
+EVENTBRITE_CONFIG = {
+    "domain": "eventbrite.co.uk",
+    "container": {"selector": "div[data-testid='organizer-profile__future-events'] div.Container_root__4i85v.NestedActionContainer_root__1jtfr.event-card"},
+    "title": {"tag": "h3", "filter": {"parameter": "class_", "value": "Typography_root__487rx"}},
+    "content": {"tag": "section", "filter": {"parameter": "class_", "value": "event-card-details"}},
+    "url": {"tag": "a", "filter": {"parameter": "class_", "value": "event-card-link"}},
+    "details": {
+        "container": {"tag": "section", "filter": {"parameter": "class_", "value": "event-card-details"}},
+        "sections": {"tag": "p", "filter": {}},
+    },
+}
+RECORDED_PAGES["eventbrite_garden_classroom"] = ("the-garden-classroom-76146096453_result_page_content.html", EVENTBRITE_CONFIG)
+RECORDED_PAGES["eventbrite_praxis"] = ("praxis-17432513338_result_page_content.html", EVENTBRITE_CONFIG)
+
+SYNTHETIC_CONFIG = {
+    "domain": "example.com",
+    "container": {"tag": "div", "filter": {"parameter": "class_", "value": "EventResults"}},
+    "title": {"tag": "h2", "filter": {"parameter": "class_", "value": "eventtitle"}},
+    "content": {"selector": "div.description"},
+    "url": {"tag": "a", "filter": {"parameter": "id", "value": re.compile("EventRepeater")}},
+    "details": {
+        "container": {"tag": "section", "filter": {"parameter": "id", "value": "middle"}},
+        "sections": {"tag": "div", "filter": {"parameter": "class_", "value": "spacing"}},
+    },
+}
+SYNTHETIC_EVENT = """
+<div class="EventResults">
+    <h2 class="eventtitle">Community event {i}</h2>
+    <div class="description">Drop-in session number {i} &amp; a cup of tea. <span>All welcome</span></div>
+    <a id="EventRepeater_ctl{i}" href="/events/{i}">More</a>
+    <section id="middle">
+        <div class="spacing">Tuesday 10am <a href="https://example.com/book/{i}">Book</a></div>
+        <div class="spacing">Market Road Gardens, N7</div>
+        <div class="spacing">Free</div>
+    </section>
+</div>
+<div class="advert"><p>Sponsored</p><img src="/ad.png"></div>
+"""
+
+
+def synthetic_page(events: int = 30) -> str:
+    nav = "".join(f'<li><a href="/nav/{i}">Link {i}</a></li>' for i in range(200))
+    body = "".join(SYNTHETIC_EVENT.format(i=i) for i in range(events))
+    return f"<html><head><title>Events</title><script>var x = 1;</script></head><body><nav><ul>{nav}</ul></nav>{body}<footer>Footer</footer></body></html>"
+
+
+def scale_page(content: str, config: dict, factor: int) -> str:
+    """Repeats the page's event containers so it has `factor` times as many."""
+    if factor == 1:
+        return content
+    soup = BeautifulSoup(content, "html.parser")
+    plan = get_extraction_plan(config, get_parser_backend("html.parser"))
+    containers = plan.find_containers(soup)
+    if not containers:
+        return content
+    parent = containers[-1].parent
+    for _ in range(factor - 1):
+        for container in containers:
+            parent.append(copy.copy(container))
+    return str(soup)
+
+
+def load_cases(scales: list[int]) -> dict[str, tuple[str, dict]]:
+    pages = {"synthetic": (synthetic_page(), SYNTHETIC_CONFIG)}
+    for name, (filename, config) in RECORDED_PAGES.items():
+        path = TEST_DATA / filename
+        if path.exists():
+            pages[name] = (path.read_text(), config)
+    if len(pages) == 1:
+        print(f"No recorded pages in {TEST_DATA}, running the synthetic page only", file=sys.stderr)
+    return {
+        f"{name}@{factor}x": (scale_page(content, config, factor), config)
+        for name, (content, config) in pages.items()
+        for factor in scales
+    }
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1)) # nearest rank
+    return ordered[index]
+
+
+def run_stages(plan, content: str) -> tuple[dict, int]:
+    timings = {}
+    start = time.perf_counter()
+    root = plan.parse_listing(content)
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    containers = plan.find_containers(root)
+    timings["select"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    plan.extract_all(containers)
+    timings["extract"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for container in containers:
+        plan.extract_detail_sections(container, include_self=True)
+    timings["details"] = time.perf_counter() - start
+    return timings, len(containers)
+
+
+def peak_memory_mb(config: dict, content: str, parser: str) -> float:
+    reader = HTMLReader(page_content_config={**config, "parser": parser})
+    tracemalloc.start()
+    reader.get_event_metadata(content, include_event_details="details" in config)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def bench_case(content: str, config: dict, parser: str, repeat: int) -> dict:
+    plan = get_extraction_plan(config, get_parser_backend(parser))
+    run_stages(plan, content) # warm up
+    samples = {stage: [] for stage in STAGES}
+    events = 0
+    for _ in range(repeat):
+        timings, events = run_stages(plan, content)
+        for stage, seconds in timings.items():
+            samples[stage].append(seconds)
+    totals = [sum(samples[stage][i] for stage in STAGES) for i in range(repeat)]
+    result = {
+        "events": events,
+        "events_per_s": events / percentile(totals, 50) if events else 0.0,
+        "p50_ms": percentile(totals, 50) * 1000,
+        "p99_ms": percentile(totals, 99) * 1000,
+        "peak_mb": peak_memory_mb(config, content, parser),
+        "stages": {
+            stage: {"p50_ms": percentile(values, 50) * 1000, "p99_ms": percentile(values, 99) * 1000}
+            for stage, values in samples.items()
+        },
+    }
+    return result
+
+
+def run(parsers: list[str], scales: list[int], repeat: int) -> dict:
+    results = {}
+    for case, (content, config) in load_cases(scales).items():
+        for parser in parsers:
+            if get_parser_backend(parser).name != parser:
+                continue
+            results[f"{case}/{parser}"] = bench_case(content, config, parser, repeat)
+    return results
+
+
+def print_results(results: dict):
+    header = f"{'case':<40}{'events':>8}{'events/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}  " + "  ".join(f"{s:>8}" for s in STAGES)
+    print(header)
+    print("-" * len(header))
+    for case, r in results.items():
+        stages = "  ".join(f"{r['stages'][s]['p50_ms']:>8.2f}" for s in STAGES)
+        print(f"{case:<40}{r['events']:>8}{r['events_per_s']:>12.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['peak_mb']:>10.2f}  {stages}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list[str]:
+    """
+    Returns a line per case/metric that got slower (or bigger) than the baseline by more than `tolerance`
+    and by more than `min_delta` ms (or MB), so sub-millisecond stages don't flag noise.
+    """
+    regressions = []
+    for case, r in results.items():
+        base = baseline.get(case)
+        if base is None:
+            print(f"No baseline for {case}, skipped")
+            continue
+        metrics = [("p50_ms", r["p50_ms"], base["p50_ms"]), ("peak_mb", r["peak_mb"], base["peak_mb"])]
+        metrics += [(f"{s}.p50_ms", r["stages"][s]["p50_ms"], base["stages"][s]["p50_ms"]) for s in STAGES]
+        for metric, value, base_value in metrics:
+            change = (value - base_value) / base_value if base_value else 0.0
+            if change > tolerance and value - base_value > min_delta:
+                regressions.append(f"{case} {metric}: {base_value:.2f} -> {value:.2f} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parser", action="append", help="Parser backend(s) to benchmark (default: html.parser)")
+    parser.add_argument("--scales", default="1,10,100", help="Comma separated container count multipliers")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before --compare fails (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="Smallest change (ms or MB) --compare counts as a regression")
+    args = parser.parse_args()
+
+    results = run(args.parser or ["html.parser"], [int(s) for s in args.scales.split(",")], args.repeat)
+    print_results(results)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance, args.min_delta)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Offline benchmark of search-result clean-text extraction.
+
+Compares `SearchResultReader._get_clean_text` (BeautifulSoup tree + find_all) with the single-pass
+extractors in app/core/text_extractor.py on the recorded pages in tests/test_data (when present) and a
+built-in synthetic article page at 1x/10x/100x its size. Output equivalence is checked with boilerplate
+stripping off; the "+strip" rows show the cost with stripping and truncation on.
+
+Usage (from info_scraping_service/):
+    python benchmarks/bench_text_extractor.py
+    python benchmarks/bench_text_extractor.py --check     # exit 1 when an extractor's output differs
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.read_search_results import SearchResultReader
+from app.core.text_extractor import extract_text
+
+TEST_DATA = Path(__file__).resolve().parent.parent / "tests" / "test_data"
+BACKENDS = ("html.parser", "lxml")
+
+SYNTHETIC_PARAGRAPH = """
+<h2>Session {i}: family gardening</h2>
+<p>Join us at the community garden for session {i}. <a href="/book/{i}">Book a place</a> &ndash; it's free,
+   and <strong>all ages</strong> are welcome.<script>track({i})</script></p>
+<div class="meta"><span>Saturday 10am</span><img src="/img/{i}.png"></div>
+<p>Bring gloves &amp; a water bottle.</p>
+"""
+
+
+def synthetic_page(sections: int = 20) -> str:
+    nav = "".join(f'<li><a href="/nav/{i}"><p>Link {i}</p></a></li>' for i in range(100))
+    body = "".join(SYNTHETIC_PARAGRAPH.format(i=i) for i in range(sections))
+    return (
+        "<html><head><title>What's on</title><style>p { margin: 0 }</style></head><body>"
+        f"<nav><ul>{nav}</ul></nav>"
+        '<div id="cookie-consent"><p>We use cookies to improve the site.</p><button>OK</button></div>'
+        f"<main><h1>Events near you</h1>{body}</main>"
+        "<footer><p>&copy; Example council</p><p>Privacy policy</p></footer></body></html>"
+    )
+
+
+def load_pages(scales: list[int]) -> dict[str, str]:
+    pages = {f"synthetic@{factor}x": synthetic_page(20 * factor) for factor in scales}
+    recorded = sorted(TEST_DATA.glob("*.html")) if TEST_DATA.exists() else []
+    if not recorded:
+        print(f"No recorded pages in {TEST_DATA}, running the synthetic page only", file=sys.stderr)
+    for path in recorded:
+        pages[path.stem] = path.read_text()
+    return pages
+
+
+def time_p50(fn, repeat: int) -> tuple[float, str]:
+    result = fn() # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2] * 1000, result
+
+
+def first_difference(expected: str, actual: str) -> str:
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return f"differs at char {i}: {expected[max(0, i - 20):i + 20]!r} vs {actual[max(0, i - 20):i + 20]!r}"
+    return f"length {len(expected)} vs {len(actual)}"
+
+
+def run(scales: list[int], repeat: int, max_chars: int) -> tuple[list[dict], list[str]]:
+    reader = SearchResultReader([])
+    rows, mismatches = [], []
+    for page, content in load_pages(scales).items():
+        reference_ms, expected = time_p50(lambda: reader._get_clean_text(content), repeat)
+        rows.append({"page": page, "extractor": "bs4 _get_clean_text", "kb": len(content) / 1024, "p50_ms": reference_ms, "speedup": 1.0, "same": True})
+        for backend in BACKENDS:
+            ms, actual = time_p50(lambda: extract_text(content, backend, strip_boilerplate=False), repeat)
+            same = actual == expected
+            if not same:
+                mismatches.append(f"{page}/{backend}: {first_difference(expected, actual)}")
+            rows.append({"page": page, "extractor": backend, "kb": len(content) / 1024, "p50_ms": ms, "speedup": reference_ms / ms, "same": same})
+            ms, _ = time_p50(lambda: extract_text(content, backend, max_chars=max_chars), repeat)
+            rows.append({"page": page, "extractor": f"{backend} +strip", "kb": len(content) / 1024, "p50_ms": ms, "speedup": reference_ms / ms, "same": None})
+    return rows, mismatches
+
+
+def print_rows(rows: list[dict]):
+    header = f"{'page':<48}{'extractor':<22}{'KB':>9}{'p50 ms':>10}{'speed-up':>10}  same"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        same = "" if r["same"] is None else ("yes" if r["same"] else "NO")
+        print(f"{r['page']:<48}{r['extractor']:<22}{r['kb']:>9.1f}{r['p50_ms']:>10.2f}{r['speedup']:>9.1f}x  {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,10,100", help="Comma separated synthetic page size multipliers")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=20000, help="Truncation used for the +strip rows")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when an extractor's output differs from _get_clean_text")
+    args = parser.parse_args()
+
+    rows, mismatches = run([int(s) for s in args.scales.split(",")], args.repeat, args.max_chars)
+    print_rows(rows)
+    for line in mismatches:
+        print(f"MISMATCH {line}")
+    if args.check and mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
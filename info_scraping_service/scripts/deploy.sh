@@ -25,5 +25,5 @@ echo "         :  '  |    ;       ;-."
 echo "         ; '   : :\`-:     _.\`* ;"
 echo "  .*' /  .*' ; .* \`- +'  \`*'"
 echo "      \`*-*   \`*-*  \`*-*'"
-gcloud builds submit --tag ${IMAGE_TAG}
+gcloud builds submit .. --config cloudbuild.yaml --substitutions=_IMAGE_TAG="${IMAGE_TAG}"
 
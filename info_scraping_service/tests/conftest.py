@@ -0,0 +1,71 @@
+"""Pages and site configurations shared by several test modules."""
+import re
+
+import pytest
+
+LISTING_HTML = """
+<html><body>
+<div class="EventResults">
+    <h2 class="eventtitle">Coffee Morning</h2>
+    <div class="description">Free coffee &amp; chat</div>
+    <a id="EventRepeater_ctl01" href="/events/coffee">More</a>
+</div>
+<div class="EventResults">
+    <h2 class="eventtitle">Gardening Club</h2>
+    <div class="description">Bring gloves</div>
+    <a id="EventRepeater_ctl02" href="/events/garden">More</a>
+    <section id="middle">
+        <div class="spacing">Tuesday 10am <a href="https://example.com/book">Book</a></div>
+        <div class="spacing">Market Road Gardens</div>
+    </section>
+</div>
+<div class="Other"><h2 class="eventtitle">Not an event</h2></div>
+</body></html>
+"""
+
+
+PAGE_HTML = """
+<html><body>
+<nav><p>Menu</p></nav>
+<div class="card__item card__item--wide">
+    <h2 class="card__item__title u-color--red"> Family Fun Day &nbsp;<!-- hidden --></h2>
+    <p class="card__item__teaser u-color--black"><script>track()</script>Face painting &amp; games</p>
+    <a class="card__item__container" href="/fun-day?a=1&amp;b=2">More</a>
+    <div class="entry__body__container"><p>Saturday <a href="/book">Book</a></p><p>Free</p></div>
+</div>
+<div class="card__item  card__item--wide extra">
+    <h2 class="card__item__title">Ignored: extra class</h2>
+</div>
+<div class="card__item card__item--wide">
+    <h2 class="card__item__title u-color--red">Storytime</h2>
+    <a class="card__item__container" id="EventRepeater_2">No link</a>
+</div>
+<h1>Heading</h1>
+</body></html>
+"""
+
+
+@pytest.fixture
+def listing_html():
+    return LISTING_HTML
+
+
+@pytest.fixture
+def listing_config():
+    """A wherecanwego-style listing configuration matching `listing_html`, fresh for each test."""
+    return {
+        "domain": "wherecanwego.com",
+        "container": {"tag": "div", "filter": {"parameter": "class_", "value": "EventResults"}},
+        "title": {"tag": "h2", "filter": {"parameter": "class_", "value": "eventtitle"}},
+        "content": {"selector": "div.description"},
+        "url": {"tag": "a", "filter": {"parameter": "id", "value": re.compile("EventRepeater")}},
+        "details": {
+            "container": {"tag": "section", "filter": {"parameter": "id", "value": "middle"}},
+            "sections": {"tag": "div", "filter": {"parameter": "class_", "value": "spacing"}},
+        },
+    }
+
+
+@pytest.fixture
+def page_html():
+    return PAGE_HTML
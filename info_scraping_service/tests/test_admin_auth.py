@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.dependencies import admin_auth
+from app.routes import admin
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "s3cret")
+    app = FastAPI()
+    app.include_router(router=admin.router, prefix="/admin")
+    return TestClient(app)
+
+
+def test_admin_routes_need_the_token(client):
+    for method, path in [("get", "/admin/circuits"), ("post", "/admin/result-cache/invalidate"), ("post", "/admin/cache-warmer/run")]:
+        assert client.request(method, path).status_code == 401
+        assert client.request(method, path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_admin_routes_accept_the_token(client):
+    response = client.get("/admin/circuits", headers={"Authorization": "Bearer s3cret"})
+
+    assert response.status_code == 200
+
+
+def test_no_token_configured_rejects_everything(client, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", None)
+
+    assert client.get("/admin/circuits", headers={"Authorization": "Bearer None"}).status_code == 401
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.core.cache_warmer as cache_warmer_module
+from app.core.cache_warmer import CacheWarmer
+
+
+def test_warms_top_queries_and_reports_skips(monkeypatch):
+    warmed = []
+
+    async def fake_pipeline(query):
+        warmed.append(query["postcode"])
+        return ["event"]
+
+    monkeypatch.setattr(cache_warmer_module, "run_scraping_pipeline", fake_pipeline)
+    warmer = CacheWarmer(interval=3600, top_n=2, max_load=float("inf"))
+    for postcode, requests in (("N19QZ", 3), ("n1 9qz", 2), ("E1 6AN", 2), ("SE1", 1)):
+        for _ in range(requests):
+            warmer.record({"postcode": postcode, "params": {"miles": 2}})
+
+    report = asyncio.run(warmer.run_once())
+    assert warmed == ["n1 9qz", "E1 6AN"] # the latest spelling of a query is used
+    assert [w["events"] for w in report["warmed"]] == [1, 1]
+    assert warmer.top_queries()[0][1] == 2.5 # counts decay after a run
+
+    warmer.max_load = -1
+    report = asyncio.run(warmer.run_once())
+    assert report["skipped"][0]["reason"].startswith("cpu load")
+    assert warmer.status()["last_run"] is report
+
+
+def test_records_nothing_while_disabled():
+    warmer = CacheWarmer(interval=0)
+    warmer.record({"postcode": "N19QZ", "params": {}})
+
+    assert not warmer.counts and not warmer.queries
+
+
+def test_tracked_queries_are_capped():
+    warmer = CacheWarmer(interval=3600, top_n=2, tracked_per_slot=5) # 10 queries tracked
+    for _ in range(3):
+        warmer.record({"postcode": "N19QZ", "params": {}})
+    for i in range(1000): # one-off queries, e.g. a client sweeping postcodes
+        warmer.record({"postcode": f"E{i}", "params": {}})
+
+    assert len(warmer.counts) < 20 and len(warmer.queries) == len(warmer.counts)
+    assert warmer.top_queries()[0][1] == 3 and warmer.queries[warmer.top_queries()[0][0]]["postcode"] == "N19QZ"
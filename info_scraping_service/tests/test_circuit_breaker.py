@@ -0,0 +1,87 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.http_client import HTTPClient
+
+URL = "https://trinityislington.org/whats-happening"
+
+
+def test_opens_after_consecutive_failures_and_probes_half_open():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        assert breaker.allow(URL)
+        breaker.record_failure(URL)
+    assert breaker.is_open(URL)
+    assert not breaker.allow(URL)
+
+    time.sleep(0.06)
+    assert breaker.allow(URL) # the single half-open probe
+    assert not breaker.allow(URL)
+    breaker.record_failure(URL) # failed probe re-opens straight away
+    assert breaker.is_open(URL)
+
+    time.sleep(0.06)
+    assert breaker.allow(URL)
+    breaker.record_success(URL, 0.2)
+    assert not breaker.is_open(URL)
+    assert breaker.status()["trinityislington.org"]["state"] == "closed"
+
+
+def test_timeout_adapts_to_latency_percentile():
+    breaker = CircuitBreaker(percentile=95, multiplier=3, min_timeout=0.5, min_samples=20)
+    assert breaker.timeout_for(URL, 20) == 20
+    for latency in [0.3] * 19 + [1.0]:
+        breaker.record_success(URL, latency)
+    assert breaker.timeout_for(URL, 20) == 3.0
+    assert breaker.timeout_for(URL, 2) == 2 # never above the configured timeout
+    assert breaker.timeout_for(URL, 20, kind="render") == 20
+
+
+def test_http_client_rejects_requests_to_open_circuits():
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(503)
+
+    async def run():
+        client = HTTPClient(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        responses = [await client.fetch(URL) for _ in range(4)]
+        await client.client.aclose()
+        return responses
+
+    responses = asyncio.run(run())
+    assert [r["status_code"] for r in responses[:2]] == [503, 503]
+    assert all(r.get("circuit_open") for r in responses[2:])
+    assert len(requests_seen) == 2
+
+
+def test_cancelled_probe_does_not_block_the_domain():
+    async def handler(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    async def run():
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure(URL)
+        await asyncio.sleep(0.02)
+        client = HTTPClient(breaker=breaker)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        probe = asyncio.create_task(client.fetch(URL)) # e.g. the scrape request was abandoned
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        await client.client.aclose()
+        return breaker
+
+    breaker = asyncio.run(run())
+    assert not breaker.is_open(URL)
+    assert breaker.allow(URL) # a new probe goes ahead
@@ -0,0 +1,39 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db.database_service import EventSearchConfigService
+
+
+class FakeConfigCollection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.reads = 0
+
+    async def find_one(self, query):
+        self.reads += 1
+        return next((d for d in self.documents if d["postcode"] == query["postcode"]), None)
+
+
+def test_configs_are_cached_copied_and_invalidated(listing_config):
+    configurations = [{"request_config": {"website": "wherecanwego"}, "page_content_config": listing_config}]
+    collection = FakeConfigCollection([{"postcode": "N19QZ", "configurations": configurations}])
+    service = EventSearchConfigService(ttl=60, negative_ttl=60)
+    service.collection = collection
+
+    async def run():
+        first = await service.get_config("N19QZ")
+        first[0]["request_config"]["postcode"] = "mutated"
+        second = await service.get_config("N19QZ")
+        unknown = [await service.get_config("E1") for _ in range(2)]
+        service.invalidate("N19QZ")
+        await service.get_config("N19QZ")
+        return second, unknown
+
+    second, unknown = asyncio.run(run())
+    assert "postcode" not in second[0]["request_config"]
+    assert unknown == [None, None]
+    assert collection.reads == 3
+    assert service.stats["hits"] == 1 and service.stats["negative_hits"] == 1
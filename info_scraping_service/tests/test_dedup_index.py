@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.dedup_index import DedupIndex
+from app.models.event import Event
+from app.utils.utils import generate_event_id
+
+
+def event(title, domain, content="", sections=()):
+    data = {
+        "title": title,
+        "url": f"https://{domain}/events/{title.lower().replace(' ', '-')}",
+        "content": content,
+        "domain": domain,
+        "timestamp": "2024-11-02T10:00:00+00:00Z",
+        "postcode": "N7 9QT",
+    }
+    data["event_id"] = generate_event_id(data)
+    data["event_detail"] = {"event_id": data["event_id"], "sections": [{"content": section, "links": []} for section in sections]}
+    return Event(**data)
+
+
+def test_collapses_cross_site_duplicates_into_canonical_event():
+    index = DedupIndex()
+    original = event("Halloween Family Fun Day", "wherecanwego.com", "Saturday 2nd November, 11am. Free.")
+    other = event("Family Fun Day - Halloween!", "islingtonlife.london", "Sat 2 Nov 11am at Market Road Gardens, N7 9QT")
+    unrelated = event("Seed swap and plant sale", "islingtonlife.london", "Saturday 2nd November")
+
+    assert index.collapse([original]) == [original]
+    collapsed = index.collapse([other, unrelated])
+
+    assert [e.event_id for e in collapsed] == [original.event_id, other.event_id, unrelated.event_id]
+    assert [e.canonical_event_id for e in collapsed] == [None, original.event_id, None] # the duplicate is kept, linked
+    assert [source.url for source in collapsed[0].alternative_sources] == [other.url]
+    assert collapsed[0].content == original.content
+    assert collapsed[1].content == other.content
+
+    again = index.collapse([other]) # re-scraped in a later query, found by its id
+    assert [e.event_id for e in again] == [original.event_id, other.event_id]
+    assert len(again[0].alternative_sources) == 1 and again[1].canonical_event_id == original.event_id
+    assert index.status()["duplicates"] == 2
+
+
+def test_different_dates_or_same_site_are_not_duplicates():
+    index = DedupIndex()
+    weekly = event("Toddler music session", "wherecanwego.com", "Tuesday 5th November 10am")
+    next_week = event("Toddler Music Session", "islingtonlife.london", sections=["Tuesday 12th November 10am"])
+    same_site = event("Toddler music sessions", "wherecanwego.com", "Tuesday 5th November 10am")
+    week_3 = event("Coding club week 3", "wherecanwego.com", "Saturday 2nd November")
+    week_4 = event("Coding club: week 4", "islingtonlife.london", "Saturday 2nd November")
+
+    collapsed = index.collapse([weekly, next_week, same_site, week_3, week_4])
+
+    assert [e.event_id for e in collapsed] == [e.event_id for e in (weekly, next_week, same_site, week_3, week_4)]
+    assert all(not e.alternative_sources and e.canonical_event_id is None for e in collapsed)
+
+
+def test_same_title_and_date_at_different_postcodes_are_not_duplicates():
+    index = DedupIndex()
+    islington = event("Coffee Morning", "wherecanwego.com", "Saturday 2nd November 10am, St Mary's Church Hall, N1 9QZ")
+    whitechapel = event("Coffee Morning", "islingtonlife.london", "Saturday 2nd November 10am, Whitechapel Library, E1 6AN")
+    same_district = event("Stay and Play", "wherecanwego.com", "Monday 4th November 10am, Hornsey Road Children's Centre, N7 6EN")
+    other_venue = event("Stay & Play", "islingtonlife.london", "Monday 4th November 10am, Ashmount Children's Centre, N7 7EU")
+
+    collapsed = index.collapse([islington, whitechapel, same_district, other_venue])
+
+    assert [e.event_id for e in collapsed] == [e.event_id for e in (islington, whitechapel, same_district, other_venue)]
+    assert all(e.canonical_event_id is None for e in collapsed)
+
+
+def test_events_without_dates_are_not_merged():
+    index = DedupIndex()
+    listing = event("Coffee Morning", "wherecanwego.com", "Free coffee & chat")
+    other_site = event("Coffee Morning", "islingtonlife.london", "Free coffee & chat, every week")
+
+    assert [e.canonical_event_id for e in index.collapse([listing, other_site])] == [None, None]
+
+
+def test_evicts_least_recently_seen_events():
+    index = DedupIndex(max_size=1)
+    first = event("Knitting circle", "wherecanwego.com", "Thursday 7th November")
+    index.collapse([first, event("Knitting circle", "islingtonlife.london", "Thursday 7th November")])
+    index.collapse([event("Pottery taster", "wherecanwego.com", "Thursday 7th November")])
+
+    status = index.status()
+    assert (status["size"], status["aliases"], status["evicted"]) == (1, 0, 1)
+    again = index.collapse([event("Knitting circle", "islingtonlife.london", "Thursday 7th November")])
+    assert again[0].alternative_sources == [] and again[0].canonical_event_id is None
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.event import Event
+from app.utils.utils import events_to_documents, validate_events
+
+
+def event(i, **overrides):
+    return {
+        "title": f"Event {i}",
+        "url": f"https://example.com/events/{i}",
+        "content": "Free drop-in",
+        "event_id": f"id-{i}",
+        "domain": "example.com",
+        "timestamp": "2024-11-02T10:00:00+00:00Z",
+        "postcode": "N7 9QT",
+        "event_detail": {"event_id": f"id-{i}", "sections": [{"content": "Tuesday", "links": ["/book", None]}]},
+        **overrides,
+    }
+
+
+def test_invalid_events_are_reported_without_failing_the_batch():
+    missing_title = event(1)
+    del missing_title["title"]
+    event_list = [event(0), missing_title, event(2, event_detail={"event_id": "id-2", "sections": [{"content": 3}]}), event(3)]
+
+    events, errors = validate_events(event_list)
+
+    assert [e.event_id for e in events] == ["id-0", "id-3"]
+    assert [(error["index"], error["event_id"]) for error in errors] == [(1, "id-1"), (2, "id-2")]
+    assert "title: Field required" in errors[0]["error"]
+    assert "event_detail.sections.0.content" in errors[1]["error"]
+    assert "event_detail.sections.0.links" in errors[1]["error"]
+
+
+def test_documents_match_per_event_dump():
+    events, errors = validate_events([event(i) for i in range(3)])
+    assert errors == []
+    expected = [{**Event(**event(i)).model_dump(by_alias=True), "_id": f"id-{i}"} for i in range(3)]
+    assert events_to_documents(events) == expected
@@ -0,0 +1,61 @@
+import copy
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.extraction_plan import config_hash, get_extraction_plan
+from app.core.read_html import HTMLReader
+
+
+def test_plan_is_cached_by_config_hash(listing_config):
+    same_config = copy.deepcopy(listing_config)
+    assert config_hash(listing_config) == config_hash(same_config)
+    assert get_extraction_plan(listing_config) is get_extraction_plan(same_config)
+
+
+def test_extract_all_matches_per_field_extraction(listing_html, listing_config):
+    reader = HTMLReader(page_content_config=listing_config)
+    containers = reader._get_event_result_containers(listing_html, reader.config["container"])
+    assert len(containers) == 2
+
+    extracted = reader.plan.extract_all(containers)
+    assert extracted == [
+        {
+            "title": reader.extract_text(container, listing_config["title"]),
+            "url": reader.extract_url(container, listing_config["url"]),
+            "content": reader.extract_text(container, listing_config["content"]),
+        }
+        for container in containers
+    ]
+    assert extracted[0] == {"title": "Coffee Morning", "url": "/events/coffee", "content": "Free coffee & chat"}
+
+
+def test_get_event_metadata_with_details(listing_html, listing_config):
+    reader = HTMLReader(page_content_config=listing_config)
+    event_metadata = reader.get_event_metadata(listing_html, include_event_details=True)
+    assert [event["title"] for event in event_metadata] == ["Coffee Morning", "Gardening Club"]
+    assert event_metadata[0]["event_details"]["sections"] == []
+    assert event_metadata[1]["event_details"]["sections"] == [
+        {"content": "Tuesday 10amBook", "links": ["https://example.com/book"]},
+        {"content": "Market Road Gardens", "links": []},
+    ]
+
+
+def test_details_from_container_match_reparsed_html(listing_html, listing_config):
+    # the event container is itself the details container
+    listing_config["details"]["container"] = {"tag": "div", "filter": {"parameter": "class_", "value": "EventResults"}}
+    reader = HTMLReader(page_content_config=listing_config)
+    containers = reader._get_event_result_containers(listing_html, listing_config["container"])
+    for container in containers:
+        from_node = reader.get_event_detail({"event_id": "e", "node": container})
+        reparsed = reader.get_event_detail({"event_id": "e", "content": str(container)})
+        assert from_node == reparsed
+    assert from_node["sections"][0]["content"] == "Tuesday 10amBook"
+
+
+def test_listing_parse_only_builds_containers(listing_html, listing_config):
+    reader = HTMLReader(page_content_config=listing_config)
+    soup = reader.plan.parse_listing(listing_html)
+    assert soup.find("div", class_="Other") is None
+    assert len(reader.plan.find_containers(soup)) == 2
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.fetch_scheduler import FetchScheduler
+
+
+def test_per_host_and_global_concurrency_caps():
+    scheduler = FetchScheduler(max_concurrency=3, per_host_concurrency=2, per_host_rate=0)
+    active = {"total": 0, "a.com": 0, "b.com": 0}
+    peak = {"total": 0, "a.com": 0, "b.com": 0}
+
+    async def fetch(host):
+        active["total"] += 1
+        active[host] += 1
+        peak["total"] = max(peak["total"], active["total"])
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active["total"] -= 1
+        active[host] -= 1
+        return {"content": "ok"}
+
+    async def run():
+        urls = [f"https://{host}/{i}" for i in range(10) for host in ("a.com", "b.com")]
+        return await asyncio.gather(
+            *[scheduler.run(url, lambda url=url: fetch(url.split("/")[2])) for url in urls]
+        )
+
+    results = asyncio.run(run())
+    assert len(results) == 20
+    assert peak["total"] <= 3
+    assert peak["a.com"] <= 2
+    assert peak["b.com"] <= 2
+
+
+def test_retries_transient_errors_only():
+    scheduler = FetchScheduler(max_retries=2, backoff_base=0.001, per_host_rate=0)
+    calls = {"flaky": 0, "missing": 0}
+
+    async def flaky():
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            return {"error": "unavailable", "status_code": 503}
+        return {"content": "ok"}
+
+    async def missing():
+        calls["missing"] += 1
+        return {"error": "not found", "status_code": 404}
+
+    assert asyncio.run(scheduler.run("https://a.com/flaky", flaky)) == {"content": "ok"}
+    assert asyncio.run(scheduler.run("https://a.com/missing", missing))["status_code"] == 404
+    assert calls == {"flaky": 3, "missing": 1}
+
+
+def test_per_host_rate_limit_spaces_requests():
+    scheduler = FetchScheduler(per_host_concurrency=10, per_host_rate=50)
+    starts = []
+
+    async def fetch():
+        starts.append(time.monotonic())
+        return {"content": "ok"}
+
+    async def run():
+        await asyncio.gather(*[scheduler.run("https://a.com/", fetch) for _ in range(5)])
+
+    asyncio.run(run())
+    assert starts[-1] - starts[0] >= 4 * (1 / 50) * 0.9
+
+
+def test_retried_fetch_counts_once_in_the_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    scheduler = FetchScheduler(max_retries=2, backoff_base=0.001, per_host_rate=0, breaker=breaker)
+    attempts = []
+
+    async def failing():
+        assert breaker.allow("https://a.com/x") # reports like `HTTPClient.fetch`
+        attempts.append("failing")
+        breaker.record_failure("https://a.com/x")
+        return {"error": "unavailable", "status_code": 503}
+
+    async def flaky():
+        assert breaker.allow("https://a.com/y")
+        attempts.append("flaky")
+        if attempts.count("flaky") < 3:
+            breaker.record_failure("https://a.com/y")
+            return {"error": "unavailable", "status_code": 503}
+        breaker.record_success("https://a.com/y", 0.1)
+        return {"content": "ok"}
+
+    assert asyncio.run(scheduler.run("https://a.com/x", failing))["status_code"] == 503
+    status = breaker.status()["a.com"]
+    assert (status["state"], status["consecutive_failures"], status["failures"]) == ("closed", 1, 1) # 3 attempts, 1 failure
+
+    assert asyncio.run(scheduler.run("https://a.com/y", flaky)) == {"content": "ok"}
+    status = breaker.status()["a.com"]
+    assert (status["consecutive_failures"], status["failures"], status["successes"]) == (0, 1, 1)
+    assert attempts == ["failing"] * 3 + ["flaky"] * 3
+
+
+def test_retries_of_a_half_open_probe_stay_the_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    scheduler = FetchScheduler(max_retries=2, backoff_base=0.001, per_host_rate=0, breaker=breaker)
+    breaker.record_failure("https://a.com/")
+    time.sleep(0.02)
+    calls = 0
+
+    async def flaky():
+        nonlocal calls
+        if not breaker.allow("https://a.com/"):
+            return {"error": "Circuit open for a.com", "status_code": None, "circuit_open": True}
+        calls += 1
+        if calls < 2:
+            breaker.record_failure("https://a.com/")
+            return {"error": "unavailable", "status_code": 503}
+        breaker.record_success("https://a.com/", 0.1)
+        return {"content": "ok"}
+
+    assert asyncio.run(scheduler.run("https://a.com/", flaky)) == {"content": "ok"}
+    assert breaker.status()["a.com"]["state"] == "closed"
+
+
+def test_cancelled_probe_is_released():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    scheduler = FetchScheduler(per_host_rate=0, breaker=breaker)
+    breaker.record_failure("https://a.com/")
+    time.sleep(0.02)
+
+    async def hangs():
+        assert breaker.allow("https://a.com/")
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(scheduler.run("https://a.com/", hangs))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert breaker.allow("https://a.com/") # the next request may probe
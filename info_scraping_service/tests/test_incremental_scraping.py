@@ -0,0 +1,135 @@
+import asyncio
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.core.get_data as get_data
+
+
+class FakeSearcher:
+    def __init__(self, content):
+        self.content = content
+        self.detail_fetches = 0
+        self.failing = set() # event ids whose detail fetch fails
+
+    def create_request_url(self, postcode, params):
+        return "https://example.com/events"
+
+    async def run_search(self, url):
+        return {"content": self.content}
+
+    async def stream_event_details(self, events):
+        for event in events:
+            self.detail_fetches += 1
+            yield {"event_id": event["event_id"], "content": "" if event["event_id"] in self.failing else self.content}
+
+
+class FakeEventStore:
+    def __init__(self):
+        self.events = {}
+        self.expired = set() # ids whose details are older than the max age
+
+    async def get_fresh_event_details(self, event_ids, max_age):
+        return {
+            i: self.events[i]["event_detail"] for i in event_ids
+            if i in self.events and self.events[i]["event_detail"] is not None and i not in self.expired
+        }
+
+    async def refresh_event_details(self, event_details):
+        refreshed = [event_id for event_id in event_details if event_id in self.events] # new events are left to the upsert
+        for event_id in refreshed:
+            self.events[event_id]["event_detail"] = event_details[event_id]
+            self.expired.discard(event_id)
+        return len(refreshed)
+
+    async def get_events_by_ids(self, event_ids):
+        return [{**self.events[i], "_id": i} for i in event_ids if i in self.events]
+
+
+class FakeListingStore:
+    def __init__(self):
+        self.states = {}
+
+    async def get_state(self, key):
+        return self.states.get(key)
+
+    async def put_state(self, key, listing_hash, event_ids):
+        self.states[key] = {"listing_hash": listing_hash, "event_ids": event_ids}
+
+
+@pytest.fixture
+def scraper(monkeypatch, listing_html, listing_config):
+    searcher, events = FakeSearcher(listing_html), FakeEventStore()
+    monkeypatch.setattr(get_data, "get_searcher", lambda *args: searcher)
+    monkeypatch.setattr(get_data, "event_data_service", events)
+    monkeypatch.setattr(get_data, "listing_state_service", FakeListingStore())
+    monkeypatch.setattr(get_data, "incremental_stats", defaultdict(lambda: {"listings_unchanged": 0, "detail_fetches": 0, "detail_fetches_saved": 0}))
+    listing_config.pop("details")
+    request_config = {"website": "example", "postcode": "N19QZ", "params": {}, "include_event_details": False, "incremental": True}
+
+    def scrape():
+        dset = asyncio.run(get_data._scrape_dset(request_config, listing_config))
+        for event in dset: # what the route's upsert would store
+            events.events.setdefault(event["event_id"], event)
+        return dset
+
+    return scrape, searcher, events
+
+
+def test_known_events_and_unchanged_listings_skip_fetches(scraper, listing_html):
+    scrape, searcher, _ = scraper
+
+    first = scrape()
+    assert searcher.detail_fetches == 2
+
+    second = scrape() # same listing: nothing parsed or fetched
+    assert searcher.detail_fetches == 2
+    assert [e["event_id"] for e in second] == [e["event_id"] for e in first]
+
+    searcher.content = listing_html + "<!-- changed -->"
+    scrape() # changed listing, both events already known
+    assert searcher.detail_fetches == 2
+    assert get_data.incremental_stats["example"]["listings_unchanged"] == 1
+    assert get_data.incremental_stats["example"]["detail_fetches_saved"] == 4
+
+
+def test_unchanged_listing_with_expired_details_refetches_them(scraper):
+    scrape, searcher, events = scraper
+    first = scrape()
+    expired_id = first[1]["event_id"]
+    events.expired.add(expired_id)
+
+    second = scrape() # same listing, but one event's details are past EVENT_DETAIL_MAX_AGE
+
+    assert searcher.detail_fetches == 3
+    assert get_data.incremental_stats["example"]["listings_unchanged"] == 0
+    assert [e["event_id"] for e in second] == [e["event_id"] for e in first]
+    assert expired_id not in events.expired
+
+    scrape() # refreshed: the shortcut applies again
+    assert searcher.detail_fetches == 3
+    assert get_data.incremental_stats["example"]["listings_unchanged"] == 1
+
+
+def test_failed_detail_fetches_are_not_stored_and_are_retried(scraper):
+    scrape, searcher, events = scraper
+    failed_id = scrape()[0]["event_id"]
+    events.events.clear()
+    get_data.listing_state_service.states.clear()
+    searcher.failing.add(failed_id)
+
+    first = scrape()
+
+    assert searcher.detail_fetches == 4
+    assert next(e for e in first if e["event_id"] == failed_id)["event_detail"] is None
+
+    searcher.failing.clear()
+    second = scrape() # same listing, but the failed event has no details yet
+
+    assert searcher.detail_fetches == 5
+    assert get_data.incremental_stats["example"]["listings_unchanged"] == 0
+    assert next(e for e in second if e["event_id"] == failed_id)["event_detail"] is not None
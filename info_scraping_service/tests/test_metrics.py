@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.metrics import log_sampled, metric_labels, metrics_app, postcode_label, stage
+
+
+def stage_count(name, site, postcode):
+    return REGISTRY.get_sample_value("scrape_stage_duration_seconds_count", {"stage": name, "site": site, "postcode": postcode}) or 0
+
+
+def failure_count(name, site):
+    return REGISTRY.get_sample_value("scrape_stage_failures_total", {"stage": name, "site": site}) or 0
+
+
+def test_postcode_label_is_the_district():
+    assert [postcode_label(p) for p in ("n7 9qt", "N19QZ", "EC1V 4PW", "N7", "", None)] == ["N7", "N1", "EC1V", "N7", "", ""]
+
+
+def test_stages_use_task_labels_and_count_failures():
+    async def scrape(site):
+        with metric_labels(site, "N7 9QT"):
+            with stage("fetch"):
+                await asyncio.sleep(0)
+            with stage("parse") as span:
+                span.failed = True
+            with pytest.raises(ValueError), stage("detail_fetch"):
+                raise ValueError("boom")
+
+    async def run():
+        await asyncio.gather(scrape("metrics-test-a"), scrape("metrics-test-b"))
+
+    asyncio.run(run())
+    for site in ("metrics-test-a", "metrics-test-b"):
+        assert stage_count("fetch", site, "N7") == 1
+        assert failure_count("fetch", site) == 0
+        assert failure_count("parse", site) == 1
+        assert failure_count("detail_fetch", site) == 1
+        assert stage_count("detail_fetch", site, "N7") == 1
+    with stage("config_lookup", site="", postcode="N1 9QZ"): # explicit labels outside a website task
+        pass
+    assert stage_count("config_lookup", "", "N1") >= 1
+
+
+def test_log_sampled_always_logs_warnings(caplog):
+    with caplog.at_level(logging.INFO):
+        for _ in range(20):
+            log_sampled("dropped", rate=0)
+        log_sampled("kept", rate=1, url="https://example.com")
+        log_sampled("warned", level=logging.WARNING, rate=0)
+    assert [record.getMessage() for record in caplog.records] == [
+        '{"event": "kept", "url": "https://example.com"}',
+        '{"event": "warned"}',
+    ]
+
+
+def test_metrics_endpoint_exports_stage_histogram():
+    app = FastAPI()
+    app.mount("/metrics", metrics_app)
+    with stage("fetch", site="metrics-test-endpoint", postcode="N7 9QT"):
+        pass
+    response = TestClient(app).get("/metrics/")
+    assert response.status_code == 200
+    assert 'scrape_stage_duration_seconds_bucket{le="0.005",postcode="N7",site="metrics-test-endpoint",stage="fetch"}' in response.text
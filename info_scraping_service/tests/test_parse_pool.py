@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.parse_pool import ParsePool, parse_pool
+from app.core.read_html import HTMLReader
+
+
+def run_pool(max_workers, listing_html, listing_config):
+    async def run():
+        pool = ParsePool(max_workers=max_workers)
+        await pool.start()
+        try:
+            listing = await pool.parse_listing(listing_config, listing_html, include_event_details=True)
+            details = await asyncio.gather(*[
+                pool.parse_details(listing_config, [{"event_id": str(i), "content": listing_html}])
+                for i in range(3)
+            ])
+        finally:
+            await pool.close()
+        return listing, details, pool.stats
+
+    return asyncio.run(run())
+
+
+def test_inline_and_process_pool_match_reader(listing_html, listing_config):
+    reader = HTMLReader(page_content_config=listing_config)
+    expected = reader.get_event_metadata(listing_html, include_event_details=True)
+    for max_workers in (0, 2):
+        listing, details, stats = run_pool(max_workers, listing_html, listing_config)
+        assert [{**e, "timestamp": None} for e in listing] == [{**e, "timestamp": None} for e in expected]
+        assert details[2] == [reader.get_event_detail({"event_id": "2", "content": listing_html})]
+        assert stats["batches"] == 4
+        assert stats["pages"] == 4
+
+
+def _crash_once(marker: str, value: str):
+    """Kills the worker the first time it runs (like an OOM kill), returns `value` afterwards."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return value, 0.01
+
+
+def _crash(value: str):
+    os._exit(1) # would take the test process down if it were ever parsed inline
+
+
+def test_broken_pool_is_replaced_once_and_batches_retried(tmp_path):
+    marker = str(tmp_path / "crashed")
+
+    async def run():
+        pool = ParsePool(max_workers=2)
+        await pool.start()
+        broken = pool.executor
+        shutdown = broken.shutdown
+        broken.shutdown = lambda **kwargs: (shutdowns.append(kwargs), shutdown(**kwargs))
+        try:
+            results = await asyncio.gather(*[pool._run(_crash_once, "details", 1, marker, f"batch {i}") for i in range(4)])
+            replaced = pool.executor is not broken
+        finally:
+            await pool.close()
+        return results, pool.stats, replaced
+
+    shutdowns = []
+    results, stats, replaced = asyncio.run(run())
+    assert results == [f"batch {i}" for i in range(4)]
+    assert replaced and len(shutdowns) == 1
+    assert (stats["restarts"], stats["batches"]) == (1, 4)
+
+
+def test_batch_that_breaks_the_fresh_pool_fails_instead_of_running_inline(listing_html, listing_config):
+    async def run():
+        pool = ParsePool(max_workers=1)
+        await pool.start()
+        try:
+            with pytest.raises(BrokenProcessPool):
+                await pool._run(_crash, "listing", 1, "listing")
+            recovered = await pool.parse_listing(listing_config, listing_html, include_event_details=True)
+        finally:
+            await pool.close()
+        return pool.stats, recovered
+
+    stats, recovered = asyncio.run(run())
+    assert (stats["failures"], stats["restarts"], stats["batches"]) == (1, 2, 1)
+    assert recovered # the pool still works after the failed batch
+
+
+def test_queue_depth_and_parse_time_are_exported_as_metrics(monkeypatch, listing_html, listing_config):
+    monkeypatch.setattr(parse_pool, "queue_depth", 3)
+    monkeypatch.setitem(parse_pool.stats, "restarts", 2)
+    before = REGISTRY.get_sample_value("parse_pool_batch_duration_seconds_count", {"kind": "listing"}) or 0
+
+    run_pool(0, listing_html, listing_config)
+
+    assert REGISTRY.get_sample_value("parse_pool_queue_depth") == 3
+    assert REGISTRY.get_sample_value("parse_pool_restarts_total") == 2
+    assert REGISTRY.get_sample_value("parse_pool_batch_duration_seconds_count", {"kind": "listing"}) == before + 1
@@ -0,0 +1,56 @@
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.parser_backends import get_parser_backend
+from app.core.read_html import HTMLReader, compare_parser_backends
+from app.core.read_search_results import SearchResultReader
+
+def page_config(parser=None):
+    config = {
+        "domain": "islingtonlife.london",
+        "container": {"tag": "div", "filter": {"parameter": "class_", "value": "card__item card__item--wide"}},
+        "title": {"tag": "h2", "filter": {"parameter": "class_", "value": "card__item__title"}},
+        "content": {"tag": "p", "filter": {"parameter": "class_", "value": re.compile("teaser")}},
+        "url": {"selector": "a.card__item__container"},
+        "details": {
+            "container": {"tag": "div", "filter": {"parameter": "class", "value": "entry__body__container"}},
+            "sections": {"tag": "p", "filter": {}},
+        },
+    }
+    if parser:
+        config["parser"] = parser
+    return config
+
+
+def test_unknown_backend_falls_back_to_html_parser():
+    assert get_parser_backend("not-a-parser").name == "html.parser"
+
+
+@pytest.mark.parametrize("parser", ["lxml", "selectolax"])
+def test_backend_matches_html_parser(parser, page_html):
+    if get_parser_backend(parser).name != parser:
+        pytest.skip(f"{parser} is not installed")
+    expected = HTMLReader(page_content_config=page_config()).get_event_metadata(page_html, include_event_details=True)
+    actual = HTMLReader(page_content_config=page_config(parser)).get_event_metadata(page_html, include_event_details=True)
+    for event in expected + actual:
+        event.pop("timestamp")
+    assert len(expected) == 2
+    assert actual == expected
+
+    html_parser_text = SearchResultReader([])._get_clean_text(page_html)
+    assert SearchResultReader([], parser=parser)._get_clean_text(page_html) == html_parser_text
+
+
+def test_compare_parser_backends_reports_each_backend(page_html):
+    report = compare_parser_backends(page_html, page_config(), repeat=1)
+    assert set(report) == {"html.parser", "lxml", "selectolax"}
+    assert report["html.parser"]["events"] == 2
+    for result in report.values():
+        if result["available"]:
+            assert result["matches_html_parser"]
+            assert result["parse_ms"] >= 0 and result["extract_ms"] >= 0
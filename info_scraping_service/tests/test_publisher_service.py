@@ -0,0 +1,122 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.dependencies.publisher_service import PublisherService
+
+
+class FakePublisherClient:
+    """Resolves publish futures on another thread, like the real client's batch commit thread."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.messages = []
+
+    def publish(self, topic, data):
+        future = Future()
+
+        if self.fail: # rejected straight away, keeps the failure order deterministic
+            future.set_exception(RuntimeError("unavailable"))
+            return future
+
+        def resolve():
+            self.messages.append((topic, json.loads(data)))
+            future.set_result(str(len(self.messages)))
+
+        threading.Timer(0.01, resolve).start()
+        return future
+
+
+def test_publish_awaits_without_blocking():
+    client = FakePublisherClient()
+    service = PublisherService("events", publisher=client)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        tick_task = asyncio.create_task(ticker())
+        result = await service.publish({"session_id": "s1", "event_ids": ["a"]})
+        tick_task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result["status"] == "success" and result["published_message_id"] == "1"
+    assert ticks > 1 # the loop kept running while the publish was in flight
+    assert client.messages[0][1] == {"pubsub_data": {"session_id": "s1", "event_ids": ["a"]}}
+
+
+def test_publish_sends_only_its_own_message():
+    client = FakePublisherClient(fail=True)
+    service = PublisherService("events", publisher=client, retry_buffer_size=2, retry_interval=0)
+
+    async def run():
+        failed = [await service.publish({"session_id": f"s{i}"}) for i in range(3)]
+        client.fail = False
+        published = await service.publish({"session_id": "s3"})
+        sent_by_publish = [m[1]["pubsub_data"]["session_id"] for m in client.messages]
+        retried = await service.retry_failed()
+        return failed, published, sent_by_publish, retried
+
+    failed, published, sent_by_publish, retried = asyncio.run(run())
+    assert [result["status"] for result in failed] == ["error"] * 3
+    assert published["status"] == "success"
+    assert sent_by_publish == ["s3"] # the buffer is not drained inline
+    assert retried == 2
+    assert sorted(m[1]["pubsub_data"]["session_id"] for m in client.messages) == ["s1", "s2", "s3"] # s0 fell out of the buffer
+    assert service.stats == {"published": 1, "failed": 3, "retried": 2}
+
+
+def test_background_task_drains_the_retry_buffer():
+    client = FakePublisherClient(fail=True)
+    service = PublisherService("events", publisher=client, retry_interval=0.01)
+
+    async def run():
+        await service.start()
+        await service.publish({"session_id": "s0"})
+        client.fail = False
+        for _ in range(100):
+            if not service.retry_buffer and client.messages:
+                break
+            await asyncio.sleep(0.01)
+        drained = [m[1]["pubsub_data"]["session_id"] for m in client.messages]
+        await service.close()
+        return drained
+
+    assert asyncio.run(run()) == ["s0"]
+    assert service.stats["retried"] == 1
+    assert service._retry_task is None
+
+
+def test_publish_nowait_reports_failures_and_buffers_them():
+    client = FakePublisherClient()
+    service = PublisherService("events", publisher=client, retry_interval=0)
+    errors = []
+    done = threading.Event()
+
+    service.publish_nowait({"session_id": "s0"}, on_error=lambda data, error: errors.append(data))
+    client.fail = True
+    service.publish_nowait({"session_id": "s1"}, on_error=lambda data, error: errors.append(data))
+    service.publisher = None # not started: rejected before anything is submitted
+    service.publish_nowait({"session_id": "s2"}, on_error=lambda data, error: (errors.append(data), done.set()))
+
+    assert done.wait(1)
+    for _ in range(100):
+        if service.stats["published"]:
+            break
+        time.sleep(0.01)
+    assert [m[1]["pubsub_data"]["session_id"] for m in client.messages] == ["s0"]
+    assert errors == [{"session_id": "s1"}, {"session_id": "s2"}]
+    assert list(service.retry_buffer) == errors
+    assert service.stats == {"published": 1, "failed": 2, "retried": 0}
@@ -6,7 +6,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from app.core.read_html import HTMLReader
+from app.core.read_html import HTMLReader, compare_parser_backends
 
 @pytest.fixture
 def sample_wcwg_html():
@@ -358,3 +358,21 @@ def test_get_event_detail(event_dict, detail_config, request):
     assert isinstance(event_details["sections"], list)
     assert len(event_details["sections"])>0
 
+
+@pytest.mark.parametrize("sample_html, metadata_config", [
+    ("sample_wcwg_html", "metadata_config_wherecanwego"),
+    ("sample_centre404_html", "metadata_config_centre404" ), 
+    ("sample_islingtonlife_html", "metadata_config_islington_life"), 
+    ("sample_eventbrite_garden_classroom_html", "metadata_config_eventbrite"),
+    ("sample_eventbrite_praxis_html", "metadata_config_eventbrite")
+])
+def test_parser_backends_identical_output(sample_html, metadata_config, request):
+    """Every available parser backend must extract the same events as html.parser."""
+    sample_html_data = request.getfixturevalue(sample_html)
+    metadata_config_data = request.getfixturevalue(metadata_config)
+    report = compare_parser_backends(sample_html_data, metadata_config_data, repeat=1)
+
+    assert report["html.parser"]["events"] > 0
+    for backend, result in report.items():
+        if result["available"]:
+            assert result["matches_html_parser"], f"{backend} output differs from html.parser"
@@ -0,0 +1,91 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core import read_search_results
+from app.core.http_client import HTTPClient
+from app.core.read_search_results import SearchResultReader
+from app.core.text_extractor import extract_text, get_text_extractor
+
+BOILERPLATE_HTML = """
+<html><body>
+<header><h1>What's on</h1></header>
+<nav><ul><li><p>Home</p></li></ul></nav>
+<div id="cookie-banner"><div><p>We use cookies</p></div><button>Accept</button></div>
+<main><h2>Allotment open day</h2><p>Seed swap, tea &amp; cake.</p><div role="navigation"><p>Next</p></div></main>
+<footer><p>&copy; Council</p></footer>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_incremental_text_matches_clean_text(backend, page_html):
+    expected = SearchResultReader([])._get_clean_text(page_html)
+    for chunk_size in (1, 7, 64, len(page_html)):
+        extractor = get_text_extractor(backend, strip_boilerplate=False)
+        for i in range(0, len(page_html), chunk_size):
+            extractor.feed(page_html[i:i + chunk_size])
+        extractor.close()
+        assert extractor.text == expected
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_strips_boilerplate_and_truncates(backend):
+    assert extract_text(BOILERPLATE_HTML, backend) == "What's on Allotment open day Seed swap, tea & cake."
+
+    extractor = get_text_extractor(backend, max_chars=20)
+    assert extractor.feed(BOILERPLATE_HTML) # asks the caller to stop reading
+    extractor.close()
+    assert extractor.text == "What's on Allotment"
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_boilerplate_void_elements_dont_skip_the_rest(backend):
+    html = '<p>Intro</p><input id="cookie-toggle"><img class="gdpr-badge" src="x.png"><p>Main</p>'
+    assert extract_text(html, backend) == "Intro Main"
+
+
+def test_scrape_results_streams_caps_and_skips_non_html(monkeypatch, page_html):
+    long_page = "<html><body>" + "".join(f"<p>Paragraph {i}</p>" for i in range(1000)) + "</body></html>"
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if request.url.path == "/leaflet.pdf":
+            return httpx.Response(200, content=b"%PDF-1.7", headers={"content-type": "application/pdf"})
+        if request.url.path == "/long":
+            return httpx.Response(200, content=long_page.encode(), headers={"content-type": "text/html; charset=utf-8"})
+        return httpx.Response(200, content=page_html.encode(), headers={"content-type": "text/html"})
+
+    async def run():
+        client = HTTPClient()
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(read_search_results, "http_client", client)
+        results = [{"url": f"https://example.com/page/{i}", "title": f"Page {i}", "content": "snippet"} for i in range(6)]
+        results += [
+            {"url": "https://example.com/leaflet.pdf", "title": "Leaflet", "content": "pdf snippet"},
+            {"url": "https://example.com/long", "title": "Long", "content": "long snippet"},
+        ]
+        reader = SearchResultReader(results, max_concurrency=2, max_bytes=200)
+        scraped = await reader.scrape_results()
+        await client.close()
+        return scraped
+
+    scraped = asyncio.run(run())
+    assert max_in_flight <= 2
+    assert scraped[0]["content"].startswith("Family Fun Day") # <nav> stripped
+    assert scraped[6]["content"] == "pdf snippet"
+    assert "Unsupported content type: application/pdf" in scraped[6]["error"]
+    long_text = scraped[7]["content"]
+    assert long_text.startswith("Paragraph 0 Paragraph 1") and "Paragraph 999" not in long_text
+    assert "error" not in scraped[7]
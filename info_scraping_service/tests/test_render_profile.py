@@ -0,0 +1,179 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core import search
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.search import DynamicSearch
+from app.models.render_profile import RenderProfile
+
+URL = "https://www.eventbrite.co.uk/o/praxis-17432513338"
+LOCATOR = {"selector": "section.event-card"}
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    @property
+    def first(self):
+        return self
+
+    async def wait_for(self, state, timeout):
+        self.page.calls.append(("wait_for", self.selector, state, timeout))
+
+
+class FakePage:
+    def __init__(self, fail_goto=False):
+        self.calls = []
+        self.fail_goto = fail_goto
+
+    async def route(self, pattern, handler):
+        self.calls.append(("route", pattern, handler))
+
+    async def goto(self, url, wait_until, timeout):
+        self.calls.append(("goto", url, wait_until, timeout))
+        if self.fail_goto:
+            raise TimeoutError("Timeout 2000ms exceeded")
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    async def content(self):
+        return "<html><section class='event-card'></section></html>"
+
+
+class FakeBrowserPool:
+    def __init__(self, page):
+        self._page = page
+
+    @asynccontextmanager
+    async def page(self, **kwargs):
+        yield self._page
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = SimpleNamespace(resource_type=resource_type, url=url)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=5, min_samples=20)
+    monkeypatch.setattr(search, "circuit_breaker", breaker)
+    return breaker
+
+
+def render(monkeypatch, profile, page=None):
+    page = page or FakePage()
+    monkeypatch.setattr(search, "browser_pool", FakeBrowserPool(page))
+    response = asyncio.run(DynamicSearch("praxis-17432513338", render_profile=profile)._render(URL, LOCATOR))
+    return response, page
+
+
+def test_no_profile_keeps_the_previous_render_behaviour(monkeypatch, breaker):
+    assert RenderProfile().model_dump() == {
+        "block_resource_types": [],
+        "block_url_patterns": [],
+        "wait_until": "networkidle",
+        "navigation_timeout": 60000,
+        "selector_timeout": 60000,
+    }
+
+    response, page = render(monkeypatch, None)
+
+    assert response == {"content": "<html><section class='event-card'></section></html>"}
+    assert page.calls == [
+        ("goto", URL, "networkidle", 60000),
+        ("wait_for", "section.event-card", "attached", 60000),
+    ] # no request interception without blocking rules
+
+
+def test_profile_sets_wait_strategy_and_timeouts(monkeypatch, breaker):
+    profile = {"wait_until": "domcontentloaded", "navigation_timeout": 15000, "selector_timeout": 5000}
+
+    _, page = render(monkeypatch, profile)
+
+    assert page.calls == [
+        ("goto", URL, "domcontentloaded", 15000),
+        ("wait_for", "section.event-card", "attached", 5000),
+    ]
+
+
+def test_adaptive_render_budget_caps_profile_timeouts(monkeypatch, breaker):
+    for _ in range(20):
+        breaker.record_success(URL, 0.5, kind="render")
+
+    _, page = render(monkeypatch, {"navigation_timeout": 15000, "selector_timeout": 5000})
+
+    # 3 x the p95 render time (1.5s), raised to the 2s adaptive minimum
+    assert [call[-1] for call in page.calls] == [2000, 2000]
+
+
+def test_render_timeout_is_reported_as_a_failure(monkeypatch, breaker):
+    response, _ = render(monkeypatch, {"navigation_timeout": 2000}, page=FakePage(fail_goto=True))
+
+    assert response["error"] == "An unexpected error occurred: Timeout 2000ms exceeded"
+    assert breaker.status()["www.eventbrite.co.uk"]["failures"] == 1
+
+
+def test_blocking_rules_intercept_requests(monkeypatch, breaker):
+    profile = {"block_resource_types": ["image", "font"], "block_url_patterns": [r"google-analytics\.com", r"/pixel\?"]}
+    searcher = DynamicSearch("praxis-17432513338", render_profile=profile)
+
+    _, page = render(monkeypatch, profile)
+    assert page.calls[0][:2] == ("route", "**/*")
+
+    async def outcomes():
+        requests = [
+            ("image", "https://img.evbuc.com/banner.jpg"),
+            ("font", "https://fonts.gstatic.com/s/inter.woff2"),
+            ("script", "https://www.google-analytics.com/analytics.js"),
+            ("xhr", "https://www.facebook.com/tr/pixel?id=1"),
+            ("document", URL),
+            ("script", "https://www.eventbrite.co.uk/static/app.js"),
+            ("stylesheet", "https://www.eventbrite.co.uk/static/app.css"),
+        ]
+        routes = [FakeRoute(*request) for request in requests]
+        for route in routes:
+            await searcher._block_requests(route)
+        return [route.outcome for route in routes]
+
+    assert asyncio.run(outcomes()) == ["aborted"] * 4 + ["continued"] * 3
+
+
+def test_cancelled_render_releases_the_half_open_probe(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    monkeypatch.setattr(search, "circuit_breaker", breaker)
+
+    class HangingPage(FakePage):
+        async def goto(self, url, wait_until, timeout):
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(search, "browser_pool", FakeBrowserPool(HangingPage()))
+
+    async def run():
+        breaker.record_failure(URL)
+        await asyncio.sleep(0.02)
+        render = asyncio.create_task(DynamicSearch("praxis-17432513338")._render(URL, LOCATOR))
+        await asyncio.sleep(0.01)
+        assert breaker.is_open(URL) # the probe is in flight
+        render.cancel()
+        await asyncio.gather(render, return_exceptions=True)
+
+    asyncio.run(run())
+    assert not breaker.is_open(URL)
@@ -0,0 +1,91 @@
+import asyncio
+import random
+import string
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.response_cache import ResponseCache, export_metrics
+from app.core.http_client import HTTPClient
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_put_and_lookup(cache):
+    cache.put("https://a.com/", "<html>hello</html>", etag='"v1"')
+    entry, fresh = cache.lookup("https://a.com/", ttl=60)
+    assert fresh
+    assert entry.content == "<html>hello</html>"
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+
+    _, fresh = cache.lookup("https://a.com/", ttl=0)
+    assert not fresh
+    assert cache.lookup("https://b.com/", ttl=60) == (None, False)
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+
+def test_stats_are_exported_as_metrics(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"), table="metrics_test")
+    export_metrics(cache)
+    cache.put("https://a.com/", "<html>hello</html>")
+    cache.lookup("https://a.com/", ttl=60)
+    cache.lookup("https://b.com/", ttl=60)
+    cache.touch("https://a.com/")
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, {"cache": "metrics_test", **labels})
+
+    assert [sample("http_cache_operations_total", operation=op) for op in ("hits", "misses", "revalidated", "stores")] == [1, 1, 1, 1]
+    assert sample("http_cache_size_bytes") == cache.info()["size_bytes"] > 0
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"), max_bytes=2000)
+    # random bodies so compression can't shrink them below the limit
+    bodies = {url: "".join(random.Random(url).choices(string.printable, k=1000)) for url in "abc"}
+    cache.put("a", bodies["a"])
+    cache.put("b", bodies["b"])
+    cache.get("a")
+    cache.put("c", bodies["c"])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats["evictions"] == 1
+    cache.close()
+
+
+def test_http_client_serves_and_revalidates_from_cache(cache):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<html>listing</html>", headers={"etag": '"v1"'})
+
+    async def run():
+        client = HTTPClient(cache=cache)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        first = await client.fetch("https://a.com/", ttl=60)
+        second = await client.fetch("https://a.com/", ttl=60)
+        revalidated = await client.fetch("https://a.com/", ttl=0)
+        await client.client.aclose()
+        return first, second, revalidated
+
+    first, second, revalidated = asyncio.run(run())
+    assert first["content"] == second["content"] == revalidated["content"] == "<html>listing</html>"
+    assert second["from_cache"] and revalidated["from_cache"]
+    assert len(requests_seen) == 2
+    assert cache.stats["revalidated"] == 1
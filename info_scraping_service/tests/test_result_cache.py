@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.result_cache import ScrapeResultCache
+
+
+class FakeResultStore:
+    def __init__(self):
+        self.documents = {}
+
+    async def get_result(self, key):
+        return self.documents.get(key)
+
+    async def put_result(self, key, document):
+        self.documents[key] = {**document, "_id": key}
+
+    async def delete_results(self, query):
+        keys = [k for k, d in self.documents.items() if all(d[f] == v for f, v in query.items())]
+        for key in keys:
+            del self.documents[key]
+        return len(keys)
+
+
+def test_memory_and_store_tiers():
+    cache = ScrapeResultCache(max_entries=1, store=FakeResultStore())
+    events = [{"event_id": "a", "title": "Coffee Morning"}]
+
+    async def run():
+        await cache.put("wherecanwego", "N19QZ", {"miles": 2}, events, ttl=60)
+        await cache.put("centre404", "N19QZ", {"miles": 2}, events, ttl=60) # evicts wherecanwego from memory
+        from_store = await cache.get("wherecanwego", "N19QZ", {"miles": 2}, ttl=60)
+        from_memory = await cache.get("wherecanwego", "N19QZ", {"miles": 2}, ttl=60)
+        other_radius = await cache.get("wherecanwego", "N19QZ", {"miles": 5}, ttl=60)
+        expired = await cache.get("centre404", "N19QZ", {"miles": 2}, ttl=0.000001)
+        return from_store, from_memory, other_radius, expired
+
+    from_store, from_memory, other_radius, expired = asyncio.run(run())
+    assert from_store == from_memory == events
+    assert other_radius is None and expired is None
+    rates = cache.hit_rates()
+    assert rates["wherecanwego"]["mongo_hits"] == 1
+    assert rates["wherecanwego"]["memory_hits"] == 1
+    assert rates["wherecanwego"]["hit_rate"] == 2 / 3
+    assert rates["centre404"]["misses"] == 1
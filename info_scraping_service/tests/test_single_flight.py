@@ -0,0 +1,60 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["event"]
+
+    async def run():
+        return await asyncio.gather(*[flight.do("N19QZ", scrape) for _ in range(5)])
+
+    assert asyncio.run(run()) == [["event"]] * 5
+    assert len(calls) == 1
+    assert flight.stats == {"executions": 1, "shared": 4, "errors": 0}
+    assert flight.in_flight == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def scrape():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flight.do("key", scrape))
+        second = asyncio.create_task(flight.do("key", scrape))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(run()) == ("done", True)
+
+
+def test_errors_fan_out_and_are_not_cached():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("render failed")
+
+    async def run():
+        results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+        retry = await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retry
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retry == "ok"
+    assert flight.stats["errors"] == 1
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.response_cache import ResponseCache
+from app.core.snapshot_cache import SnapshotCache, snapshot_cache
+
+URL = "https://www.eventbrite.co.uk/d/united-kingdom--london/events/"
+SELECTOR = "section.event-card"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SnapshotCache(store=ResponseCache(path=str(tmp_path / "snapshots.sqlite3"), table="snapshots"))
+    yield cache
+    cache.store.close()
+
+
+class Renderer:
+    def __init__(self, content="<html>rendered</html>", delay=0.0):
+        self.content = content
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"content": self.content}
+
+
+def store_snapshot(cache, content, age):
+    cache.store.put(cache.key(URL, SELECTOR), content, fetched_at=time.time() - age)
+
+
+def test_fresh_snapshot_is_served_without_rendering(cache):
+    store_snapshot(cache, "<html>cached</html>", age=10)
+    render = Renderer()
+
+    response = asyncio.run(cache.get_or_render(URL, SELECTOR, render, ttl=60, max_stale=600))
+
+    assert response == {"content": "<html>cached</html>", "from_cache": True}
+    assert render.calls == 0
+    assert cache.stats["hits"] == 1 and cache.stale_ratio == 0
+
+
+def test_stale_snapshot_is_served_while_one_background_refresh_runs(cache):
+    store_snapshot(cache, "<html>stale</html>", age=120)
+    render = Renderer("<html>refreshed</html>", delay=0.05)
+
+    async def run():
+        responses = await asyncio.gather(*(cache.get_or_render(URL, SELECTOR, render, ttl=60, max_stale=600) for _ in range(5)))
+        assert render.calls == 1 # one refresh for all the concurrent stale lookups
+        await asyncio.gather(*cache._refreshing.values())
+        fresh = await cache.get_or_render(URL, SELECTOR, render, ttl=60, max_stale=600)
+        return responses, fresh
+
+    responses, fresh = asyncio.run(run())
+
+    assert all(response == {"content": "<html>stale</html>", "from_cache": True, "stale": True} for response in responses)
+    assert fresh == {"content": "<html>refreshed</html>", "from_cache": True}
+    assert render.calls == 1
+    assert cache.stats == {"hits": 1, "stale_served": 5, "misses": 0, "refreshes": 1, "refresh_failures": 0}
+    assert cache.stale_ratio == 5 / 6
+
+
+def test_too_stale_or_missing_snapshot_is_rendered_inline(cache):
+    render = Renderer()
+
+    missing = asyncio.run(cache.get_or_render(URL, SELECTOR, render, ttl=60, max_stale=600))
+    store_snapshot(cache, "<html>ancient</html>", age=1000)
+    too_stale = asyncio.run(cache.get_or_render(URL, SELECTOR, render, ttl=60, max_stale=600))
+
+    assert missing == too_stale == {"content": "<html>rendered</html>"}
+    assert render.calls == 2
+    assert cache.stats["misses"] == 2 and cache.stats["stale_served"] == 0
+    assert cache.store.get(cache.key(URL, SELECTOR)).content == "<html>rendered</html>"
+
+
+def test_failed_render_is_not_stored(cache):
+    async def render():
+        return {"error": "Circuit open for www.eventbrite.co.uk", "status_code": None}
+
+    assert asyncio.run(cache.get_or_render(URL, SELECTOR, render))["error"]
+    assert cache.store.get(cache.key(URL, SELECTOR)) is None
+
+
+def test_stats_and_stale_ratio_are_exported_as_metrics(monkeypatch):
+    monkeypatch.setattr(snapshot_cache, "stats", {"hits": 3, "stale_served": 1, "misses": 0, "refreshes": 1, "refresh_failures": 0})
+
+    assert REGISTRY.get_sample_value("snapshot_cache_lookups_total", {"outcome": "stale_served"}) == 1
+    assert REGISTRY.get_sample_value("snapshot_cache_refreshes_total", {"outcome": "ok"}) == 1
+    assert REGISTRY.get_sample_value("snapshot_cache_stale_ratio") == 0.25
@@ -0,0 +1,91 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core import run_scraping_pipeline
+from app.routes import events as events_route
+from app.schemas.scrape_request import ScrapeRequestModel
+from app.utils.utils import generate_event_id
+
+
+def event_dict(title, domain, postcode):
+    data = {
+        "title": title,
+        "url": f"https://{domain}/events/{title.lower().replace(' ', '-')}",
+        "content": f"{title}, Saturday 2nd November",
+        "domain": domain,
+        "timestamp": "2024-11-02T10:00:00+00:00Z",
+        "postcode": postcode,
+    }
+    data["event_id"] = generate_event_id(data)
+    return data
+
+
+@pytest.fixture
+def sites(monkeypatch):
+    """Three configured websites: a slow one, a fast one and one whose scrape raises."""
+    delays = {"wherecanwego": 0.05, "islingtonlife": 0.0, "trinityislington": 0.01}
+
+    async def get_config(postcode):
+        return [{"request_config": {"website": website}} for website in delays]
+
+    async def get_scraped_dset(config):
+        request_config = config["request_config"]
+        website = request_config["website"]
+        await asyncio.sleep(delays[website])
+        if website == "trinityislington":
+            raise RuntimeError("listing page changed")
+        return [event_dict(f"{website} craft morning", f"{website}.com", request_config["postcode"])]
+
+    monkeypatch.setattr(run_scraping_pipeline.event_search_config_service, "get_config", get_config)
+    monkeypatch.setattr(run_scraping_pipeline, "get_scraped_dset", get_scraped_dset)
+    monkeypatch.setattr(run_scraping_pipeline, "DEDUP_ENABLED", False)
+    return delays
+
+
+def test_stream_yields_each_website_as_it_finishes_and_skips_failures(sites):
+    async def run():
+        return [batch async for batch in run_scraping_pipeline.stream_scraping_pipeline({"postcode": "N7 0AA", "params": {}})]
+
+    batches = asyncio.run(run())
+
+    assert [batch["website"] for batch in batches] == ["islingtonlife", "wherecanwego"] # completion order, failed site left out
+    assert [[event.domain for event in batch["events"]] for batch in batches] == [["islingtonlife.com"], ["wherecanwego.com"]]
+    assert all(batch["errors"] == [] for batch in batches)
+
+
+def test_route_persists_and_publishes_each_batch_before_the_next(sites, monkeypatch):
+    timeline = []
+
+    class FakeEventDataService:
+        async def upsert_events(self, event_dicts, session_id):
+            timeline.append(("upsert", event_dicts[0]["domain"]))
+            return {"status": "success", "message": f"Stored {len(event_dicts)} event(s)", "event_ids": [e["event_id"] for e in event_dicts]}
+
+    class FakePublisher:
+        async def publish(self, pubsub_data):
+            timeline.append(("publish", pubsub_data["website"]))
+            return {"status": "success", "message": "Published session info to PubSub"}
+
+    stream = run_scraping_pipeline.stream_scraping_pipeline
+
+    async def recording_stream(query):
+        async for batch in stream(query):
+            timeline.append(("scraped", batch["website"]))
+            yield batch
+
+    monkeypatch.setattr(events_route, "stream_scraping_pipeline", recording_stream)
+    request = ScrapeRequestModel(**{"session_id": "session-1", "query": {"postcode": "N7 0AB", "params": {}, "page": 1}})
+
+    response = asyncio.run(events_route.scrape_events(request, FakePublisher(), FakeEventDataService()))
+
+    assert timeline == [
+        ("scraped", "islingtonlife"), ("upsert", "islingtonlife.com"), ("publish", "islingtonlife"),
+        ("scraped", "wherecanwego"), ("upsert", "wherecanwego.com"), ("publish", "wherecanwego"),
+    ]
+    assert response["service_messages"]["pubsub"].startswith("2 batch(es)")
+    assert response["skipped_websites"] == [] and response["invalid_events"] == 0
@@ -0,0 +1,197 @@
+import asyncio
+import copy
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db.database_service import EventDataService
+
+
+class FakeEventsCollection:
+    """Applies the `$setOnInsert`/`$set`/`$addToSet` upserts `upsert_events` sends, like an unordered bulk write."""
+
+    def __init__(self, rejected_ids=()):
+        self.documents = {}
+        self.rejected_ids = set(rejected_ids) # e.g. documents over the BSON size limit
+
+    def _apply(self, operation) -> str:
+        event_id = operation._filter["_id"]
+        update = operation._doc
+        inserted = event_id not in self.documents
+        document = self.documents.setdefault(event_id, {"_id": event_id})
+        if inserted:
+            document.update(copy.deepcopy(update.get("$setOnInsert", {})))
+        document.update(update.get("$set", {}))
+        for field, value in update.get("$addToSet", {}).items():
+            values = document.setdefault(field, [])
+            for item in value["$each"] if isinstance(value, dict) and "$each" in value else [value]:
+                if item not in values:
+                    values.append(item)
+        return "upserted" if inserted else "matched"
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        counts = {"upserted": 0, "matched": 0}
+        errors = []
+        for index, operation in enumerate(operations):
+            if operation._filter["_id"] in self.rejected_ids:
+                errors.append({"index": index, "code": 10334, "errmsg": "BSONObj size is invalid"})
+                continue
+            counts[self._apply(operation)] += 1
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nUpserted": counts["upserted"], "nMatched": counts["matched"]})
+        return SimpleNamespace(upserted_count=counts["upserted"], matched_count=counts["matched"])
+
+
+def event_document(event_id, content="Family fun day, Saturday 2nd November", **fields):
+    return {
+        "_id": event_id,
+        "event_id": event_id,
+        "title": "Family Fun Day",
+        "url": f"https://wherecanwego.com/events/{event_id}",
+        "content": content,
+        "domain": "wherecanwego.com",
+        "timestamp": "2024-11-02T10:00:00+00:00Z",
+        "postcode": "N7 9QT",
+        "alternative_sources": [],
+        **fields,
+    }
+
+
+def upsert(collection, event_dicts, session_id):
+    service = EventDataService()
+    service.collection = collection
+    return asyncio.run(service.upsert_events(event_dicts, session_id))
+
+
+def test_new_events_are_inserted_pending_with_their_session():
+    collection = FakeEventsCollection()
+
+    result = upsert(collection, [event_document("a"), event_document("b")], "session-1")
+
+    assert (result["status"], result["inserted"], result["matched"], result["failed"]) == ("success", 2, 0, 0)
+    assert result["event_ids"] == ["a", "b"]
+    stored = collection.documents["a"]
+    assert (stored["status"], stored["session_id"], stored["session_ids"]) == ("pending", "session-1", ["session-1"])
+    assert stored["scraped_at"] == stored["last_seen"]
+
+
+def test_existing_events_keep_content_and_enrichment():
+    collection = FakeEventsCollection()
+    upsert(collection, [event_document("a")], "session-1")
+    collection.documents["a"].update(status="completed", llm_output={"category": "family"})
+    first_seen = collection.documents["a"]["scraped_at"]
+
+    result = upsert(collection, [event_document("a", content="Edited listing text")], "session-2")
+
+    stored = collection.documents["a"]
+    assert (result["inserted"], result["matched"]) == (0, 1)
+    assert stored["content"] == "Family fun day, Saturday 2nd November"
+    assert (stored["status"], stored["llm_output"], stored["session_id"]) == ("completed", {"category": "family"}, "session-1")
+    assert stored["session_ids"] == ["session-1", "session-2"]
+    assert stored["scraped_at"] == first_seen and stored["last_seen"] > first_seen
+
+
+def test_rescraping_for_the_same_session_adds_it_once():
+    collection = FakeEventsCollection()
+    upsert(collection, [event_document("a")], "session-1")
+    upsert(collection, [event_document("a")], "session-1")
+
+    assert collection.documents["a"]["session_ids"] == ["session-1"]
+
+
+def test_alternative_sources_are_added_to_the_stored_ones():
+    collection = FakeEventsCollection()
+    islington = {"event_id": "x", "url": "https://islingtonlife.london/x", "domain": "islingtonlife.london", "title": "Family Fun Day"}
+    trinity = {"event_id": "y", "url": "https://trinityislington.org/y", "domain": "trinityislington.org", "title": "Family fun day"}
+    upsert(collection, [event_document("a", alternative_sources=[islington])], "session-1")
+    upsert(collection, [event_document("a", alternative_sources=[islington, trinity])], "session-2")
+
+    assert collection.documents["a"]["alternative_sources"] == [islington, trinity]
+
+
+def test_partial_failure_counts_and_only_stored_ids_returned():
+    collection = FakeEventsCollection(rejected_ids={"b"})
+    upsert(collection, [event_document("c")], "session-0")
+
+    result = upsert(collection, [event_document("a"), event_document("b"), event_document("c")], "session-1")
+
+    assert (result["status"], result["inserted"], result["matched"], result["failed"]) == ("partial", 1, 1, 1)
+    assert result["event_ids"] == ["a", "c"]
+    assert "b" not in collection.documents
+
+
+def test_connection_errors_fail_the_whole_batch():
+    class BrokenCollection:
+        async def bulk_write(self, operations, ordered=True):
+            raise ConnectionError("connection refused")
+
+    result = upsert(BrokenCollection(), [event_document("a")], "session-1")
+
+    assert (result["status"], result["event_ids"], result["failed"]) == ("error", [], 1)
+
+
+def test_scrape_route_publishes_only_stored_event_ids(monkeypatch):
+    from app.models.event import Event
+    from app.routes import events as events_route
+    from app.schemas.scrape_request import ScrapeRequestModel
+
+    collection = FakeEventsCollection(rejected_ids={"b"})
+    service = EventDataService()
+    service.collection = collection
+    published = []
+
+    class FakePublisher:
+        async def publish(self, pubsub_data):
+            published.append(pubsub_data)
+            return {"status": "success", "message": "Published session info to PubSub"}
+
+    async def stream(query):
+        events = [Event(**{k: v for k, v in event_document(event_id).items() if k != "_id"}) for event_id in "abc"]
+        yield {"website": "wherecanwego", "events": events, "errors": []}
+
+    monkeypatch.setattr(events_route, "stream_scraping_pipeline", stream)
+    request = ScrapeRequestModel(**{"session_id": "session-1", "query": {"postcode": "N7 9QT", "params": {}, "page": 1}})
+
+    response = asyncio.run(events_route.scrape_events(request, FakePublisher(), service))
+
+    assert [message["event_ids"] for message in published] == [["a", "c"]]
+    assert response["service_messages"]["mongodb"] == "Imported 2 new and 0 existing events, 1 failed"
+
+
+def test_duplicates_and_other_websites_events_are_stored_but_not_published(monkeypatch):
+    from app.models.event import Event
+    from app.routes import events as events_route
+    from app.schemas.scrape_request import ScrapeRequestModel
+
+    collection = FakeEventsCollection()
+    service = EventDataService()
+    service.collection = collection
+    published = []
+
+    class FakePublisher:
+        async def publish(self, pubsub_data):
+            published.append(pubsub_data)
+            return {"status": "success", "message": "Published session info to PubSub"}
+
+    async def stream(query):
+        canonical = Event(**{k: v for k, v in event_document("a").items() if k != "_id"})
+        yield {"website": "wherecanwego", "events": [canonical], "errors": []}
+        islington = {"event_id": "b", "url": "https://islingtonlife.london/b", "domain": "islingtonlife.london", "title": "Family Fun Day"}
+        merged = canonical.model_copy(update={"alternative_sources": [islington]}) # collapse puts site A's event back into site B's batch
+        duplicate = Event(**{k: v for k, v in event_document("b", domain="islingtonlife.london").items() if k != "_id"}, canonical_event_id="a")
+        other = Event(**{k: v for k, v in event_document("c", content="Pottery class", domain="islingtonlife.london").items() if k != "_id"})
+        yield {"website": "islingtonlife", "events": [merged, duplicate, other], "errors": []}
+
+    monkeypatch.setattr(events_route, "stream_scraping_pipeline", stream)
+    request = ScrapeRequestModel(**{"session_id": "session-1", "query": {"postcode": "N7 9QT", "params": {}, "page": 1}})
+
+    asyncio.run(events_route.scrape_events(request, FakePublisher(), service))
+
+    assert [(message["website"], message["event_ids"]) for message in published] == [("wherecanwego", ["a"]), ("islingtonlife", ["c"])]
+    assert (collection.documents["a"]["canonical_event_id"], collection.documents["b"]["canonical_event_id"]) == (None, "a")
+    assert [source["event_id"] for source in collection.documents["a"]["alternative_sources"]] == ["b"]
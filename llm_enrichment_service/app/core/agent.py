@@ -10,6 +10,7 @@ import vertexai
 from datetime import datetime
 from abc import ABC, abstractmethod
 from app.core.agent_config import AgentConfig
+from app.core.metrics import log_sampled
 from typing import List, Any, Union
 import time
 import logging
@@ -295,6 +296,6 @@ class EventResearchAgent(AgentWithTools):
             contents=contents,
             tools=None,
         )
-        print(res)
+        log_sampled("llm_response", response=str(res)[:2000])
         output = self._get_function_output(res)
         return output
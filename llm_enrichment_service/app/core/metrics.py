@@ -0,0 +1,16 @@
+from prometheus_client import Counter, Histogram, make_asgi_app
+from concierge_shared.metrics import StageTimer, log_sampled
+
+STAGE_SECONDS=Histogram(
+    "enrichment_stage_duration_seconds",
+    "Time spent in each stage of event enrichment",
+    ["stage", "site", "postcode"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80),
+)
+STAGE_FAILURES=Counter("enrichment_stage_failures_total", "Enrichment stages that raised or returned an error", ["stage", "site"])
+PUBSUB_MESSAGES=Counter("enrichment_pubsub_messages_total", "Pub/Sub push messages received")
+EVENTS_PROCESSED=Counter("enrichment_events_total", "Events handled by outcome", ["site", "outcome"])
+
+metrics_app=make_asgi_app()
+
+stage=StageTimer(STAGE_SECONDS, STAGE_FAILURES)
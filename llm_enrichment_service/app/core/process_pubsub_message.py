@@ -2,28 +2,50 @@ from app.core.agent import EventInfoExtractionAgent
 from app.db.database_service import EventDataService
 from app.schemas.pubsub_message import PubSubMessage
 from app.schemas.llm_output import LLM_Output
+from app.core.metrics import EVENTS_PROCESSED, PUBSUB_MESSAGES, log_sampled, stage
 import logging
 import json
 import base64
 
 logging.basicConfig(level=logging.INFO) 
 
-async def process_events(event_data_service: EventDataService, agent: EventInfoExtractionAgent, session_id:str, page:int=1):
-    events=await event_data_service.get_paginated_events(session_id, page)
-    for event in events:
-            event_str=f"""
+# storage bookkeeping the scraping service keeps on each event, not information about the event
+PROMPT_EXCLUDED_FIELDS=frozenset(["session_id", "session_ids", "status", "last_seen", "scraped_at", "alternative_sources", "canonical_event_id"])
+
+def event_prompt_entry(event:dict)->str:
+    """The stored event as a prompt entry for the LLM, without the bookkeeping fields."""
+    event_data={key:value for key, value in event.items() if key not in PROMPT_EXCLUDED_FIELDS}
+    return f"""
             BEGIN ENTRY
             -----------
-            {json.dumps(event)}
+            {json.dumps(event_data, default=str)}
             -----------
             END ENTRY
             """
-            llm_output=agent.run_task(contents=event_str)
-            logging.info(f"LLM output: {llm_output}")
+
+async def process_events(event_data_service: EventDataService, agent: EventInfoExtractionAgent, session_id:str, page:int=1, event_ids:list[str]|None=None, website:str|None=None):
+    with stage("event_lookup", website):
+        if event_ids is not None: # one website's batch from the streaming scrape pipeline, only its events on the requested page are enriched
+            events=await event_data_service.get_page_events_by_ids(session_id, page, event_ids)
+        else:
+            events=await event_data_service.get_paginated_events(session_id, page)
+    for event in events:
+            site=website or event.get("domain")
+            if event.get("status")=="completed": # already enriched for an earlier session
+                EVENTS_PROCESSED.labels(site, "skipped").inc()
+                continue
+            event_str=event_prompt_entry(event)
+            with stage("llm_call", site, event.get("postcode")) as span:
+                llm_output=agent.run_task(contents=event_str)
+                span.failed=not llm_output
+            log_sampled("llm_output", session_id=session_id, event_id=event['event_id'], llm_output=llm_output)
             llm_output = LLM_Output(**(llm_output or {}))  
-            await event_data_service.update_event_with_llm_output( session_id, event['event_id'],llm_output)
+            with stage("mongo_update", site, event.get("postcode")):
+                await event_data_service.update_event_with_llm_output( session_id, event['event_id'],llm_output)
+            EVENTS_PROCESSED.labels(site, "enriched" if not span.failed else "empty_output").inc()
 
 async def process_pubsub_message(pubsub_message: PubSubMessage, event_data_service: EventDataService, agent: EventInfoExtractionAgent):
+    PUBSUB_MESSAGES.inc()
     message=pubsub_message.message
     pubsub_message_data=message.data
     if pubsub_message_data is not None:
@@ -32,7 +54,7 @@ async def process_pubsub_message(pubsub_message: PubSubMessage, event_data_servi
         pubsub_data=decoded_data.get("pubsub_data", None)
         session_id=pubsub_data['session_id']
         page=pubsub_data['page']
-        await process_events(event_data_service, agent, session_id, page)
+        await process_events(event_data_service, agent, session_id, page, event_ids=pubsub_data.get('event_ids'), website=pubsub_data.get('website'))
         logging.info("Event processing done")
 
 
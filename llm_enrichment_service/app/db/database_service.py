@@ -4,6 +4,10 @@ from app.schemas.llm_output import LLM_Output
 # from dotenv import load_dotenv
 # load_dotenv()
 
+def session_filter(session_id:str)->dict:
+    """Matches events linked to `session_id`, including ones stored before `session_ids` existed."""
+    return {"$or":[{"session_ids":session_id}, {"session_id":session_id}]}
+
 
 class DatabaseService:
     def __init__(self, collection_name:str):
@@ -36,20 +40,25 @@ class EventDataService(DatabaseService):
             await self.init_collection()
         skip=(page-1)*page_size
         try:
-            cursor=self.collection.find({"session_id":session_id}).sort("event_id", 1).skip(skip).limit(page_size)
+            cursor=self.collection.find({**session_filter(session_id), "canonical_event_id":None}).sort("event_id", 1).skip(skip).limit(page_size) # duplicates aren't enriched
             events=await cursor.to_list()
             return events
         except Exception as e:
             logging.error(f"Error finding events:{e}")
             return []
 
+    async def get_page_events_by_ids(self, session_id:str, page:int, event_ids:list[str], page_size:int=10):
+        """The events among `event_ids` that are on `page` of the session's events, in `get_paginated_events` order."""
+        requested=set(event_ids)
+        return [event for event in await self.get_paginated_events(session_id, page, page_size) if event["_id"] in requested]
+
     async def update_event_with_llm_output(self, session_id:str, event_id:str, llm_output:LLM_Output):
         if self.collection is None:
             await self.init_collection()
         try:
             logging.info("Updating event...")
             llm_output=llm_output.model_dump(by_alias=True)
-            await self.collection.update_one({"_id":event_id, "session_id":session_id}, {"$set":{"llm_output": llm_output, "status":"completed"}})
+            await self.collection.update_one({**session_filter(session_id), "_id":event_id}, {"$set":{"llm_output": llm_output, "status":"completed"}})
         except Exception as e:
             logging.error(f"An error occurred updating events:{e}")
 
@@ -2,12 +2,16 @@ from fastapi import FastAPI
 from app.routes import recieve_pubsub
 from contextlib import asynccontextmanager
 from app.db.database_connection import db_connection
+from concierge_shared.browser_pool import browser_pool
+from app.core.metrics import metrics_app
 
 
 @asynccontextmanager
 async def lifespan(app:FastAPI):
     await db_connection.connect()
+    await browser_pool.start()
     yield
+    await browser_pool.close()
     await db_connection.close()
     
 app=FastAPI(lifespan=lifespan)
@@ -16,4 +20,5 @@ app=FastAPI(lifespan=lifespan)
 def root():
     return {"message":"LLM service is up!"}
 
-app.include_router(recieve_pubsub.router, prefix="/recieve-pubsub")
\ No newline at end of file
+app.include_router(recieve_pubsub.router, prefix="/recieve-pubsub")
+app.mount("/metrics", metrics_app) # Prometheus scrape endpoint
\ No newline at end of file
@@ -19,4 +19,4 @@ echo "
             {/^^^\}
               m-m ldb
 "
-gcloud builds submit --tag ${IMAGE_TAG}
\ No newline at end of file
+gcloud builds submit .. --config cloudbuild.yaml --substitutions=_IMAGE_TAG="${IMAGE_TAG}"
\ No newline at end of file
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.core.process_pubsub_message import process_events
+from app.db.database_service import EventDataService
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, field, direction):
+        self.documents = sorted(self.documents, key=lambda document: document[field])
+        return self
+
+    def skip(self, count):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self):
+        return self.documents
+
+
+class FakeEventsCollection:
+    """Answers the session/page queries `EventDataService` sends and records the enrichment updates."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.updated = []
+
+    def find(self, query):
+        return FakeCursor([
+            document for document in self.documents
+            if document.get("canonical_event_id") == query.get("canonical_event_id")
+        ])
+
+    async def update_one(self, query, update):
+        self.updated.append(query["_id"])
+
+
+class FakeAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def run_task(self, contents):
+        self.calls += 1
+        return {}
+
+
+def stored_event(event_id, **fields):
+    return {"_id": event_id, "event_id": event_id, "domain": "wherecanwego.com", "status": "pending", "session_ids": ["session-1"], **fields}
+
+
+def test_batch_is_enriched_only_where_it_falls_on_the_requested_page():
+    documents = [stored_event(f"{i:03d}") for i in range(25)]
+    documents.append(stored_event("001-duplicate", canonical_event_id="001"))
+    documents[2]["status"] = "completed"
+    service = EventDataService()
+    service.collection = FakeEventsCollection(documents)
+    agent = FakeAgent()
+    batch = [f"{i:03d}" for i in range(0, 25, 2)] + ["001-duplicate"] # one site's events, spread over three pages
+
+    asyncio.run(process_events(service, agent, "session-1", page=1, event_ids=batch, website="wherecanwego"))
+
+    assert service.collection.updated == ["000", "004", "006", "008"] # page 1 is 000-009, 002 already enriched
+    assert agent.calls == 4
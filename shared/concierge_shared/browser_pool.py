@@ -0,0 +1,201 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright, Browser, Page
+from dotenv import load_dotenv
+load_dotenv()
+
+MAX_BROWSERS=int(os.getenv("BROWSER_POOL_MAX_BROWSERS", 2))
+MAX_PAGES=int(os.getenv("BROWSER_POOL_MAX_PAGES", 6))
+MAX_PAGES_PER_BROWSER=int(os.getenv("BROWSER_POOL_MAX_PAGES_PER_BROWSER", 50))
+MAX_RSS_MB=int(os.getenv("BROWSER_POOL_MAX_RSS_MB", 1500))
+
+
+def _child_pids(pid: int) -> set[int]:
+    """Direct children of a process, read from `/proc/<pid>/task/<tid>/children`. Empty when `/proc` is unavailable."""
+    children = set()
+    try:
+        task_dir = f"/proc/{pid}/task"
+        for tid in os.listdir(task_dir):
+            with open(f"{task_dir}/{tid}/children") as f:
+                children.update(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def _is_playwright_driver(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"run-driver" in f.read()
+    except OSError:
+        return False
+
+
+def _process_tree_rss_mb(pid: int) -> float:
+    """Returns the resident memory (MB) of a process and all of its descendants, 0 when `/proc` is unavailable."""
+    total_kb = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+        stack.extend(_child_pids(current))
+    return total_kb / 1024
+
+
+class PooledBrowser:
+    def __init__(self, browser: Browser, pid: int | None = None):
+        self.browser = browser
+        self.pid = pid # the browser's main process, its renderers and helpers run under it
+        self.pages_served = 0
+        self.active_pages = 0
+        self.retired = False
+
+    @property
+    def is_usable(self) -> bool:
+        return not self.retired and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Keeps a small number of warm headless Chromium browsers and hands out isolated
+    contexts/pages from them, so a render doesn't pay for a driver and browser cold start.
+
+    Browsers are recycled after `max_pages_per_browser` pages or once the browser's own process
+    tree (browser, renderer and helper processes) goes over `max_rss_mb`. A retired browser is
+    closed when its last page is released.
+    """
+
+    def __init__(
+        self,
+        max_browsers: int = MAX_BROWSERS,
+        max_pages: int = MAX_PAGES,
+        max_pages_per_browser: int = MAX_PAGES_PER_BROWSER,
+        max_rss_mb: int = MAX_RSS_MB,
+        launch_kwargs: dict = None,
+    ):
+        self.max_browsers = max_browsers
+        self.max_pages = max_pages
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.launch_kwargs = launch_kwargs or {"headless": True}
+        self._playwright = None
+        self._driver_pid: int | None = None
+        self._start_lock = asyncio.Lock()
+        self._browsers: list[PooledBrowser] = []
+        self._page_slots: asyncio.Semaphore | None = None
+        self._lock: asyncio.Lock | None = None
+        self.stats = {"launched": 0, "recycled": 0, "pages_served": 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        async with self._start_lock:
+            if self.is_running:
+                return
+            self._lock = asyncio.Lock()
+            self._page_slots = asyncio.Semaphore(self.max_pages)
+            children = _child_pids(os.getpid())
+            self._playwright = await async_playwright().start()
+            drivers = [pid for pid in _child_pids(os.getpid()) - children if _is_playwright_driver(pid)]
+            self._driver_pid = drivers[0] if len(drivers) == 1 else None
+            logging.info("Browser pool started")
+
+    async def close(self):
+        async with self._start_lock:
+            if not self.is_running:
+                return
+            for pooled in self._browsers:
+                await self._close_browser(pooled)
+            self._browsers = []
+            await self._playwright.stop()
+            self._playwright = None
+            self._driver_pid = None
+            logging.info("Browser pool closed")
+
+    async def _launch(self) -> PooledBrowser:
+        # launches are serialised by `_lock`, so the driver's one new child is this browser
+        children = _child_pids(self._driver_pid) if self._driver_pid else set()
+        browser = await self._playwright.chromium.launch(**self.launch_kwargs)
+        launched = _child_pids(self._driver_pid) - children if self._driver_pid else set()
+        pooled = PooledBrowser(browser, launched.pop() if len(launched) == 1 else None)
+        self._browsers.append(pooled)
+        self.stats["launched"] += 1
+        return pooled
+
+    async def _close_browser(self, pooled: PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logging.warning(f"Error closing pooled browser: {e}")
+
+    async def _acquire_browser(self) -> PooledBrowser:
+        async with self._lock:
+            self._browsers = [b for b in self._browsers if b.browser.is_connected() or b.active_pages]
+            usable = [b for b in self._browsers if b.is_usable]
+            if not usable or (
+                len(self._browsers) < self.max_browsers and all(b.active_pages for b in usable)
+            ):
+                pooled = await self._launch()
+            else:
+                pooled = min(usable, key=lambda b: b.active_pages)
+            pooled.active_pages += 1
+            return pooled
+
+    async def _release_browser(self, pooled: PooledBrowser):
+        async with self._lock:
+            pooled.active_pages -= 1
+            pooled.pages_served += 1
+            self.stats["pages_served"] += 1
+            if not pooled.retired and (
+                pooled.pages_served >= self.max_pages_per_browser
+                or (pooled.pid is not None and _process_tree_rss_mb(pooled.pid) >= self.max_rss_mb)
+            ):
+                pooled.retired = True
+                self.stats["recycled"] += 1
+            if pooled.retired and pooled.active_pages == 0:
+                if pooled in self._browsers:
+                    self._browsers.remove(pooled)
+                await self._close_browser(pooled)
+
+    @asynccontextmanager
+    async def page(self, **context_kwargs) -> Page:
+        """
+        Yields a page in a fresh browser context (cookies/storage are not shared between callers).
+
+        Args:
+        ------
+            context_kwargs: Passed to `browser.new_context()`, e.g. `user_agent`.
+        """
+        if not self.is_running:
+            await self.start()
+        async with self._page_slots:
+            pooled = await self._acquire_browser()
+            context = None
+            try:
+                context = await pooled.browser.new_context(**context_kwargs)
+                yield await context.new_page()
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logging.warning(f"Error closing browser context: {e}")
+                await self._release_browser(pooled)
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import random
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator
+from prometheus_client import Counter, Histogram
+from dotenv import load_dotenv
+load_dotenv()
+
+LOG_SAMPLE_RATE=float(os.getenv("LOG_SAMPLE_RATE", 0.1)) # share of info/debug structured logs emitted, warnings are always emitted
+
+
+def postcode_label(postcode: str | None) -> str:
+    """The postcode district ("N7" for "n7 9qt"), full postcodes would make too many time series."""
+    parts=(postcode or "").upper().split()
+    if len(parts) > 1:
+        return parts[0]
+    compact="".join(parts)
+    return compact[:-3] if len(compact) > 4 else compact
+
+
+class Span:
+    __slots__=("stage", "site", "postcode", "failed")
+
+    def __init__(self, stage: str, site: str, postcode: str):
+        self.stage=stage
+        self.site=site
+        self.postcode=postcode
+        self.failed=False
+
+
+class StageTimer:
+    """
+    Times request stages into a service's `seconds` histogram and counts failed ones in its `failures` counter.
+
+    Both are labelled `(stage, site, postcode)` and `(stage, site)`, or `(stage, postcode)` and `(stage,)`
+    with `per_site=False`. Labels left out of a call come from `default_labels()` (a `(site, postcode)`
+    pair), or are empty. Exceptions are counted as failures and re-raised; stages that report errors in
+    their result can set `span.failed` instead.
+    """
+
+    def __init__(self, seconds: Histogram, failures: Counter, per_site: bool = True, default_labels: Callable[[], tuple[str, str]] | None = None):
+        self.seconds=seconds
+        self.failures=failures
+        self.per_site=per_site
+        self.default_labels=default_labels
+        self._histograms: dict[tuple[str, str, str], Histogram]={} # labelled children, `labels()` is the costliest part of a span
+
+    @contextmanager
+    def __call__(self, name: str, site: str | None = None, postcode: str | None = None) -> Iterator[Span]:
+        default_site, default_postcode=self.default_labels() if self.default_labels else ("", "")
+        span=Span(name, default_site if site is None else site, default_postcode if postcode is None else postcode_label(postcode))
+        start=time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            span.failed=True
+            raise
+        finally:
+            key=(span.stage, span.site, span.postcode)
+            histogram=self._histograms.get(key)
+            if histogram is None:
+                histogram=self._histograms[key]=self.seconds.labels(*key) if self.per_site else self.seconds.labels(span.stage, span.postcode)
+            histogram.observe(time.perf_counter() - start)
+            if span.failed:
+                (self.failures.labels(span.stage, span.site) if self.per_site else self.failures.labels(span.stage)).inc()
+
+
+def log_sampled(event: str, level: int = logging.INFO, rate: float = None, **fields):
+    """
+    Logs `event` and `fields` as one JSON line. Below warning level only a `rate` share (default
+    `LOG_SAMPLE_RATE`) of calls is logged, so it's cheap enough for per-request and per-event paths.
+    """
+    if level < logging.WARNING and random.random() >= (LOG_SAMPLE_RATE if rate is None else rate):
+        return
+    logging.log(level, json.dumps({"event":event, **fields}, default=str))
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from concierge_shared import browser_pool as browser_pool_module
+from concierge_shared.browser_pool import BrowserPool, _process_tree_rss_mb
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    async def launch(self, **kwargs):
+        await asyncio.sleep(0.01)
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    starts = 0
+
+    def __init__(self):
+        self.chromium = FakeChromium()
+        self.stopped = False
+
+    async def start(self):
+        FakePlaywright.starts += 1
+        await asyncio.sleep(0.01) # the driver takes a while to come up, concurrent callers pile in
+        return self
+
+    async def stop(self):
+        self.stopped = True
+
+
+def fake_playwright(monkeypatch):
+    FakePlaywright.starts = 0
+    monkeypatch.setattr(browser_pool_module, "async_playwright", FakePlaywright)
+
+
+def test_pages_reuse_one_warm_browser_with_fresh_contexts(monkeypatch):
+    fake_playwright(monkeypatch)
+
+    async def run():
+        pool = BrowserPool(max_browsers=2, max_pages=4)
+        for _ in range(3):
+            async with pool.page():
+                pass
+        chromium = pool._playwright.chromium
+        await pool.close()
+        return pool, chromium
+
+    pool, chromium = asyncio.run(run())
+    assert pool.stats == {"launched": 1, "recycled": 0, "pages_served": 3}
+    assert len(chromium.browsers) == 1
+    assert [context.closed for context in chromium.browsers[0].contexts] == [True, True, True]
+    assert not chromium.browsers[0].connected # closed with the pool
+
+
+def test_concurrent_first_callers_start_one_driver(monkeypatch):
+    fake_playwright(monkeypatch)
+
+    async def run():
+        pool = BrowserPool(max_browsers=1, max_pages=8)
+
+        async def render():
+            async with pool.page():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(render() for _ in range(8)))
+        await pool.close()
+        return pool
+
+    pool = asyncio.run(run())
+    assert FakePlaywright.starts == 1
+    assert pool.stats["launched"] == 1
+
+
+def test_limits_open_pages_and_browsers(monkeypatch):
+    fake_playwright(monkeypatch)
+    open_pages = 0
+    max_open_pages = 0
+
+    async def run():
+        pool = BrowserPool(max_browsers=2, max_pages=3)
+
+        async def render():
+            nonlocal open_pages, max_open_pages
+            async with pool.page():
+                open_pages += 1
+                max_open_pages = max(max_open_pages, open_pages)
+                await asyncio.sleep(0.02)
+                open_pages -= 1
+
+        await asyncio.gather(*(render() for _ in range(10)))
+        browsers = len(pool._playwright.chromium.browsers)
+        await pool.close()
+        return browsers
+
+    assert asyncio.run(run()) == 2
+    assert max_open_pages == 3
+
+
+def test_recycles_browser_after_max_pages(monkeypatch):
+    fake_playwright(monkeypatch)
+
+    async def run():
+        pool = BrowserPool(max_browsers=1, max_pages=1, max_pages_per_browser=2)
+        for _ in range(5):
+            async with pool.page():
+                pass
+        browsers = pool._playwright.chromium.browsers
+        await pool.close()
+        return pool, browsers
+
+    pool, browsers = asyncio.run(run())
+    assert pool.stats == {"launched": 3, "recycled": 2, "pages_served": 5}
+    assert [browser.connected for browser in browsers] == [False, False, False]
+
+
+def test_recycles_only_the_browser_over_its_memory_cap(monkeypatch):
+    fake_playwright(monkeypatch)
+    rss_mb = {101: 2000, 102: 300}
+    monkeypatch.setattr(browser_pool_module, "_process_tree_rss_mb", lambda pid: rss_mb[pid])
+
+    class NumberedPool(BrowserPool):
+        async def _launch(self):
+            pooled = await super()._launch()
+            pooled.pid = 100 + self.stats["launched"] # stands in for the browser process found under the driver
+            return pooled
+
+    async def run():
+        pool = NumberedPool(max_browsers=2, max_pages=2, max_rss_mb=1500)
+        both_open = asyncio.Event() # both pages open at once, so each lands on its own browser
+
+        async def render():
+            async with pool.page():
+                if pool.stats["launched"] == 2:
+                    both_open.set()
+                await both_open.wait()
+
+        await asyncio.gather(render(), render())
+        remaining = [b.pid for b in pool._browsers]
+        await pool.close()
+        return pool, remaining
+
+    pool, remaining = asyncio.run(run())
+    assert pool.stats["recycled"] == 1
+    assert remaining == [102]
+
+
+def test_process_tree_rss_covers_the_given_process():
+    assert _process_tree_rss_mb(os.getpid()) > 0
+    assert _process_tree_rss_mb(2 ** 22 + 1) == 0 # no such process
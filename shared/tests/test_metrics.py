@@ -0,0 +1,55 @@
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from concierge_shared.metrics import StageTimer, log_sampled, postcode_label
+
+
+def test_postcode_label_is_the_district():
+    assert [postcode_label(p) for p in ("n7 9qt", "N19QZ", "EC1V 4PW", "N7", "", None)] == ["N7", "N1", "EC1V", "N7", "", ""]
+
+
+def test_stage_timer_labels_and_failures():
+    registry = CollectorRegistry()
+    seconds = Histogram("test_stage_seconds", "", ["stage", "site", "postcode"], registry=registry)
+    failures = Counter("test_stage_failures_total", "", ["stage", "site"], registry=registry)
+    stage = StageTimer(seconds, failures, default_labels=lambda: ("example", "N7"))
+
+    with stage("fetch"):
+        pass
+    with stage("parse", site="other", postcode="EC1V 4PW") as span:
+        span.failed = True
+    with pytest.raises(ValueError), stage("fetch"):
+        raise ValueError("boom")
+
+    assert registry.get_sample_value("test_stage_seconds_count", {"stage": "fetch", "site": "example", "postcode": "N7"}) == 2
+    assert registry.get_sample_value("test_stage_seconds_count", {"stage": "parse", "site": "other", "postcode": "EC1V"}) == 1
+    assert registry.get_sample_value("test_stage_failures_total", {"stage": "fetch", "site": "example"}) == 1
+    assert registry.get_sample_value("test_stage_failures_total", {"stage": "parse", "site": "other"}) == 1
+
+
+def test_stage_timer_without_sites():
+    registry = CollectorRegistry()
+    seconds = Histogram("test_request_seconds", "", ["stage", "postcode"], registry=registry)
+    failures = Counter("test_request_failures_total", "", ["stage"], registry=registry)
+    stage = StageTimer(seconds, failures, per_site=False)
+
+    with stage("lookup", postcode="n7 9qt") as span:
+        span.failed = True
+
+    assert registry.get_sample_value("test_request_seconds_count", {"stage": "lookup", "postcode": "N7"}) == 1
+    assert registry.get_sample_value("test_request_failures_total", {"stage": "lookup"}) == 1
+
+
+def test_log_sampled_always_logs_warnings(caplog):
+    with caplog.at_level(logging.INFO):
+        for _ in range(20):
+            log_sampled("dropped", rate=0)
+        log_sampled("kept", rate=1, url="https://example.com")
+        log_sampled("warned", level=logging.WARNING, rate=0)
+    assert [record.getMessage() for record in caplog.records] == ['{"event": "kept", "url": "https://example.com"}', '{"event": "warned"}']